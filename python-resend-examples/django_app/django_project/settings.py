@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -7,6 +8,9 @@ load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Reuse the shared helper modules that live next to the standalone examples
+sys.path.append(str(BASE_DIR.parent / "examples"))
+
 SECRET_KEY = "django-insecure-example-key-change-in-production"
 DEBUG = True
 ALLOWED_HOSTS = ["*"]
@@ -29,5 +33,35 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "")
 EMAIL_FROM = os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>")
 RESEND_WEBHOOK_SECRET = os.environ.get("RESEND_WEBHOOK_SECRET", "")
+# Larger webhook bodies are rejected with a 413 while they are read
+RESEND_WEBHOOK_MAX_BYTES = int(os.environ.get("RESEND_WEBHOOK_MAX_BYTES", str(10 * 1024 * 1024)))
 RESEND_AUDIENCE_ID = os.environ.get("RESEND_AUDIENCE_ID", "")
 CONFIRM_REDIRECT_URL = os.environ.get("CONFIRM_REDIRECT_URL", "https://example.com/confirmed")
+RESEND_COALESCE_MS = float(os.environ.get("RESEND_COALESCE_MS", "0"))
+# Seconds a template's declared variables are cached before a background refresh
+RESEND_TEMPLATE_TTL = float(os.environ.get("RESEND_TEMPLATE_TTL", "300"))
+
+# Worker threads (webhook inbox, outbox) start in server processes; set
+# RESEND_START_WORKERS=0 for web processes that should leave them to others
+RESEND_START_WORKERS = os.environ.get("RESEND_START_WORKERS", "1") == "1"
+
+# Outbox mode: queue sends locally and return 202 (see resend_app/outbox.py)
+RESEND_OUTBOX = os.environ.get("RESEND_OUTBOX", "0") == "1"
+RESEND_OUTBOX_PATH = os.environ.get("RESEND_OUTBOX_PATH", str(BASE_DIR / "outbox.sqlite3"))
+RESEND_OUTBOX_WORKERS = int(os.environ.get("RESEND_OUTBOX_WORKERS", "4"))
+
+# Webhook events are queued here and processed by background workers
+RESEND_WEBHOOK_INBOX_PATH = os.environ.get("RESEND_WEBHOOK_INBOX", str(BASE_DIR / "webhooks.sqlite3"))
+RESEND_WEBHOOK_WORKERS = int(os.environ.get("RESEND_WEBHOOK_WORKERS", "4"))
+
+# Handled svix-ids, so retried deliveries are answered without new work.
+# Set the DB path to share them between worker processes.
+RESEND_WEBHOOK_DEDUP_TTL = float(os.environ.get("RESEND_WEBHOOK_DEDUP_TTL", str(48 * 3600)))
+RESEND_WEBHOOK_DEDUP_MAX = int(os.environ.get("RESEND_WEBHOOK_DEDUP_MAX", "100000"))
+RESEND_WEBHOOK_DEDUP_DB = os.environ.get("RESEND_WEBHOOK_DEDUP_DB", "")
+
+# Email -> contact id per audience, for double opt-in confirmations
+RESEND_CONTACT_INDEX = os.environ.get("RESEND_CONTACT_INDEX", str(BASE_DIR / "contacts.sqlite3"))
+
+# Delivery events (sent, delivered, bounced, ...) and their per-minute rollups
+RESEND_EVENTS_DB = os.environ.get("RESEND_EVENTS_DB", str(BASE_DIR / "events.sqlite3"))
@@ -9,10 +9,13 @@ urlpatterns = [
     path("send-cid", views.send_cid, name="send_cid"),
     path("send-scheduled", views.send_scheduled, name="send_scheduled"),
     path("send-template", views.send_template, name="send_template"),
+    path("outbox/<str:message_id>", views.outbox_status, name="outbox_status"),
     path("webhook", views.webhook, name="webhook"),
+    path("stats/deliveries", views.delivery_stats, name="delivery_stats"),
     path("domains", views.list_domains, name="list_domains"),
     path("domains/create", views.create_domain, name="create_domain"),
     path("audiences/contacts", views.list_contacts, name="list_contacts"),
+    path("audiences/contacts/export", views.contacts_export, name="contacts_export"),
     path("double-optin/subscribe", views.double_optin_subscribe, name="double_optin_subscribe"),
     path("double-optin/webhook", views.double_optin_webhook, name="double_optin_webhook"),
 ]
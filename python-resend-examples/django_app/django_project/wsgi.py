@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
 
 application = get_wsgi_application()
+
+# Background workers run in server processes only (see resend_app/apps.py)
+from resend_app.apps import start_workers  # noqa: E402
+
+start_workers()
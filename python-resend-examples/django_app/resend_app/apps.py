@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ResendAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "resend_app"
+
+
+_started = False
+
+
+def start_workers():
+    """
+    Start the webhook inbox and outbox worker threads.
+
+    Called from the server entrypoint (wsgi.py, which runserver loads too)
+    rather than from ready(), so migrate, shell, the autoreloader's parent
+    process and outbox_worker don't start a set of workers of their own.
+    """
+    global _started
+    if _started or not settings.RESEND_START_WORKERS:
+        return
+    _started = True
+
+    from resend_app import webhooks
+
+    webhooks.inbox.start()
+
+    if settings.RESEND_OUTBOX and settings.RESEND_OUTBOX_WORKERS:
+        from resend_app import outbox
+
+        outbox.configure()
+        outbox.worker_pool(settings.RESEND_OUTBOX_WORKERS).start()
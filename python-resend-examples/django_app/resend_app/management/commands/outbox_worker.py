@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Send emails queued in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        from resend_app import outbox
+
+        if not settings.RESEND_OUTBOX:
+            raise CommandError("Outbox mode is disabled (set RESEND_OUTBOX=1)")
+
+        outbox.configure()
+
+        pool = outbox.worker_pool(options["workers"]).start()
+        self.stdout.write(f"Draining {settings.RESEND_OUTBOX_PATH} with {options['workers']} worker(s)")
+
+        try:
+            while True:
+                time.sleep(60)
+                self.stdout.write(f"Outbox: {outbox.queue.counts()}")
+        except KeyboardInterrupt:
+            pool.stop(timeout=30)
@@ -0,0 +1,53 @@
+"""
+Outbox mode: views store outgoing emails in a local SQLite queue and
+return 202 right away, and worker threads send them with retries.
+
+Enable with RESEND_OUTBOX=1. Workers start with the server (see apps.py);
+run more in separate processes with `python manage.py outbox_worker`.
+"""
+
+import uuid
+
+import resend
+from django.conf import settings
+
+from rate_limiter import RateLimitedHTTPClient, RateLimiter
+from retry import is_transient
+from sqlite_queue import QueueWorkerPool, SQLiteQueue
+
+queue = SQLiteQueue(settings.RESEND_OUTBOX_PATH) if settings.RESEND_OUTBOX else None
+
+
+def enqueue(params):
+    """Store an email for sending and return its local message id."""
+    return queue.put(
+        {
+            "params": params,
+            # Stable across retries, so a retried send is never delivered twice
+            "idempotency_key": f"outbox/{uuid.uuid4()}",
+        }
+    )
+
+
+def send(payload):
+    result = resend.Emails.send(
+        payload["params"], {"idempotency_key": payload["idempotency_key"]}
+    )
+    return {"id": result["id"]}
+
+
+def configure():
+    """
+    Set the API key and the shared rate limiter, as views.py does.
+
+    Workers can run in processes that never import the views (outbox_worker,
+    or wsgi.py before the first request), so they don't rely on it.
+    """
+    resend.api_key = settings.RESEND_API_KEY
+    if not isinstance(resend.default_http_client, RateLimitedHTTPClient):
+        resend.default_http_client = RateLimitedHTTPClient(RateLimiter.from_env())
+
+
+def worker_pool(workers):
+    # 4xx errors (bad address, invalid template, ...) won't fix themselves
+    return QueueWorkerPool(queue, send, workers=workers, is_retryable=is_transient)
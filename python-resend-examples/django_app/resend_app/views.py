@@ -3,21 +3,63 @@ import logging
 
 import resend
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
-from svix.webhooks import Webhook, WebhookVerificationError
+
+from asset_registry import asset_registry
+from attachments import encode_attachment
+from batch_coalescer import BatchCoalescer
+from contact_export import EXPORT_FORMATS, export_contacts
+from contact_pages import iter_contacts
+from email_templates import preload, render_template
+from rate_limiter import RateLimitedHTTPClient, RateLimiter
+from render_pipeline import render_params
+from retry import send_with_retry
+from template_schema import TemplateSchemaCache
+from webhook_dedup import DeliveryInProgress
+from webhook_verifier import WebhookPayloadTooLarge, WebhookVerificationError, WebhookVerifier, read_chunks
+from resend_app import outbox
+from resend_app.webhooks import contact_index, dedup, delivery_events, inbox
 
 logger = logging.getLogger(__name__)
 
 resend.api_key = settings.RESEND_API_KEY
 
+# Every SDK call waits for a token bucket shared by all worker processes
+resend.default_http_client = RateLimitedHTTPClient(RateLimiter.from_env())
+
+# Opt-in: merge concurrent /send calls into Batch.send requests
+coalescer = (
+    BatchCoalescer(window=settings.RESEND_COALESCE_MS / 1000)
+    if settings.RESEND_COALESCE_MS
+    else None
+)
+
+# Compile the email templates now rather than on the first request
+preload()
+
+# Declared variables of each Resend template, to validate sends locally
+template_schemas = TemplateSchemaCache(ttl=settings.RESEND_TEMPLATE_TTL)
+
+# Signing secrets are decoded once; several can be active during a rotation
+webhook_verifier = WebhookVerifier(
+    settings.RESEND_WEBHOOK_SECRET, max_body_bytes=settings.RESEND_WEBHOOK_MAX_BYTES
+)
+
 
 @require_GET
 def health(request):
     return JsonResponse({"status": "ok"})
 
 
+def queued(params, **extra):
+    message_id = outbox.enqueue(params)
+    return JsonResponse(
+        {"success": True, "id": message_id, "status": "queued", **extra}, status=202
+    )
+
+
 @csrf_exempt
 @require_POST
 def send_email(request):
@@ -35,15 +77,22 @@ def send_email(request):
             {"error": "Missing required fields: to, subject, message"}, status=400
         )
 
+    params = {
+        "from": settings.EMAIL_FROM,
+        "to": [to],
+        "subject": subject,
+        "html": f"<p>{message}</p>",
+    }
+
+    if outbox.queue:
+        return queued(params)
+
     try:
-        result = resend.Emails.send(
-            {
-                "from": settings.EMAIL_FROM,
-                "to": [to],
-                "subject": subject,
-                "html": f"<p>{message}</p>",
-            }
-        )
+        if coalescer:
+            result = coalescer.send(params)
+        else:
+            # Retries reuse one idempotency key, so they never send twice
+            result = send_with_retry(params, request.headers.get("Idempotency-Key"))
         return JsonResponse({"success": True, "id": result["id"]})
     except Exception:
         logger.exception("Error sending email")
@@ -62,7 +111,6 @@ def send_attachment(request):
     if not to:
         return JsonResponse({"error": "Missing required field: to"}, status=400)
 
-    import base64
     import datetime
 
     file_content = (
@@ -72,21 +120,20 @@ def send_attachment(request):
         f"Sent at: {datetime.datetime.now().isoformat()}\n"
     )
 
+    params = {
+        "from": settings.EMAIL_FROM,
+        "to": [to],
+        "subject": "Email with Attachment - Resend Example",
+        "html": "<h1>Your attachment is ready</h1><p>Please find the sample file attached.</p>",
+        # Size-checked against the 40MB limit before encoding
+        "attachments": [encode_attachment(file_content.encode(), "sample.txt")],
+    }
+
+    if outbox.queue:
+        return queued(params)
+
     try:
-        result = resend.Emails.send(
-            {
-                "from": settings.EMAIL_FROM,
-                "to": [to],
-                "subject": "Email with Attachment - Resend Example",
-                "html": "<h1>Your attachment is ready</h1><p>Please find the sample file attached.</p>",
-                "attachments": [
-                    {
-                        "filename": "sample.txt",
-                        "content": base64.b64encode(file_content.encode()).decode(),
-                    }
-                ],
-            }
-        )
+        result = resend.Emails.send(params)
         return JsonResponse({"success": True, "id": result["id"]})
     except Exception:
         logger.exception("Error sending email with attachment")
@@ -105,23 +152,17 @@ def send_cid(request):
     if not to:
         return JsonResponse({"error": "Missing required field: to"}, status=400)
 
-    placeholder_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
-
     try:
+        # asset:logo becomes cid:logo plus the logo attachment, encoded at startup
         result = resend.Emails.send(
-            {
-                "from": settings.EMAIL_FROM,
-                "to": [to],
-                "subject": "Email with Inline Image - Resend Example",
-                "html": '<div style="text-align:center;padding:20px;"><img src="cid:logo" alt="Logo" width="100" height="100" /><h1>Inline Image Example</h1><p>The image above is embedded using CID.</p></div>',
-                "attachments": [
-                    {
-                        "filename": "logo.png",
-                        "content": placeholder_image,
-                        "content_id": "logo",
-                    }
-                ],
-            }
+            asset_registry.inline_params(
+                {
+                    "from": settings.EMAIL_FROM,
+                    "to": [to],
+                    "subject": "Email with Inline Image - Resend Example",
+                    "html": '<div style="text-align:center;padding:20px;"><img src="asset:logo" alt="Logo" width="100" height="100" /><h1>Inline Image Example</h1><p>The image above is embedded using CID.</p></div>',
+                }
+            )
         )
         return JsonResponse({"success": True, "id": result["id"]})
     except Exception:
@@ -148,16 +189,19 @@ def send_scheduled(request):
             status=400,
         )
 
+    params = {
+        "from": settings.EMAIL_FROM,
+        "to": [to],
+        "subject": subject,
+        "html": f"<p>{message}</p>",
+        "scheduled_at": scheduled_at,
+    }
+
+    if outbox.queue:
+        return queued(params, scheduledFor=scheduled_at)
+
     try:
-        result = resend.Emails.send(
-            {
-                "from": settings.EMAIL_FROM,
-                "to": [to],
-                "subject": subject,
-                "html": f"<p>{message}</p>",
-                "scheduled_at": scheduled_at,
-            }
-        )
+        result = resend.Emails.send(params)
         return JsonResponse(
             {"success": True, "id": result["id"], "scheduledFor": scheduled_at}
         )
@@ -183,24 +227,62 @@ def send_template(request):
             {"error": "Missing required fields: to, templateId"}, status=400
         )
 
+    if not isinstance(variables, dict):
+        return JsonResponse({"error": "variables must be an object"}, status=400)
+
+    # Catch variable typos before they cost an API call and a rate limit slot
     try:
-        result = resend.Emails.send(
-            {
-                "from": settings.EMAIL_FROM,
-                "to": [to],
-                "subject": "Email from Template",
-                "template": {
-                    "id": template_id,
-                    "variables": variables,
-                },
-            }
+        problems = template_schemas.validate(template_id, variables)
+    except Exception:
+        # Fail open: Resend still validates the variables when we send
+        logger.exception("Could not check variables for template %s", template_id)
+        problems = []
+    if problems:
+        return JsonResponse(
+            {"error": "Invalid template variables", "details": problems}, status=400
         )
+
+    params = {
+        "from": settings.EMAIL_FROM,
+        "to": [to],
+        "subject": "Email from Template",
+        "template": {
+            "id": template_id,
+            "variables": variables,
+        },
+    }
+
+    if outbox.queue:
+        return queued(params)
+
+    try:
+        result = resend.Emails.send(params)
         return JsonResponse({"success": True, "id": result["id"]})
     except Exception:
         logger.exception("Error sending template email")
         return JsonResponse({"error": "Failed to send email"}, status=500)
 
 
+@require_GET
+def outbox_status(request, message_id):
+    if not outbox.queue:
+        return JsonResponse({"error": "Outbox mode is disabled"}, status=404)
+
+    job = outbox.queue.get(message_id)
+    if job is None:
+        return JsonResponse({"error": "Message not found"}, status=404)
+
+    return JsonResponse(
+        {
+            "id": job["id"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "email_id": (job["result"] or {}).get("id"),
+            "error": job["error"],
+        }
+    )
+
+
 @require_GET
 def list_domains(request):
     try:
@@ -250,14 +332,47 @@ def list_contacts(request):
         )
 
     try:
-        result = resend.Contacts.list(audience_id)
-        contacts = result.get("data", [])
+        # Every page, not just the first
+        contacts = list(iter_contacts(audience_id))
         return JsonResponse({"contacts": contacts, "total": len(contacts)})
     except Exception:
         logger.exception("Error listing contacts")
         return JsonResponse({"error": "Failed to list contacts"}, status=500)
 
 
+@require_GET
+def contacts_export(request):
+    audience_id = settings.RESEND_AUDIENCE_ID
+    if not audience_id:
+        return JsonResponse({"error": "RESEND_AUDIENCE_ID not configured"}, status=400)
+
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+    try:
+        # Streamed page by page; only the first page is fetched up front
+        chunks = export_contacts(audience_id, fmt)
+    except Exception:
+        logger.exception("Error exporting contacts")
+        return JsonResponse({"error": "Failed to export contacts"}, status=500)
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="contacts.{fmt}"'
+    return response
+
+
+@require_GET
+def delivery_stats(request):
+    try:
+        minutes = int(request.GET.get("minutes", 60))
+    except ValueError:
+        minutes = 0
+    if not 1 <= minutes <= 7 * 24 * 60:
+        return JsonResponse({"error": "minutes must be between 1 and 10080"}, status=400)
+    return JsonResponse(delivery_events.window(minutes))
+
+
 @csrf_exempt
 @require_POST
 def webhook(request):
@@ -268,34 +383,40 @@ def webhook(request):
     if not all([svix_id, svix_timestamp, svix_signature]):
         return JsonResponse({"error": "Missing webhook headers"}, status=400)
 
-    webhook_secret = settings.RESEND_WEBHOOK_SECRET
-    if not webhook_secret:
+    if not webhook_verifier.configured:
         return JsonResponse({"error": "Webhook secret not configured"}, status=500)
 
-    payload = request.body.decode("utf-8")
-
     try:
-        wh = Webhook(webhook_secret)
-        event = wh.verify(
-            payload,
-            {
-                "svix-id": svix_id,
-                "svix-timestamp": svix_timestamp,
-                "svix-signature": svix_signature,
-            },
-        )
+        # Hashed while read, so request.body (and its size limit) is never used
+        event = webhook_verifier.verify_stream(read_chunks(request), request.headers)
+    except WebhookPayloadTooLarge:
+        return JsonResponse({"error": "Webhook payload too large"}, status=413)
     except WebhookVerificationError:
         return JsonResponse({"error": "Invalid webhook signature"}, status=400)
 
     event_type = event.get("type", "")
-    logger.info("Received webhook event: %s", event_type)
 
-    if event_type == "email.received":
-        logger.info("New email from: %s", event.get("data", {}).get("from"))
-    elif event_type == "email.delivered":
-        logger.info("Email delivered: %s", event.get("data", {}).get("email_id"))
-    elif event_type == "email.bounced":
-        logger.info("Email bounced: %s", event.get("data", {}).get("email_id"))
+    try:
+        with dedup.claim(svix_id) as first:
+            if not first:
+                return JsonResponse({"received": True, "type": event_type, "duplicate": True})
+
+            logger.info("Received webhook event: %s", event_type)
+            delivery_events.ingest(event, svix_id)
+            # contact.created/updated/deleted keep the email -> id index current
+            contact_index.apply_event(event)
+
+            if event_type == "email.received":
+                logger.info("New email from: %s", event.get("data", {}).get("from"))
+                # A worker fetches the full email after we answer
+                inbox.accept(event, svix_id)
+            elif event_type == "email.delivered":
+                logger.info("Email delivered: %s", event.get("data", {}).get("email_id"))
+            elif event_type == "email.bounced":
+                logger.info("Email bounced: %s", event.get("data", {}).get("email_id"))
+    except DeliveryInProgress:
+        # Not a 2xx, so Svix delivers it again once the first one is done
+        return JsonResponse({"error": "Delivery already being processed"}, status=409)
 
     return JsonResponse({"received": True, "type": event_type})
 
@@ -330,22 +451,21 @@ def double_optin_subscribe(request):
                 "unsubscribed": True,
             }
         )
+        # So the confirmation click finds the contact without listing the audience
+        contact_index.add(audience_id, email, contact["id"])
 
-        # Send confirmation email
-        greeting = f"Welcome, {name}!" if name else "Welcome!"
-        html = f"""<div style="text-align: center; padding: 40px 20px; font-family: Arial, sans-serif;">
-  <h1>{greeting}</h1>
-  <p>Please confirm your subscription to our newsletter.</p>
-  <a href="{confirm_url}" style="background-color: #18181b; color: #fff; padding: 12px 32px; border-radius: 6px; text-decoration: none; font-weight: bold; display: inline-block;">Confirm Subscription</a>
-</div>"""
+        # Send confirmation email (minified, with a plain-text part)
+        html = render_template("double_optin_confirm", {"name": name, "confirm_url": confirm_url})
 
         sent = resend.Emails.send(
-            {
-                "from": settings.EMAIL_FROM,
-                "to": [email],
-                "subject": "Confirm your subscription",
-                "html": html,
-            }
+            render_params(
+                {
+                    "from": settings.EMAIL_FROM,
+                    "to": [email],
+                    "subject": "Confirm your subscription",
+                    "html": html,
+                }
+            )
         )
 
         return JsonResponse(
@@ -364,22 +484,11 @@ def double_optin_subscribe(request):
 @csrf_exempt
 @require_POST
 def double_optin_webhook(request):
-    webhook_secret = settings.RESEND_WEBHOOK_SECRET
-    if not webhook_secret:
+    if not webhook_verifier.configured:
         return JsonResponse({"error": "Webhook secret not configured"}, status=500)
 
-    payload = request.body.decode("utf-8")
-
     try:
-        wh = Webhook(webhook_secret)
-        event = wh.verify(
-            payload,
-            {
-                "svix-id": request.headers.get("svix-id", ""),
-                "svix-timestamp": request.headers.get("svix-timestamp", ""),
-                "svix-signature": request.headers.get("svix-signature", ""),
-            },
-        )
+        event = webhook_verifier.verify(request.body, request.headers)
     except WebhookVerificationError:
         return JsonResponse({"error": "Invalid webhook signature"}, status=400)
 
@@ -390,39 +499,30 @@ def double_optin_webhook(request):
             {"received": True, "type": event_type, "message": "Event type ignored"}
         )
 
-    audience_id = settings.RESEND_AUDIENCE_ID
     recipient_email = event.get("data", {}).get("to", [None])[0]
 
     if not recipient_email:
         return JsonResponse({"error": "No recipient in webhook data"}, status=400)
 
+    svix_id = request.headers.get("svix-id")
     try:
-        contacts = resend.Contacts.list(audience_id)
-        contact = next(
-            (c for c in contacts.get("data", []) if c["email"] == recipient_email),
-            None,
-        )
-
-        if not contact:
-            return JsonResponse({"error": "Contact not found"}, status=404)
-
-        resend.Contacts.update(
-            {
-                "audience_id": audience_id,
-                "id": contact["id"],
-                "unsubscribed": False,
-            }
-        )
-
-        return JsonResponse(
-            {
-                "received": True,
-                "type": event_type,
-                "confirmed": True,
-                "email": recipient_email,
-                "contact_id": contact["id"],
-            }
-        )
+        # A worker finds the contact and marks it confirmed after we answer;
+        # a retried delivery was queued the first time
+        with dedup.claim(f"double-optin/{svix_id}") as first:
+            if first:
+                inbox.accept(event, svix_id)
+    except DeliveryInProgress:
+        return JsonResponse({"error": "Delivery already being processed"}, status=409)
     except Exception:
-        logger.exception("Error in double opt-in webhook")
+        logger.exception("Error queueing double opt-in webhook")
         return JsonResponse({"error": "Failed to process webhook"}, status=500)
+
+    return JsonResponse(
+        {
+            "received": True,
+            "type": event_type,
+            "queued": True,
+            "duplicate": not first,
+            "email": recipient_email,
+        }
+    )
@@ -0,0 +1,41 @@
+"""
+Webhook inbox: the webhook views store verified events in a local SQLite
+queue and answer right away, and worker threads make the follow-up API
+calls (fetching inbound emails, confirming double opt-in contacts).
+
+Workers start with the server (see apps.py); RESEND_WEBHOOK_WORKERS sets
+how many. Deliveries Svix retries are recognised by their svix-id and
+answered without queueing the event again. Delivery events are also
+kept in a local store whose per-minute rollups back /stats/deliveries.
+
+Double opt-in confirmations look up the clicking recipient's contact id
+in a local email -> contact id index. It is filled by the subscribe view
+and kept current by contact.* webhooks.
+"""
+
+from django.conf import settings
+
+from contact_index import ContactIndex
+from delivery_events import DeliveryEventStore
+from sqlite_queue import SQLiteQueue
+from webhook_dedup import WebhookDeduplicator
+from webhook_inbox import WebhookInbox, confirm_subscription, fetch_inbound_email
+
+contact_index = ContactIndex(settings.RESEND_CONTACT_INDEX)
+
+inbox = WebhookInbox(
+    SQLiteQueue(settings.RESEND_WEBHOOK_INBOX_PATH),
+    {
+        "email.received": fetch_inbound_email,
+        "email.clicked": lambda event: confirm_subscription(event, settings.RESEND_AUDIENCE_ID, contact_index),
+    },
+    workers=settings.RESEND_WEBHOOK_WORKERS,
+)
+
+dedup = WebhookDeduplicator(
+    ttl=settings.RESEND_WEBHOOK_DEDUP_TTL,
+    max_entries=settings.RESEND_WEBHOOK_DEDUP_MAX,
+    path=settings.RESEND_WEBHOOK_DEDUP_DB or None,
+)
+
+delivery_events = DeliveryEventStore(settings.RESEND_EVENTS_DB)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Asset Cache
+
+The same logo goes out inline in every email, and a static attachment
+(terms.pdf, a price list) is read and base64-encoded again for every
+send. AssetCache keeps the encoded content keyed by the SHA-256 of the
+raw bytes, so a repeated asset costs a dict lookup instead of a read and
+an encode. Identical bytes are stored once, whatever they're called.
+
+Key points:
+- Bounded by encoded bytes, not entries: the least recently used assets
+  are evicted once `max_bytes` is exceeded
+- Files are remembered by path, size and mtime, so a hit doesn't even
+  read the file, and an edited file is picked up on the next send
+- Assets are size-checked against the 40MB email limit before encoding
+- One process-wide `asset_cache`, sized by RESEND_ASSET_CACHE_MB
+  (default 32); stats() reports hits, misses, evictions and bytes held
+- Meant for small, repeated assets; stream big one-off files with
+  FileAttachment (attachments.py) instead
+
+Usage:
+    from asset_cache import ASSETS_DIR, asset_cache
+
+    attachment = asset_cache.attachment(ASSETS_DIR / "logo.png", content_id="logo")
+
+    python examples/asset_cache.py   # cached vs re-encoded benchmark
+
+See: https://resend.com/docs/send-with-attachments
+"""
+
+import binascii
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from attachments import MAX_EMAIL_BYTES, AttachmentTooLarge, encoded_size
+
+# Static images and files shipped with the examples
+ASSETS_DIR = Path(__file__).parent / "assets"
+
+
+class CachedAsset(NamedTuple):
+    sha256: str
+    content: str  # base64
+    size: int  # raw bytes
+
+
+class AssetCache:
+    """
+    LRU of base64-encoded assets keyed by content hash.
+
+    Args:
+        max_bytes: Encoded bytes kept before the oldest assets are evicted
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._assets: "OrderedDict[str, CachedAsset]" = OrderedDict()
+        # realpath -> (size, mtime_ns, sha256) of the file when it was read
+        self._paths: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, digest: str) -> Optional[CachedAsset]:
+        asset = self._assets.get(digest)
+        if asset is not None:
+            self._assets.move_to_end(digest)
+            self.hits += 1
+        return asset
+
+    def _store(self, asset: CachedAsset):
+        if asset.sha256 in self._assets:
+            return
+        size = len(asset.content)
+        if size > self.max_bytes:
+            return
+        self._assets[asset.sha256] = asset
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            digest, evicted = self._assets.popitem(last=False)
+            self.bytes -= len(evicted.content)
+            self.evictions += 1
+            for path in [p for p, entry in self._paths.items() if entry[2] == digest]:
+                del self._paths[path]
+
+    def encode(self, data: bytes, limit: int = MAX_EMAIL_BYTES) -> CachedAsset:
+        """Base64 of `data`, encoded only the first time these bytes are seen."""
+        if encoded_size(len(data)) > limit:
+            raise AttachmentTooLarge(f"Asset is {encoded_size(len(data))} bytes once encoded (limit {limit})")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            asset = self._lookup(digest)
+            if asset is not None:
+                return asset
+            self.misses += 1
+
+        asset = CachedAsset(digest, binascii.b2a_base64(data, newline=False).decode("ascii"), len(data))
+        with self._lock:
+            self._store(asset)
+        return asset
+
+    def encode_file(self, path: Union[str, os.PathLike], limit: int = MAX_EMAIL_BYTES) -> CachedAsset:
+        """Base64 of a file; unchanged files aren't read again."""
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._paths.get(path)
+            if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+                asset = self._lookup(entry[2])
+                if asset is not None:
+                    return asset
+
+        if encoded_size(stat.st_size) > limit:
+            raise AttachmentTooLarge(
+                f"{os.path.basename(path)} is {encoded_size(stat.st_size)} bytes once encoded (limit {limit})"
+            )
+        with open(path, "rb") as f:
+            asset = self.encode(f.read(), limit)
+        with self._lock:
+            if asset.sha256 in self._assets:
+                self._paths[path] = (stat.st_size, stat.st_mtime_ns, asset.sha256)
+        return asset
+
+    def attachment(
+        self,
+        source: Union[str, os.PathLike, bytes],
+        filename: Optional[str] = None,
+        content_id: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> dict:
+        """
+        Attachment params for a file path or bytes, served from the cache.
+
+        Args:
+            source: Path of the file, or its content
+            filename: Name shown in the email (defaults to the file's name)
+            content_id: For inline images referenced as cid:<content_id>
+            content_type: MIME type; Resend derives it from the name otherwise
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            if not filename:
+                raise ValueError("filename is required for bytes content")
+            asset = self.encode(bytes(source))
+        else:
+            asset = self.encode_file(source)
+
+        attachment = {"filename": filename or os.path.basename(source), "content": asset.content}
+        if content_id:
+            attachment["content_id"] = content_id
+        if content_type:
+            attachment["content_type"] = content_type
+        return attachment
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "assets": len(self._assets),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Shared by everything in the process that attaches static assets
+asset_cache = AssetCache(int(os.environ.get("RESEND_ASSET_CACHE_MB", "32")) * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    import base64
+    import tempfile
+    import timeit
+
+    print("=== Content-Addressed Asset Cache ===\n")
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        f.write(os.urandom(200 * 1024))
+        f.flush()
+
+        def reencode():
+            with open(f.name, "rb") as pdf:
+                return {"filename": "terms.pdf", "content": base64.b64encode(pdf.read()).decode()}
+
+        cache = AssetCache()
+        number = 2_000
+        for label, build in [
+            ("read + encode", reencode),
+            ("asset cache", lambda: cache.attachment(f.name, "terms.pdf")),
+        ]:
+            seconds = timeit.timeit(build, number=number)
+            print(f"{label:14} 200KB attachment: {seconds / number * 1e6:8.1f} us")
+        print(f"\n{cache.stats()}")
+
+    # Eviction is by encoded size: three 600KB assets don't fit in 1MB
+    small = AssetCache(max_bytes=1024 * 1024)
+    for _ in range(3):
+        small.encode(os.urandom(450 * 1024))
+    print(f"1MB cache after three 600KB assets: {small.stats()}")
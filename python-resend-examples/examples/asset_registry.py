@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Inline Image Asset Registry
+
+Inline (CID) images are usually pasted into the code as base64 literals,
+or read and encoded in every handler that sends them. The registry scans
+examples/assets/ once at startup and keeps every image ready to attach:
+base64 content, content_id and content type. HTML refers to images by
+name, and inline() turns the references into cid: URLs and builds the
+matching attachment list in the same pass.
+
+    <img src="asset:logo" alt="Logo">   ->   <img src="cid:logo" alt="Logo">
+                                             + logo.png with content_id "logo"
+
+Key points:
+- The asset name is the file name without its extension
+- Each image is attached once per email, however often it's referenced
+- An unknown name raises UnknownAssetError instead of sending a broken
+  image
+- Content comes from the shared asset cache (asset_cache.py), so the
+  registry and code that attaches the same file hold one copy
+- The Flask, FastAPI and Django apps share the module-level
+  `asset_registry`; no image is read or encoded while serving a request
+
+Usage:
+    from asset_registry import asset_registry
+
+    params = asset_registry.inline_params({..., "html": '<img src="asset:logo">'})
+    resend.Emails.send(params)
+
+    python examples/asset_registry.py   # rewrite demo
+
+See: https://resend.com/docs/send-with-attachments#inline-attachments
+"""
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from asset_cache import ASSETS_DIR, AssetCache, asset_cache
+
+ASSET_REF_RE = re.compile(r"""(<img\b[^>]*?\bsrc\s*=\s*)(["'])asset:([\w.-]+)\2""", re.I)
+
+
+class UnknownAssetError(LookupError):
+    """HTML refers to an asset that isn't in the registry."""
+
+
+class AssetRegistry:
+    """
+    Inline images from a directory, encoded once when the registry loads.
+
+    Args:
+        directory: Folder to scan for images
+        cache: Asset cache that holds the encoded content
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike] = ASSETS_DIR, cache: AssetCache = asset_cache):
+        self.directory = Path(directory)
+        self.cache = cache
+        self._attachments: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        """(Re)scan the directory and encode every image in it."""
+        attachments = {}
+        for path in sorted(self.directory.iterdir()) if self.directory.is_dir() else []:
+            content_type, _ = mimetypes.guess_type(path.name)
+            if not path.is_file() or not (content_type or "").startswith("image/"):
+                continue
+            attachments[path.stem] = self.cache.attachment(
+                path, content_id=path.stem, content_type=content_type
+            )
+        self._attachments = attachments
+
+    def names(self) -> List[str]:
+        return list(self._attachments)
+
+    def attachment(self, name: str) -> dict:
+        """Attachment params for one asset, referenced in HTML as cid:<name>."""
+        try:
+            return dict(self._attachments[name])
+        except KeyError:
+            raise UnknownAssetError(f"No asset {name!r} in {self.directory}") from None
+
+    def inline(self, html: str) -> Tuple[str, List[dict]]:
+        """Rewrite asset: image sources to cid: and collect their attachments."""
+        used: Dict[str, dict] = {}
+
+        def replace(match):
+            prefix, quote, name = match.groups()
+            if name not in used:
+                used[name] = self.attachment(name)
+            return f"{prefix}{quote}cid:{name}{quote}"
+
+        return ASSET_REF_RE.sub(replace, html), list(used.values())
+
+    def inline_params(self, params: dict) -> dict:
+        """Copy of an email's params with asset references attached inline."""
+        if not params.get("html"):
+            return params
+        html, attachments = self.inline(params["html"])
+        if not attachments:
+            return params
+        return dict(params, html=html, attachments=list(params.get("attachments") or []) + attachments)
+
+
+# Loaded at import, so apps pay for the scan when they start
+asset_registry = AssetRegistry()
+
+
+if __name__ == "__main__":
+    import timeit
+
+    print("=== Inline Image Asset Registry ===\n")
+    print(f"Assets in {asset_registry.directory}: {', '.join(asset_registry.names())}\n")
+
+    html = (
+        '<div style="text-align:center"><img src="asset:logo" alt="Logo" width="100" height="100" />'
+        "<h1>Welcome!</h1>"
+        '<p>Signed, <img src="asset:logo" alt="" width="16" height="16" /> The Acme team</p></div>'
+    )
+    params = asset_registry.inline_params({"html": html})
+    print(params["html"] + "\n")
+    for attachment in params["attachments"]:
+        print(f"{attachment['filename']}: content_id={attachment['content_id']}, "
+              f"{attachment['content_type']}, {len(attachment['content'])} base64 chars")
+
+    number = 100_000
+    seconds = timeit.timeit(lambda: asset_registry.inline_params({"html": html}), number=number)
+    print(f"\nPer email: {seconds / number * 1e6:.2f} us, no file I/O ({asset_registry.cache.stats()})")
+
+    try:
+        asset_registry.inline('<img src="asset:banner">')
+    except UnknownAssetError as e:
+        print(f"Unknown asset: {e}")
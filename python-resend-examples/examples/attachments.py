@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Memory-Bounded Attachments
+
+`base64.b64encode(f.read()).decode()` holds the file and its encoded copy
+in memory, then the SDK serializes the whole JSON body into yet another
+string and its bytes. A 30MB attachment costs well over 100MB of worker
+RSS, and the 40MB per-email limit is only learned from an API error after
+all of that work. A few concurrent sends and the worker is gone.
+
+FileAttachment keeps only the path. StreamingAttachmentsClient (an SDK
+HTTP client) writes the request body in chunks, encoding each slice of
+the file to base64 on the way out, so memory stays at a few hundred KB
+however big the file is. Sizes are checked when the attachment is
+created, before a byte is read or encoded.
+
+Key points:
+- Install the client once, before creating attachments; emails without
+  a FileAttachment go through the ordinary pooled client
+- Creating a FileAttachment while another client is installed raises
+  TypeError, rather than failing inside the SDK as a retryable 500
+- A FileAttachment stands for the file's path, size and mtime, so
+  content-derived idempotency keys (retry.py) change when the file does
+- Big files are read through mmap; small ones with plain reads
+- encode_attachment() is the in-memory version for bytes you already
+  have or for clients that can't stream; it also checks the limit first
+- AttachmentTooLarge (a ValueError) is raised before any encoding
+- Files that are already online can be sent as `{"path": "https://..."}`
+  and Resend fetches them itself
+
+Usage:
+    import resend
+    from attachments import FileAttachment, StreamingAttachmentsClient
+
+    resend.default_http_client = StreamingAttachmentsClient()
+    resend.Emails.send({..., "attachments": [FileAttachment("report.pdf")]})
+
+    python examples/attachments.py   # memory demo against the fake API
+
+See: https://resend.com/docs/send-with-attachments
+"""
+
+import binascii
+import json as jsonlib
+import mmap
+import os
+import uuid
+from typing import Any, BinaryIO, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import requests
+import resend
+from resend.http_client import HTTPClient
+
+from http_clients import PooledRequestsClient
+
+# Resend's limit for one email, attachments included, after base64 encoding
+MAX_EMAIL_BYTES = 40 * 1024 * 1024
+
+# A multiple of 3, so every chunk encodes without padding
+CHUNK_SIZE = 3 * 64 * 1024
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+class AttachmentTooLarge(ValueError):
+    """The attachments don't fit in one email."""
+
+
+def encoded_size(size: int) -> int:
+    """Length of the base64 encoding of `size` bytes."""
+    return 4 * ((size + 2) // 3)
+
+
+def _check_size(filename: str, size: int, limit: int):
+    if encoded_size(size) > limit:
+        raise AttachmentTooLarge(
+            f"{filename} is {encoded_size(size)} bytes once encoded (limit {limit})"
+        )
+
+
+def read_chunks(path: str) -> Iterator[bytes]:
+    """CHUNK_SIZE slices of a file; memory-mapped when it's big."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, size, CHUNK_SIZE):
+                    yield mapped[start:start + CHUNK_SIZE]
+            return
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def streams_attachments(client: HTTPClient) -> bool:
+    """Whether `client` (or the client it wraps) can send a FileAttachment."""
+    # Wrappers such as RateLimitedHTTPClient keep the real client in .client
+    while client is not None and not isinstance(client, StreamingAttachmentsClient):
+        client = getattr(client, "client", None)
+    return client is not None
+
+
+class FileAttachment:
+    """
+    An attachment whose content is read from disk while the request is sent.
+
+    Needs StreamingAttachmentsClient installed as resend.default_http_client.
+
+    Args:
+        path: File to attach
+        filename: Name shown in the email (defaults to the file's name)
+        content_id: For inline images referenced as cid:<content_id>
+        content_type: MIME type; Resend derives it from the name otherwise
+        limit: Encoded bytes this attachment may use
+
+    Raises:
+        TypeError: The installed SDK client can't stream attachments
+    """
+
+    def __init__(
+        self,
+        path: str,
+        filename: Optional[str] = None,
+        content_id: Optional[str] = None,
+        content_type: Optional[str] = None,
+        limit: int = MAX_EMAIL_BYTES,
+    ):
+        if not streams_attachments(resend.default_http_client):
+            raise TypeError(
+                "FileAttachment needs resend.default_http_client = StreamingAttachmentsClient()"
+                " (use encode_attachment() with other clients)"
+            )
+        filename = filename or os.path.basename(path)
+        self.path = str(path)
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        _check_size(filename, self.size, limit)
+
+        self.fields = {"filename": filename}
+        if content_id:
+            self.fields["content_id"] = content_id
+        if content_type:
+            self.fields["content_type"] = content_type
+
+    def __repr__(self) -> str:
+        return f"FileAttachment({self.path!r}, size={self.size}, mtime_ns={self.mtime_ns}, {self.fields})"
+
+    def encoded_chunks(self) -> Iterator[bytes]:
+        for chunk in read_chunks(self.path):
+            yield binascii.b2a_base64(chunk, newline=False)
+
+
+def encode_attachment(
+    source: Union[bytes, BinaryIO],
+    filename: str,
+    content_id: Optional[str] = None,
+    content_type: Optional[str] = None,
+    limit: int = MAX_EMAIL_BYTES,
+) -> dict:
+    """In-memory attachment from bytes or a file object, size-checked first."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = source
+    else:
+        try:
+            size = os.fstat(source.fileno()).st_size - source.tell()
+        except (AttributeError, OSError, ValueError):
+            size = None
+        if size is not None:
+            _check_size(filename, size, limit)
+        # One byte past the limit is enough to know it doesn't fit
+        data = source.read(limit * 3 // 4 + 1)
+    _check_size(filename, len(data), limit)
+
+    attachment = {"filename": filename, "content": binascii.b2a_base64(data, newline=False).decode("ascii")}
+    if content_id:
+        attachment["content_id"] = content_id
+    if content_type:
+        attachment["content_type"] = content_type
+    return attachment
+
+
+def check_attachments(attachments: List[dict], limit: int = MAX_EMAIL_BYTES):
+    """Raise AttachmentTooLarge if an email's attachments exceed `limit`."""
+    total = sum(
+        encoded_size(a.size) if isinstance(a, FileAttachment) else len(a.get("content") or "")
+        for a in attachments
+    )
+    if total > limit:
+        raise AttachmentTooLarge(f"Attachments are {total} bytes once encoded (limit {limit})")
+
+
+def _file_attachments(payload) -> List[FileAttachment]:
+    if not isinstance(payload, dict):
+        return []
+    return [a for a in payload.get("attachments") or [] if isinstance(a, FileAttachment)]
+
+
+class JSONBodyStream:
+    """
+    The JSON body of a request, produced in chunks.
+
+    Each FileAttachment's "content" is left as a placeholder when the rest
+    of the payload is serialized, and filled in with base64 straight from
+    the file while the body is being sent. The length is known up front,
+    so the request still gets a Content-Length.
+    """
+
+    def __init__(self, payload: dict):
+        files = _file_attachments(payload)
+        token = uuid.uuid4().hex
+        markers = {id(a): f"@file-{token}-{i}@" for i, a in enumerate(files)}
+        by_marker = {markers[id(a)]: a for a in files}
+
+        body = dict(payload)
+        body["attachments"] = [
+            dict(a.fields, content=markers[id(a)]) if id(a) in markers else a
+            for a in payload["attachments"]
+        ]
+        text = jsonlib.dumps(body)
+
+        # Alternate literal JSON and files: [bytes, file, bytes, file, ..., bytes]
+        self._parts = []
+        for marker, attachment in by_marker.items():
+            before, text = text.split(f'"{marker}"', 1)
+            self._parts += [(before + '"').encode(), attachment]
+            text = '"' + text
+        self._parts.append(text.encode())
+
+        self._length = sum(
+            encoded_size(p.size) if isinstance(p, FileAttachment) else len(p) for p in self._parts
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self._parts:
+            if isinstance(part, FileAttachment):
+                yield from part.encoded_chunks()
+            else:
+                yield part
+
+
+class StreamingAttachmentsClient(PooledRequestsClient):
+    """Pooled SDK client that streams FileAttachment content from disk."""
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json: Optional[Union[Dict[str, object], List[object]]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        if not _file_attachments(json):
+            return super().request(method, url, headers, json=json, files=files, data=data)
+
+        check_attachments(json["attachments"])
+        try:
+            resp = self._session.request(
+                method=method,
+                url=url,
+                headers={**headers, "Content-Type": "application/json"},
+                data=JSONBodyStream(json),
+                timeout=self._timeout,
+            )
+            return resp.content, resp.status_code, resp.headers
+        except requests.RequestException as e:
+            # The SDK turns this into a ResendError("HttpClientError")
+            raise RuntimeError(f"Request failed: {e}") from e
+
+
+if __name__ == "__main__":
+    import base64
+    import resource
+    import subprocess
+    import sys
+    import tempfile
+
+    if len(sys.argv) == 4:
+        # Child process: send one file and report peak RSS growth in MB
+        url, path, how = sys.argv[1:]
+        resend.api_key = "re_demo"
+        resend.api_url = url
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if how == "naive":
+            with open(path, "rb") as f:
+                attachment = {"filename": "data.bin", "content": base64.b64encode(f.read()).decode()}
+        else:
+            resend.default_http_client = StreamingAttachmentsClient()
+            attachment = FileAttachment(path, "data.bin")
+        resend.Emails.send({
+            "from": "Acme <onboarding@resend.dev>",
+            "to": ["delivered@resend.dev"],
+            "subject": "Report",
+            "html": "<p>Attached.</p>",
+            "attachments": [attachment],
+        })
+        print((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) // 1024)
+        sys.exit(0)
+
+    from fake_resend import spawn_fake_resend
+
+    print("=== Memory-Bounded Attachments ===\n")
+
+    server, server_url = spawn_fake_resend()
+    with tempfile.NamedTemporaryFile(suffix=".bin") as f:
+        f.write(os.urandom(24 * 1024 * 1024))
+        f.flush()
+        for how in ("naive", "streamed"):
+            growth = subprocess.check_output([sys.executable, __file__, server_url, f.name, how])
+            print(f"{how:9} 24MB attachment -> peak RSS +{int(growth)}MB")
+
+        f.truncate(31 * 1024 * 1024)
+        resend.default_http_client = StreamingAttachmentsClient()
+        try:
+            FileAttachment(f.name)
+        except AttachmentTooLarge as e:
+            print(f"\nRejected before encoding: {e}")
+    server.terminate()
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Audience Sync: Push Only the Diff
+
+Keeping an audience in step with a user database by removing and
+re-adding (or updating) every contact costs one API call per contact,
+every time, even when almost nothing changed: a million calls a night
+for a million-contact list.
+
+AudienceSync keeps a snapshot of the remote audience in a local SQLite
+table, one row per normalized address with its contact id, its fields
+and a hash of the synced fields. A sync stages the local source next to
+it and computes three sets with indexed set operations:
+
+- adds: addresses in the source but not in the audience
+- updates: addresses in both whose hashes differ; only the changed
+  fields (first_name, last_name, unsubscribed) are sent
+- removes: addresses in the audience but no longer in the source
+
+and applies just those, concurrently. The snapshot is updated as each
+call succeeds, so the next sync starts from the audience as it now is.
+
+Key points:
+- The snapshot is taken by listing the audience (see contact_pages.py)
+  on the first sync or with refresh=True; after that a sync of an
+  unchanged list makes no API calls at all
+- Contacts deleted elsewhere (in the dashboard, say) are caught by the
+  API (an update that 404s) or by a refresh (no longer listed). They are
+  remembered and reported as gone rather than added back, unless
+  recreate_missing=True. A remove that 404s is done. Refresh now and
+  then to pick up other remote changes
+- `fields` chooses what is synced: leave out unsubscribed if
+  unsubscribes are managed in Resend, so a sync never resubscribes anyone
+- A source row without a field (missing or None) leaves that field as
+  it is; the CLI only syncs fields the CSV has a column for
+- A sync that would remove more than max_remove_ratio of the audience
+  (an empty or truncated export, say) stops before touching anything
+- Source and snapshot are compared inside SQLite, so memory stays flat
+  whatever the list size
+- Calls that fail are left out of the snapshot and retried next sync
+- RESEND_AUDIENCE_SNAPSHOT: database file (default: in the system temp dir)
+
+Usage:
+    from audience_sync import AudienceSync
+
+    syncer = AudienceSync.from_env()
+    syncer.sync(audience_id, users)   # iterable of {"email", "first_name", ...}
+
+    python examples/audience_sync.py users.csv --audience <audience-id> --dry-run
+    python examples/audience_sync.py           # full push vs diff demo
+
+See: https://resend.com/docs/api-reference/contacts/update-contact
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence
+
+import resend
+from dotenv import load_dotenv
+from resend.exceptions import ResendError
+
+from batch_validation import is_valid_address
+from contact_import import read_contacts
+from contact_index import ContactIndex, default_index, normalize_email
+from contact_pages import iter_contact_pages
+from http_clients import PooledRequestsClient
+from rate_limiter import RateLimitedHTTPClient, RateLimiter
+from retry import call_with_retry
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "resend-audience-sync.sqlite3")
+
+SYNC_FIELDS = ("first_name", "last_name", "unsubscribed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS remote (
+    audience_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    unsubscribed INTEGER NOT NULL,
+    digest INTEGER NOT NULL,
+    PRIMARY KEY (audience_id, email)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    audience_id TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,
+    taken_at REAL NOT NULL
+);
+-- Contacts deleted in Resend rather than by a sync: not added back by default
+CREATE TABLE IF NOT EXISTS deleted (
+    audience_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    PRIMARY KEY (audience_id, email)
+);
+"""
+
+# NULL fields are left unchanged; digest is NULL unless every synced field is set
+SOURCE_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS source (
+    email TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    unsubscribed INTEGER,
+    digest INTEGER
+);
+DELETE FROM source;
+"""
+
+
+def contact_fields(contact: dict) -> dict:
+    """The synced fields of a contact, with the API's defaults filled in."""
+    return {
+        "first_name": contact.get("first_name") or "",
+        "last_name": contact.get("last_name") or "",
+        "unsubscribed": bool(contact.get("unsubscribed")),
+    }
+
+
+def source_fields(contact: dict) -> dict:
+    """The synced fields a source row sets; None for those it leaves unchanged."""
+    unsubscribed = contact.get("unsubscribed")
+    return {
+        "first_name": contact.get("first_name"),
+        "last_name": contact.get("last_name"),
+        "unsubscribed": None if unsubscribed is None else bool(unsubscribed),
+    }
+
+
+def fields_digest(fields: dict, names: Sequence[str] = SYNC_FIELDS) -> int:
+    """64-bit hash of the `names` fields, stored as a signed SQLite integer."""
+    raw = json.dumps([fields[name] for name in names]).encode()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big", signed=True)
+
+
+class AudienceSync:
+    """
+    Syncs audiences from a local source by applying only the difference.
+
+    Args:
+        path: SQLite file holding the snapshots
+        fields: Contact fields kept in step with the source
+        concurrency: API calls in flight while applying a diff
+        index: Contact index kept up to date with created/removed ids
+            (from_env() uses RESEND_CONTACT_INDEX's)
+        recreate_missing: Add back contacts deleted in Resend (an update
+            404s, or a refresh no longer lists them); by default they are
+            only reported as gone
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB,
+        fields: Sequence[str] = SYNC_FIELDS,
+        concurrency: int = 8,
+        index: Optional[ContactIndex] = None,
+        recreate_missing: bool = False,
+    ):
+        unknown = set(fields) - set(SYNC_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields {sorted(unknown)}; use some of {', '.join(SYNC_FIELDS)}")
+        self.path = str(path)
+        self.fields = tuple(name for name in SYNC_FIELDS if name in fields)
+        self.concurrency = concurrency
+        self.index = index
+        self.recreate_missing = recreate_missing
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "AudienceSync":
+        if "index" not in kwargs:
+            kwargs["index"] = default_index()
+        return cls(os.environ.get("RESEND_AUDIENCE_SNAPSHOT", DEFAULT_DB), **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row(self, audience_id: str, email: str, contact_id: str, fields: dict) -> tuple:
+        return (
+            audience_id, email, contact_id, fields["first_name"], fields["last_name"],
+            fields["unsubscribed"], fields_digest(fields, self.fields),
+        )
+
+    def has_snapshot(self, audience_id: str) -> bool:
+        """Whether a snapshot of `audience_id` exists for this sync's fields."""
+        row = self._connect().execute(
+            "SELECT fields FROM snapshots WHERE audience_id = ?", (audience_id,)
+        ).fetchone()
+        return row is not None and row[0] == ",".join(self.fields)
+
+    def snapshot(self, audience_id: str) -> int:
+        """List the whole audience into the local snapshot; returns API calls made."""
+        conn = self._connect()
+        calls = 0
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS previous (email TEXT PRIMARY KEY)")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM previous")
+            conn.execute("INSERT INTO previous SELECT email FROM remote WHERE audience_id = ?", (audience_id,))
+            conn.execute("DELETE FROM remote WHERE audience_id = ?", (audience_id,))
+            for page in iter_contact_pages(audience_id):
+                calls += 1
+                rows = [
+                    self._row(audience_id, normalize_email(c["email"]), c["id"], contact_fields(c)) for c in page
+                ]
+                conn.executemany("INSERT OR REPLACE INTO remote VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                if self.index is not None:
+                    for row in rows:
+                        self.index.add(audience_id, row[1], row[2])
+            # In the last snapshot but no longer listed: deleted in Resend
+            conn.execute(
+                "INSERT OR IGNORE INTO deleted SELECT ?, p.email FROM previous p"
+                " WHERE NOT EXISTS (SELECT 1 FROM remote r WHERE r.audience_id = ? AND r.email = p.email)",
+                (audience_id, audience_id),
+            )
+            conn.execute(
+                "DELETE FROM deleted WHERE audience_id = ?"
+                " AND email IN (SELECT email FROM remote WHERE audience_id = ?)",
+                (audience_id, audience_id),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", (audience_id, ",".join(self.fields), time.time())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return calls
+
+    def _stage(self, contacts: Iterable[dict]) -> int:
+        """Load the source into a temp table next to the snapshot; returns invalid rows."""
+        conn = self._connect()
+        conn.executescript(SOURCE_SCHEMA)
+        invalid = 0
+        rows = []
+        conn.execute("BEGIN")
+        try:
+            for contact in contacts:
+                email = normalize_email(contact.get("email") or "")
+                if not is_valid_address(email):
+                    invalid += 1
+                    continue
+                fields = source_fields(contact)
+                complete = all(fields[name] is not None for name in self.fields)
+                # Later rows for the same address win
+                rows.append((email, fields["first_name"], fields["last_name"], fields["unsubscribed"],
+                             fields_digest(fields, self.fields) if complete else None))
+                if len(rows) >= 1000:
+                    conn.executemany("INSERT OR REPLACE INTO source VALUES (?, ?, ?, ?, ?)", rows)
+                    rows.clear()
+            conn.executemany("INSERT OR REPLACE INTO source VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return invalid
+
+    def _count(self, query: str, audience_id: str) -> int:
+        return self._connect().execute(f"SELECT COUNT(*) FROM ({query})", (audience_id,)).fetchone()[0]
+
+    # Set differences between the staged source and the snapshot
+    NEW = (
+        "SELECT s.email, s.first_name, s.last_name, s.unsubscribed FROM source s"
+        " WHERE NOT EXISTS (SELECT 1 FROM remote r WHERE r.audience_id = ?1 AND r.email = s.email)"
+    )
+    ADDS = NEW + " AND NOT EXISTS (SELECT 1 FROM deleted d WHERE d.audience_id = ?1 AND d.email = s.email)"
+    GONE = NEW + " AND EXISTS (SELECT 1 FROM deleted d WHERE d.audience_id = ?1 AND d.email = s.email)"
+    UPDATES = (
+        "SELECT s.email, s.first_name, s.last_name, s.unsubscribed,"
+        " r.contact_id, r.first_name, r.last_name, r.unsubscribed"
+        " FROM source s JOIN remote r ON r.audience_id = ? AND r.email = s.email"
+        # Complete rows compare hashes; partial ones only the fields they set
+        " WHERE (s.digest IS NOT NULL AND s.digest != r.digest) OR (s.digest IS NULL AND ({partial}))"
+    )
+    REMOVES = (
+        "SELECT r.email, r.contact_id FROM remote r"
+        " WHERE r.audience_id = ? AND NOT EXISTS (SELECT 1 FROM source s WHERE s.email = r.email)"
+    )
+
+    def sync(
+        self,
+        audience_id: str,
+        contacts: Iterable[dict],
+        refresh: bool = False,
+        dry_run: bool = False,
+        max_remove_ratio: Optional[float] = 0.1,
+    ) -> dict:
+        """
+        Make `audience_id` match `contacts`, calling the API only for differences.
+
+        Args:
+            audience_id: Audience to update
+            contacts: Source of truth: dicts with email and the synced fields
+            refresh: List the audience again instead of trusting the snapshot
+            dry_run: Compute the diff but don't apply it
+            max_remove_ratio: Refuse to remove more than this share of the
+                audience (None: no limit)
+
+        Returns:
+            Counts of what was (or, with dry_run, would be) changed
+
+        Raises:
+            ValueError: The diff removes more than max_remove_ratio
+        """
+        result = {"snapshot_calls": 0, "invalid": 0, "added": 0, "updated": 0, "removed": 0,
+                  "unchanged": 0, "gone": 0, "failed": 0}
+        if refresh or not self.has_snapshot(audience_id):
+            result["snapshot_calls"] = self.snapshot(audience_id)
+        result["invalid"] = self._stage(contacts)
+
+        updates_query = self.UPDATES.format(
+            partial=" OR ".join(f"(s.{name} IS NOT NULL AND s.{name} != r.{name})" for name in self.fields) or "0"
+        )
+        adds_query = self.NEW if self.recreate_missing else self.ADDS
+
+        conn = self._connect()
+        # One read snapshot for counting and applying: rows the workers
+        # change meanwhile aren't picked up again by the later queries
+        conn.execute("BEGIN")
+        try:
+            adds = self._count(adds_query, audience_id)
+            updates = self._count(updates_query, audience_id)
+            removes = self._count(self.REMOVES, audience_id)
+            remote = self._count("SELECT 1 FROM remote WHERE audience_id = ?", audience_id)
+            if not self.recreate_missing:
+                result["gone"] = self._count(self.GONE, audience_id)
+            result["unchanged"] = remote - updates - removes
+            if max_remove_ratio is not None and removes > max(1, remote * max_remove_ratio):
+                raise ValueError(
+                    f"Sync would remove {removes} of {remote} contacts; check the source or raise max_remove_ratio"
+                )
+            if dry_run:
+                result.update(added=adds, updated=updates, removed=removes)
+                return result
+
+            slots = threading.BoundedSemaphore(self.concurrency)
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+
+                def submit(fn, email: str, *args):
+                    slots.acquire()
+                    future = executor.submit(self._apply, result, fn, audience_id, email, *args)
+                    future.add_done_callback(lambda _: slots.release())
+
+                # Removes first, so an audience near its size limit has room for the adds
+                for email, contact_id in conn.execute(self.REMOVES, (audience_id,)):
+                    submit(self._remove, email, contact_id)
+                for row in conn.execute(updates_query, (audience_id,)):
+                    submit(self._update, row[0], row)
+                for row in conn.execute(adds_query, (audience_id,)):
+                    fields = source_fields(dict(zip(SYNC_FIELDS, row[1:])))
+                    provided = {name: fields[name] for name in self.fields if fields[name] is not None}
+                    submit(self._create, row[0], provided)
+        finally:
+            conn.execute("COMMIT")
+        return result
+
+    def _apply(self, result: dict, fn, audience_id: str, email: str, *args):
+        try:
+            outcome = fn(audience_id, email, *args)
+        except Exception as e:
+            # Left out of the snapshot, so the next sync tries again
+            print(f"Sync of {email} failed: {e}", file=sys.stderr)
+            outcome = "failed"
+        with self._lock:
+            result[outcome] += 1
+
+    def _create(self, audience_id: str, email: str, fields: dict) -> str:
+        created = call_with_retry(resend.Contacts.create, {"audience_id": audience_id, "email": email, **fields})
+        # Fields not sent take the API's defaults
+        self._connect().execute(
+            "INSERT OR REPLACE INTO remote VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._row(audience_id, email, created["id"], contact_fields(fields)),
+        )
+        self._connect().execute("DELETE FROM deleted WHERE audience_id = ? AND email = ?", (audience_id, email))
+        if self.index is not None:
+            self.index.add(audience_id, email, created["id"])
+        return "added"
+
+    def _update(self, audience_id: str, email: str, row: tuple) -> str:
+        contact_id = row[4]
+        new = source_fields(dict(zip(SYNC_FIELDS, row[1:4])))
+        old = contact_fields(dict(zip(SYNC_FIELDS, row[5:8])))
+        changed = {name: new[name] for name in self.fields if new[name] is not None and new[name] != old[name]}
+        try:
+            call_with_retry(resend.Contacts.update, {"audience_id": audience_id, "id": contact_id, **changed})
+        except ResendError as e:
+            if str(e.code) != "404":
+                raise
+            # Deleted since the snapshot, e.g. in the dashboard
+            conn = self._connect()
+            conn.execute("DELETE FROM remote WHERE audience_id = ? AND email = ?", (audience_id, email))
+            conn.execute("INSERT OR IGNORE INTO deleted VALUES (?, ?)", (audience_id, email))
+            if self.index is not None:
+                self.index.remove(audience_id, contact_id=contact_id)
+            if not self.recreate_missing:
+                print(f"{email} was deleted from the audience; not adding it back", file=sys.stderr)
+                return "gone"
+            provided = {name: new[name] for name in self.fields if new[name] is not None}
+            return self._create(audience_id, email, provided)
+        # Fields that aren't synced or set keep their remote values
+        merged = {name: old[name] if new[name] is None or name not in self.fields else new[name]
+                  for name in SYNC_FIELDS}
+        self._connect().execute(
+            "INSERT OR REPLACE INTO remote VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._row(audience_id, email, contact_id, merged),
+        )
+        return "updated"
+
+    def _remove(self, audience_id: str, email: str, contact_id: str) -> str:
+        try:
+            call_with_retry(resend.Contacts.remove, audience_id, contact_id)
+        except ResendError as e:
+            if str(e.code) != "404":
+                raise
+        self._connect().execute("DELETE FROM remote WHERE audience_id = ? AND email = ?", (audience_id, email))
+        if self.index is not None:
+            self.index.remove(audience_id, contact_id=contact_id)
+        return "removed"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sync an audience from a CSV, pushing only the changes")
+    parser.add_argument("input", help="CSV with an email column and the synced fields")
+    parser.add_argument("--audience", default=os.environ.get("RESEND_AUDIENCE_ID"), help="Defaults to RESEND_AUDIENCE_ID")
+    parser.add_argument("--fields", default=",".join(SYNC_FIELDS), help="Comma-separated fields to sync")
+    parser.add_argument("--concurrency", type=int, default=8, help="API calls in flight")
+    parser.add_argument("--refresh", action="store_true", help="List the audience again before diffing")
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff without applying it")
+    parser.add_argument("--force", action="store_true", help="Allow removing more than 10%% of the audience")
+    parser.add_argument("--recreate", action="store_true", help="Add back contacts deleted in Resend")
+    args = parser.parse_args(argv)
+    if not args.audience:
+        parser.error("--audience or RESEND_AUDIENCE_ID is required")
+
+    # A field without a column would otherwise be reset (e.g. resubscribing everyone)
+    with open(args.input, newline="", encoding="utf-8") as f:
+        columns = {name.strip().lower() for name in next(csv.reader(f), [])}
+    fields = [name.strip() for name in args.fields.split(",") if name.strip()]
+    for name in fields:
+        if name not in columns:
+            print(f"{args.input} has no {name} column; leaving {name} unchanged", file=sys.stderr)
+    fields = [name for name in fields if name in columns]
+
+    syncer = AudienceSync.from_env(fields=fields, concurrency=args.concurrency, recreate_missing=args.recreate)
+    start = time.monotonic()
+    try:
+        result = syncer.sync(
+            args.audience, read_contacts(args.input), refresh=args.refresh, dry_run=args.dry_run,
+            max_remove_ratio=None if args.force else 0.1,
+        )
+    except ValueError as e:
+        print(f"{e} (--force to allow)", file=sys.stderr)
+        return 2
+
+    prefix = "Dry run: " if args.dry_run else ""
+    print(f"{prefix}{result['added']} added, {result['updated']} updated, {result['removed']} removed, "
+          f"{result['unchanged']} unchanged, {result['invalid']} invalid, {result['failed']} failed "
+          f"in {time.monotonic() - start:.1f}s")
+    if result["snapshot_calls"]:
+        print(f"Snapshot taken with {result['snapshot_calls']} list call(s)")
+    if result["gone"]:
+        print(f"{result['gone']} contact(s) had been deleted in Resend and were left out (--recreate to add them)")
+    if result["failed"]:
+        print("Failed contacts are retried on the next sync")
+        return 1
+    return 0
+
+
+def demo():
+    """Full push vs diff sync against the fake API."""
+    import random
+    import shutil
+
+    from fake_resend import spawn_fake_resend
+
+    server, server_url = spawn_fake_resend(latency=0.05)
+    resend.api_key = "re_demo"
+    resend.api_url = server_url
+
+    print("=== Audience Sync: Push Only the Diff ===\n")
+
+    audience_id = "aud_demo"
+    users = [
+        {"email": f"user{i}@example.com", "first_name": f"User {i}", "last_name": "Doe", "unsubscribed": i % 9 == 0}
+        for i in range(2000)
+    ]
+    directory = tempfile.mkdtemp()
+    syncer = AudienceSync(os.path.join(directory, "sync.sqlite3"), concurrency=16, index=None)
+
+    start = time.perf_counter()
+    result = syncer.sync(audience_id, users)
+    print(f"First sync, empty audience: {result['added']} added in {time.perf_counter() - start:.1f}s\n")
+
+    # A night's worth of changes: 1.5% edited, 0.5% deleted, 0.5% signed up
+    random.seed(7)
+    for user in random.sample(users, 20):
+        user["first_name"] += " Jr."
+    for user in random.sample(users, 10):
+        user["unsubscribed"] = not user["unsubscribed"]
+    users = users[10:] + [{"email": f"new{i}@example.com", "first_name": "New"} for i in range(10)]
+
+    # The old way: update every contact, changed or not (adds/removes not even handled)
+    ids = {c["email"]: c["id"] for page in iter_contact_pages(audience_id) for c in page}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda user: resend.Contacts.update(
+            {"audience_id": audience_id, "id": ids[user["email"]], **contact_fields(user)}
+        ), [user for user in users if user["email"] in ids]))
+    print(f"Push everything: {len(ids)} API calls in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    result = syncer.sync(audience_id, users)
+    calls = result["added"] + result["updated"] + result["removed"]
+    print(f"Diff sync:       {calls} API calls in {time.perf_counter() - start:.1f}s "
+          f"({result['added']} added, {result['updated']} updated, {result['removed']} removed, "
+          f"{result['unchanged']} unchanged)")
+
+    start = time.perf_counter()
+    result = syncer.sync(audience_id, users)
+    calls = result["added"] + result["updated"] + result["removed"]
+    print(f"Sync again:      {calls} API calls in {time.perf_counter() - start:.2f}s")
+
+    remote = {c["email"]: contact_fields(c) for page in iter_contact_pages(audience_id) for c in page}
+    print(f"\nAudience matches the source: {remote == {u['email']: contact_fields(u) for u in users}}")
+
+    try:
+        syncer.sync(audience_id, users[:1000], dry_run=True)
+    except ValueError as e:
+        print(f"Truncated export: {e}")
+
+    server.terminate()
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        demo()
+        sys.exit()
+
+    load_dotenv()
+
+    resend.api_key = os.environ["RESEND_API_KEY"]
+    # Keep-alive connections for the whole run, under the shared rate limit
+    resend.default_http_client = RateLimitedHTTPClient(
+        RateLimiter.from_env(), PooledRequestsClient()
+    )
+
+    sys.exit(main())
@@ -15,6 +15,8 @@ import os
 import resend
 from dotenv import load_dotenv
 
+from contact_pages import iter_contacts
+
 load_dotenv()
 
 resend.api_key = os.environ["RESEND_API_KEY"]
@@ -32,7 +34,8 @@ for audience in audiences.get("data", []):
     print(f"  - {audience['name']} ({audience['id']})")
 print()
 
-# Add a contact to an audience
+# Add a contact to an audience (for a whole CSV, see contact_import.py;
+# to keep an audience in step with your database, audience_sync.py)
 print("Adding contact to audience...")
 contact = resend.Contacts.create({
     "audience_id": audience_id,
@@ -46,9 +49,10 @@ print()
 
 # List contacts in the audience
 print("Listing contacts in audience...")
-contacts = resend.Contacts.list(audience_id)
-print(f"Found {len(contacts.get('data', []))} contact(s)")
-for c in contacts.get("data", [])[:5]:
+# Follows the pagination cursor, so large audiences aren't cut at one page
+contacts = list(iter_contacts(audience_id))
+print(f"Found {len(contacts)} contact(s)")
+for c in contacts[:5]:
     print(f"  - {c['email']} ({c.get('first_name', '')} {c.get('last_name', '')})")
 print()
 
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Request-Coalescing Batch Sender
+
+Every POST /send in the web apps costs one Emails.send call. Under load,
+many of those requests arrive within a few milliseconds of each other.
+A coalescer holds each single send for a short flush window (or until 100
+emails are waiting), submits them together with one Batch.send call and
+hands every caller back its own email id.
+
+Key points:
+- Opt-in: enable it in the apps with RESEND_COALESCE_MS (e.g. 10)
+- Only for plain emails: batches can't carry attachments or scheduled_at
+- A flush with a single waiting email uses Emails.send as usual
+- Transient failures are retried with one idempotency key per batch;
+  if a batch still fails, every caller in that batch gets the error
+- An invalid email only fails its own caller: batches are pre-validated
+  and bisected on rejection (see batch_validation.py)
+
+Usage:
+    python examples/batch_coalescer.py   # demo against the fake API
+
+See: https://resend.com/docs/api-reference/emails/send-batch-emails
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from batch_validation import send_batch_isolated, send_batch_isolated_async
+from retry import send_with_retry, send_with_retry_async
+
+MAX_BATCH_SIZE = 100
+
+
+class CoalescerStats:
+    """Counters shared by both coalescer flavours."""
+
+    def __init__(self):
+        self.emails = 0
+        self.api_calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, emails: int):
+        with self._lock:
+            self.emails += emails
+            self.api_calls += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "emails": self.emails,
+            "api_calls": self.api_calls,
+            "emails_per_call": round(self.emails / self.api_calls, 1) if self.api_calls else 0,
+        }
+
+
+def _resolve(batch: list, results: list):
+    """Settle every caller's future from a batch's results, in order."""
+    for i, (_, future, _) in enumerate(batch):
+        if future.done():
+            continue
+        if i >= len(results):
+            # Never leave a caller waiting on a short result list
+            future.set_exception(RuntimeError(f"No result for email {i} of {len(batch)} in the batch"))
+        elif isinstance(results[i], Exception):
+            future.set_exception(results[i])
+        elif not isinstance(results[i], dict) or "id" not in results[i]:
+            future.set_exception(RuntimeError(f"Unexpected result for email {i}: {results[i]!r}"))
+        else:
+            future.set_result({"id": results[i]["id"]})
+
+
+class BatchCoalescer:
+    """
+    Thread-safe coalescer for threaded servers (Flask, Django).
+
+    Args:
+        window: Seconds to hold the first waiting email before flushing
+        max_size: Flush immediately once this many emails are waiting
+        max_in_flight: Concurrent Batch.send calls
+    """
+
+    def __init__(self, window: float = 0.01, max_size: int = MAX_BATCH_SIZE, max_in_flight: int = 4):
+        self.window = window
+        self.max_size = min(max_size, MAX_BATCH_SIZE)
+        self.stats = CoalescerStats()
+        self._pending = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._thread = threading.Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    def submit(self, params: dict) -> Future:
+        """Queue an email; the future resolves to {"id": ...}."""
+        future = Future()
+        with self._cond:
+            self._pending.append((params, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def send(self, params: dict, timeout: float = 60.0) -> dict:
+        """Drop-in replacement for resend.Emails.send."""
+        return self.submit(params).result(timeout)
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # The window runs from the oldest waiting email, which after a
+                # full flush may already have waited a while
+                deadline = self._pending[0][2] + self.window
+                while len(self._pending) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_size]
+                del self._pending[:self.max_size]
+            self._executor.submit(self._flush, batch)
+
+    def _flush(self, batch: list):
+        emails = [params for params, _, _ in batch]
+        self.stats.record(len(emails))
+        try:
+            if len(emails) == 1:
+                results = [send_with_retry(emails[0])]
+            else:
+                results = send_batch_isolated(emails)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        _resolve(batch, results)
+
+
+class AsyncBatchCoalescer:
+    """
+    Coalescer for asyncio servers (FastAPI); must be used from one event loop.
+
+    Args:
+        window: Seconds to hold the first waiting email before flushing
+        max_size: Flush immediately once this many emails are waiting
+    """
+
+    def __init__(self, window: float = 0.01, max_size: int = MAX_BATCH_SIZE):
+        self.window = window
+        self.max_size = min(max_size, MAX_BATCH_SIZE)
+        self.stats = CoalescerStats()
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def send(self, params: dict) -> dict:
+        """Drop-in replacement for resend.Emails.send_async."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((params, future, loop.time()))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+        if self._pending:
+            # Due a window after the oldest remaining email, not after now
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_at(self._pending[0][2] + self.window, self._flush)
+
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list):
+        emails = [params for params, _, _ in batch]
+        self.stats.record(len(emails))
+        try:
+            if len(emails) == 1:
+                results = [await send_with_retry_async(emails[0])]
+            else:
+                results = await send_batch_isolated_async(emails)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        _resolve(batch, results)
+
+
+if __name__ == "__main__":
+    import resend
+    from fake_resend import spawn_fake_resend
+
+    server, server_url = spawn_fake_resend(latency=0.05)
+    resend.api_key = "re_demo"
+    resend.api_url = server_url
+
+    print("=== Request-Coalescing Batch Sender ===\n")
+
+    coalescer = BatchCoalescer(window=0.01)
+    with ThreadPoolExecutor(max_workers=200) as pool:
+        start = time.perf_counter()
+        ids = list(pool.map(
+            lambda i: coalescer.send({
+                "from": "Acme <onboarding@resend.dev>",
+                "to": ["delivered@resend.dev"],
+                "subject": f"Coalesced email {i}",
+                "html": "<p>Hello!</p>",
+            })["id"],
+            range(1000),
+        ))
+        elapsed = time.perf_counter() - start
+
+    stats = coalescer.stats.as_dict()
+    print(f"Sent {len(set(ids))} emails with {stats['api_calls']} API call(s) "
+          f"({stats['emails_per_call']} emails/call) in {elapsed:.2f}s")
+
+    server.terminate()
@@ -8,6 +8,7 @@ Key points:
 - No attachments supported in batch
 - No scheduling supported in batch
 - If one email fails validation, entire batch fails
+  (batch_validation.py checks emails first and isolates bad ones)
 
 Usage: python examples/batch_send.py
 
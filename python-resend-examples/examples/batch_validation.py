@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Batch Pre-Validation and Partial-Failure Recovery
+
+If one email in a Batch.send call fails validation, the entire batch is
+rejected, so a single bad address throws away 99 good sends. This module
+checks each email locally before it is submitted (addresses, required
+fields, no attachments or scheduled_at in batches) and sends only the
+valid ones. If the API still rejects the batch, it is split in half and
+each half is resent, isolating the bad emails in O(log n) extra calls per
+bad email instead of resending all 100 one by one.
+
+Key points:
+- Returns one result per input email, in order: {"id": ...} or the
+  exception that email failed with
+- Only 400/422 rejections are bisected; transient errors are retried as
+  usual (see retry.py) and other failures are reported for every email
+- Every sub-batch gets its own idempotency key derived from the parent's,
+  so retries never send an email twice; pass `key` (e.g. from a job id)
+  to make re-running the same batch safe as well
+- Resend's `batch_validation: "permissive"` option is the server-side
+  alternative when one extra round trip per failed batch doesn't matter
+
+Usage:
+    python examples/batch_validation.py   # demo against the fake API
+
+See: https://resend.com/docs/api-reference/emails/send-batch-emails
+"""
+
+import asyncio
+import email.utils
+import re
+from typing import List, Optional, Union
+
+from resend.exceptions import ResendError
+
+from retry import batch_send_with_retry, batch_send_with_retry_async, new_idempotency_key
+
+MAX_RECIPIENTS = 50
+
+ADDRESS_RE = re.compile(r"^[^@\s<>]+@[^@\s<>]+\.[^@\s<>]+$")
+
+
+class EmailValidationError(ValueError):
+    """An email that was rejected before it reached the API."""
+
+
+def _addresses(value) -> list:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def is_valid_address(value: str) -> bool:
+    """Accepts "user@example.com" and "Name <user@example.com>"."""
+    if not isinstance(value, str):
+        return False
+    _, address = email.utils.parseaddr(value)
+    return bool(ADDRESS_RE.match(address))
+
+
+def validate_email(params: dict, batch: bool = False) -> List[str]:
+    """Return every problem that would make the API reject `params`."""
+    problems = []
+
+    if not params.get("from"):
+        problems.append("missing 'from'")
+    elif not is_valid_address(params["from"]):
+        problems.append(f"invalid 'from' address: {params['from']!r}")
+
+    to = _addresses(params.get("to"))
+    if not to:
+        problems.append("missing 'to'")
+    elif len(to) > MAX_RECIPIENTS:
+        problems.append(f"more than {MAX_RECIPIENTS} 'to' recipients")
+
+    for field in ("to", "cc", "bcc", "reply_to"):
+        for address in _addresses(params.get(field)):
+            if not is_valid_address(address):
+                problems.append(f"invalid '{field}' address: {address!r}")
+
+    if not params.get("subject") and not params.get("template"):
+        problems.append("missing 'subject'")
+    if not any(params.get(k) for k in ("html", "text", "react", "template")):
+        problems.append("missing content ('html', 'text' or 'template')")
+
+    if batch:
+        for field in ("attachments", "scheduled_at"):
+            if params.get(field):
+                problems.append(f"'{field}' is not supported in batch emails")
+
+    return problems
+
+
+def is_rejection(exc: Exception) -> bool:
+    """Whether the API refused the request's content (worth bisecting)."""
+    return isinstance(exc, ResendError) and str(exc.code) in ("400", "422")
+
+
+def _prevalidate(emails: List[dict]) -> tuple:
+    results: List[Union[dict, Exception, None]] = [None] * len(emails)
+    valid = []
+    for i, params in enumerate(emails):
+        problems = validate_email(params, batch=True)
+        if problems:
+            results[i] = EmailValidationError("; ".join(problems))
+        else:
+            valid.append(i)
+    return results, valid
+
+
+def send_batch_isolated(emails: List[dict], key: Optional[str] = None, **retry_options) -> list:
+    """
+    Batch.send that only fails the emails that are actually invalid.
+
+    Returns:
+        One entry per email, in input order: {"id": ...} or an exception
+    """
+    results, valid = _prevalidate(emails)
+    key = key or new_idempotency_key("batch")
+
+    def bisect(indices: List[int], key: str):
+        try:
+            data = batch_send_with_retry([emails[i] for i in indices], key, **retry_options)["data"]
+        except Exception as e:
+            if len(indices) == 1 or not is_rejection(e):
+                for i in indices:
+                    results[i] = e
+                return
+            mid = len(indices) // 2
+            bisect(indices[:mid], f"{key}/0")
+            bisect(indices[mid:], f"{key}/1")
+            return
+        for i, result in zip(indices, data):
+            results[i] = {"id": result["id"]}
+
+    if valid:
+        bisect(valid, key)
+    return results
+
+
+async def send_batch_isolated_async(emails: List[dict], key: Optional[str] = None, **retry_options) -> list:
+    """Async version of send_batch_isolated; both halves are resent concurrently."""
+    results, valid = _prevalidate(emails)
+    key = key or new_idempotency_key("batch")
+
+    async def bisect(indices: List[int], key: str):
+        try:
+            response = await batch_send_with_retry_async([emails[i] for i in indices], key, **retry_options)
+        except Exception as e:
+            if len(indices) == 1 or not is_rejection(e):
+                for i in indices:
+                    results[i] = e
+                return
+            mid = len(indices) // 2
+            await asyncio.gather(bisect(indices[:mid], f"{key}/0"), bisect(indices[mid:], f"{key}/1"))
+            return
+        for i, result in zip(indices, response["data"]):
+            results[i] = {"id": result["id"]}
+
+    if valid:
+        await bisect(valid, key)
+    return results
+
+
+if __name__ == "__main__":
+    import resend
+    from fake_resend import start_fake_resend
+
+    server = start_fake_resend()
+    resend.api_key = "re_demo"
+    resend.api_url = server.url
+
+    print("=== Batch Pre-Validation and Bisecting ===\n")
+
+    emails = [
+        {
+            "from": "Acme <onboarding@resend.dev>",
+            "to": [f"user{i}@example.com"],
+            "subject": f"Hello #{i}",
+            "html": "<p>Hello!</p>",
+        }
+        for i in range(100)
+    ]
+    # Caught locally: not an address
+    emails[17]["to"] = ["user17-at-example.com"]
+    # Looks fine locally, but the (fake) API refuses the reserved .invalid TLD
+    emails[62]["to"] = ["user62@example.invalid"]
+
+    results = send_batch_isolated(emails)
+
+    sent = [r for r in results if isinstance(r, dict)]
+    print(f"{len(sent)} sent with {server.requests} API call(s)")
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"  #{i} rejected: {result}")
+    server.shutdown()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Blocking vs Async Sends in FastAPI
+
+Drives the FastAPI app's POST /send in-process against the local fake
+Resend API (see fake_resend.py) with artificial latency, and reports
+requests/sec for three ways of calling Resend from an async handler:
+
+- blocking:        resend.Emails.send (stalls the event loop)
+- async:           resend.Emails.send_async with the SDK's default client
+- async + pooled:  resend.Emails.send_async with PooledHTTPXClient
+
+The app's shared rate limiter is left out of every variant, so the only
+difference between them is blocking vs awaiting.
+
+Usage:
+    python examples/benchmark_async_send.py --requests 500 --concurrency 50 --latency 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from fake_resend import spawn_fake_resend
+
+
+async def run(app, path: str, total: int, concurrency: int) -> float:
+    """Fire `total` POSTs at `path` with `concurrency` in flight; return req/s."""
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(i: int):
+            async with semaphore:
+                response = await client.post(path, json={
+                    "to": "delivered@resend.dev",
+                    "subject": f"Benchmark {i}",
+                    "message": "Hello from the benchmark",
+                })
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=50, help="fake API latency in ms")
+    args = parser.parse_args()
+
+    server, server_url = spawn_fake_resend(latency=args.latency / 1000)
+    os.environ["RESEND_API_KEY"] = "re_benchmark"
+    os.environ["RESEND_API_URL"] = server_url
+    os.environ["RESEND_COALESCE_MS"] = "0"
+
+    import resend
+    import fastapi_app
+    from http_clients import PooledHTTPXClient
+    from resend.http_client_httpx import HTTPXClient
+    from resend.http_client_requests import RequestsClient
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app = fastapi_app.app
+
+    # The app wraps both SDK clients in its token bucket (2 req/s by
+    # default), which would cap every variant at the rate limit; each
+    # variant below gets a plain client instead
+    resend.default_http_client = RequestsClient()
+
+    # The pre-async handler, kept here as the baseline
+    @app.post("/bench/blocking-send")
+    async def blocking_send(email_request: fastapi_app.EmailRequest):
+        result = resend.Emails.send({
+            "from": "Acme <onboarding@resend.dev>",
+            "to": [email_request.to],
+            "subject": email_request.subject,
+            "html": f"<p>{email_request.message}</p>",
+        })
+        return {"success": True, "id": result["id"]}
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, "
+          f"{args.latency:g}ms fake Resend latency\n")
+
+    # The blocking handler serializes everything, so keep its run short
+    blocking_total = min(args.requests, max(20, int(2000 / max(args.latency, 1))))
+    rate = asyncio.run(run(app, "/bench/blocking-send", blocking_total, args.concurrency))
+    print(f"  blocking        {rate:8.1f} req/s")
+
+    resend.default_async_http_client = HTTPXClient()
+    rate = asyncio.run(run(app, "/send", args.requests, args.concurrency))
+    print(f"  async           {rate:8.1f} req/s")
+
+    async def pooled() -> float:
+        resend.default_async_http_client = PooledHTTPXClient()
+        try:
+            return await run(app, "/send", args.requests, args.concurrency)
+        finally:
+            await resend.default_async_http_client.aclose()
+
+    rate = asyncio.run(pooled())
+    print(f"  async + pooled  {rate:8.1f} req/s")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Webhook Verification, str vs bytes
+
+The webhook handlers used to decode the request body to a str, verify
+it (which encoded it back to bytes for the HMAC) and parse it with the
+json module. They now pass the raw bytes, and WebhookVerifier parses
+them once, with orjson when it's installed.
+
+This sends signed deliveries of realistic sizes (delivery events of
+a few hundred bytes, inbound emails with HTML, text and headers) and
+reports:
+
+- the verify-and-parse step alone, per payload size
+- requests/sec through the FastAPI app in-process, with both handlers
+
+Usage:
+    python examples/benchmark_webhooks.py --requests 2000 --concurrency 50 --inbound-kb 32
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+import timeit
+
+import httpx
+
+SECRET = "whsec_" + base64.b64encode(b"benchmark-signing-secret").decode()
+
+
+def delivery_event(i: int) -> dict:
+    return {
+        "type": "email.delivered",
+        "created_at": "2026-01-01T12:00:00.000Z",
+        "data": {
+            "email_id": f"4ef9a417-02e9-4d39-ad75-{i:012d}",
+            "from": "Acme <onboarding@resend.dev>",
+            "to": ["delivered@resend.dev"],
+            "subject": "Your receipt from Acme",
+            "created_at": "2026-01-01T11:59:58.000Z",
+            "tags": [{"name": "category", "value": "receipt"}],
+        },
+    }
+
+
+def inbound_event(i: int, kb: int) -> dict:
+    paragraph = "Thanks for the quick reply! Here are the details you asked for. "
+    text = (paragraph * (kb * 1024 // len(paragraph) // 2 + 1))[: kb * 512]
+    return {
+        "type": "email.received",
+        "created_at": "2026-01-01T12:00:00.000Z",
+        "data": {
+            "email_id": f"b1c2d3e4-0000-4000-8000-{i:012d}",
+            "from": "Customer <customer@example.com>",
+            "to": ["support@acme.com"],
+            "subject": "Re: Your order #1234",
+            "text": text,
+            "html": f"<div><p>{text}</p></div>",
+            "headers": [{"name": f"X-Header-{n}", "value": "v" * 60} for n in range(20)],
+            "attachments": [],
+        },
+    }
+
+
+async def run(app, path: str, deliveries: list, concurrency: int) -> float:
+    """POST every (body, headers) to `path` with `concurrency` in flight; return req/s."""
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(body: bytes, headers: dict):
+            async with semaphore:
+                response = await client.post(path, content=body, headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(body, headers) for body, headers in deliveries))
+        return len(deliveries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--inbound-kb", type=int, default=32, help="approximate size of inbound emails")
+    args = parser.parse_args()
+
+    os.environ.setdefault("RESEND_API_KEY", "re_benchmark")
+    os.environ["RESEND_WEBHOOK_SECRET"] = SECRET
+
+    from fastapi import Request
+
+    import fastapi_app
+    from webhook_verifier import WebhookVerifier, json_loads
+
+    fast = WebhookVerifier(SECRET)
+    # The previous handler: str in, stdlib json out
+    baseline = WebhookVerifier(SECRET, loads=json.loads)
+
+    def signed(events: list) -> list:
+        bodies = [json.dumps(event).encode() for event in events]
+        return [(body, fast.sign(body, f"msg_{i}")) for i, body in enumerate(bodies)]
+
+    mix = {
+        "delivery events": signed([delivery_event(i) for i in range(args.requests)]),
+        "inbound emails": signed([inbound_event(i, args.inbound_kb) for i in range(args.requests)]),
+    }
+
+    print(f"JSON parser: {json_loads.__module__}\n")
+    print("Verify + parse, per delivery:")
+    for label, deliveries in mix.items():
+        body, headers = deliveries[0]
+        text = body.decode()
+        number = max(200, 2_000_000 // len(body))
+        old = min(timeit.repeat(lambda: baseline.verify(body.decode(), headers), number=number, repeat=5))
+        new = min(timeit.repeat(lambda: fast.verify(body, headers), number=number, repeat=5))
+        print(f"  {label:16} {len(text) / 1024:6.1f} KB   str: {old / number * 1e6:7.1f} us"
+              f"   bytes: {new / number * 1e6:7.1f} us   ({old / new:.1f}x)")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app = fastapi_app.app
+
+    @app.post("/bench/webhook-str")
+    async def webhook_str(request: Request):
+        payload = (await request.body()).decode()
+        return {"received": True, "type": baseline.verify(payload, request.headers)["type"]}
+
+    @app.post("/bench/webhook-bytes")
+    async def webhook_bytes(request: Request):
+        return {"received": True, "type": fast.verify(await request.body(), request.headers)["type"]}
+
+    print(f"\nFastAPI in-process, {args.requests} requests, {args.concurrency} concurrent:")
+    for label, deliveries in mix.items():
+        old = asyncio.run(run(app, "/bench/webhook-str", deliveries, args.concurrency))
+        new = asyncio.run(run(app, "/bench/webhook-bytes", deliveries, args.concurrency))
+        print(f"  {label:16} str: {old:8.1f} req/s   bytes: {new:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Streaming Bulk Send with Checkpoint/Resume
+
+Sends one email per recipient in a CSV or NDJSON file of any size. The
+file is read lazily and packed into chunks of 100 (the Batch.send limit),
+which are sent concurrently with a bounded number of requests in flight,
+so memory stays flat whether the list has a thousand or a million rows.
+
+Every completed chunk is appended to a checkpoint file. If the run
+crashes or is interrupted, run the same command again: finished chunks
+are skipped, and chunks that were in flight are resent with the same
+idempotency key, so nobody gets the email twice.
+
+Key points:
+- CSV: one recipient per row with an `email` column; other columns can
+  be used as {placeholders} in --subject and --html (values are escaped)
+- NDJSON: one complete email payload per line ("from" defaults to --from)
+- Each chunk's idempotency key is derived from the input file, the
+  checkpoint and the chunk number; Resend keeps keys for 24 hours, so
+  resume within a day
+- The checkpoint records which version of the input file it belongs to;
+  if the file has changed since, the run stops rather than skip chunks
+  whose contents moved
+- --restart starts a new checkpoint with new idempotency keys, so every
+  recipient gets the email again, even within 24 hours
+- Invalid emails are caught locally or isolated by bisecting the batch
+  (see batch_validation.py); they are written to <input>.rejected and
+  don't hold up the rest of their chunk
+- Chunks that still fail after retries are reported and left out of the
+  checkpoint, so the next run tries them again
+- Honours RESEND_RATE_LIMIT like the web apps; raise it to your plan's limit
+- --render inlines CSS, minifies and adds a text part (see
+  render_pipeline.py); identical bodies are rendered once
+
+Usage:
+    python examples/bulk_send.py recipients.csv \\
+        --subject "Hi {first_name}" --html "<p>Hello {first_name}!</p>"
+    python examples/bulk_send.py emails.ndjson --concurrency 8
+
+See: https://resend.com/docs/api-reference/emails/send-batch-emails
+"""
+
+import argparse
+import csv
+import hashlib
+import html
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Set
+
+import resend
+from dotenv import load_dotenv
+
+from batch_validation import EmailValidationError, is_rejection, send_batch_isolated
+from http_clients import PooledRequestsClient
+from rate_limiter import RateLimitedHTTPClient, RateLimiter
+from render_pipeline import default_pipeline
+
+CHUNK_SIZE = 100
+
+
+class CheckpointMismatch(Exception):
+    """The checkpoint was written for a different version of the input file."""
+
+
+def read_csv(path: str, sender: str, subject: str, body: str) -> Iterator[dict]:
+    """
+    Yield one email per CSV row, rendering {column} placeholders.
+
+    Raises:
+        ValueError: Right away, if the file has no `email` column
+    """
+    f = open(path, newline="", encoding="utf-8")
+    reader = csv.DictReader(f)
+    columns = reader.fieldnames or []
+    if "email" not in columns:
+        f.close()
+        raise ValueError(f"{path} has no 'email' column (columns: {', '.join(columns) or 'none'})")
+    return _csv_emails(f, reader, sender, subject, body)
+
+
+def _csv_emails(f, reader: csv.DictReader, sender: str, subject: str, body: str) -> Iterator[dict]:
+    with f:
+        for row in reader:
+            values = {k: v or "" for k, v in row.items() if k}
+            yield {
+                "from": sender,
+                "to": [values["email"]],
+                "subject": subject.format_map(values),
+                "html": body.format_map({k: html.escape(v) for k, v in values.items()}),
+            }
+
+
+def read_ndjson(path: str, sender: str) -> Iterator[dict]:
+    """Yield one email payload per non-empty NDJSON line."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                email = json.loads(line)
+                email.setdefault("from", sender)
+                yield email
+
+
+def chunked(emails: Iterable[dict], size: int = CHUNK_SIZE) -> Iterator[List[dict]]:
+    """Group an iterable into lists of `size` without reading ahead."""
+    it = iter(emails)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Checkpoint:
+    """
+    Append-only record of completed chunk numbers.
+
+    The first line records the input fingerprint (chunk numbers only mean
+    something for the file they were counted in) and a random id for this
+    checkpoint, so a restart's idempotency keys differ from the last run's.
+
+    Args:
+        path: Checkpoint file
+        fingerprint: input_fingerprint() of the file being sent
+        restart: Discard an existing checkpoint instead of resuming
+
+    Raises:
+        CheckpointMismatch: The checkpoint belongs to another version of
+            the input (and restart is False)
+    """
+
+    def __init__(self, path: str, fingerprint: str, restart: bool = False):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done: Set[int] = set()
+        lines = []
+        if os.path.exists(path) and not restart:
+            with open(path) as f:
+                lines = f.read().splitlines()
+        if lines:
+            header = lines[0].split()
+            if header[:3] != ["#", "input", fingerprint]:
+                raise CheckpointMismatch(
+                    f"{path} was written for a different version of the input file"
+                )
+            self.id = header[3] if len(header) > 3 else ""
+            # A torn last line from a crash is simply not counted
+            self.done = {int(line) for line in lines[1:] if line.strip().isdigit()}
+            self._file = open(path, "a")
+        else:
+            self.id = uuid.uuid4().hex[:12]
+            self._file = open(path, "w")
+            self._file.write(f"# input {fingerprint} {self.id}\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._lock = threading.Lock()
+
+    def key(self, chunk: int) -> str:
+        """Idempotency key of a chunk, the same for every resume of this checkpoint."""
+        return "/".join(part for part in ("bulk", self.fingerprint, self.id, str(chunk)) if part)
+
+    def mark(self, chunk: int):
+        with self._lock:
+            self._file.write(f"{chunk}\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def input_fingerprint(path: str) -> str:
+    """Identifies this version of the input file across runs."""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class BulkSender:
+    """
+    Sends chunks concurrently with at most `concurrency` Batch.send calls
+    in flight; reading stops while all slots are busy.
+    """
+
+    def __init__(self, checkpoint: Checkpoint, rejects_path: str, concurrency: int = 4):
+        self.checkpoint = checkpoint
+        self.rejects_path = rejects_path
+        self.sent = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.failed: List[int] = []
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._lock = threading.Lock()
+
+    def run(self, emails: Iterable[dict], progress_every: float = 5.0):
+        start = last_report = time.monotonic()
+        for number, chunk in enumerate(chunked(emails)):
+            if number in self.checkpoint.done:
+                self.skipped += len(chunk)
+                continue
+
+            self._slots.acquire()
+            future = self._executor.submit(self._send, number, chunk)
+            future.add_done_callback(lambda f, number=number: self._finished(f, number))
+
+            now = time.monotonic()
+            if now - last_report >= progress_every:
+                last_report = now
+                self.report(now - start)
+
+        self._executor.shutdown(wait=True)
+        return time.monotonic() - start
+
+    def _finished(self, future: Future, number: int):
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            # e.g. the checkpoint write failed: not marked, so the next run
+            # sends the chunk again (with the same key)
+            print(f"Chunk {number} failed: {error}", file=sys.stderr)
+            with self._lock:
+                self.failed.append(number)
+
+    def _send(self, number: int, chunk: List[dict]):
+        results = send_batch_isolated(chunk, self.checkpoint.key(number))
+
+        errors = [r for r in results if isinstance(r, Exception)]
+        rejects = [
+            (email, r) for email, r in zip(chunk, results)
+            if isinstance(r, EmailValidationError) or is_rejection(r)
+        ]
+        if len(rejects) < len(errors):
+            # Retries ran out (network, 5xx, auth): try the chunk again next run
+            print(f"Chunk {number} failed: {errors[0]}", file=sys.stderr)
+            with self._lock:
+                self.failed.append(number)
+            return
+
+        with self._lock:
+            if rejects:
+                with open(self.rejects_path, "a", encoding="utf-8") as f:
+                    for email, error in rejects:
+                        f.write(json.dumps({"chunk": number, "to": email.get("to"), "error": str(error)}) + "\n")
+            self.sent += len(chunk) - len(rejects)
+            self.rejected += len(rejects)
+        self.checkpoint.mark(number)
+
+    def report(self, elapsed: float):
+        rate = self.sent / elapsed if elapsed else 0.0
+        print(f"{self.sent} sent, {self.skipped} skipped, {self.rejected} rejected, "
+              f"{len(self.failed)} chunk(s) failed - {rate:.0f} emails/sec")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stream a recipient list into Batch.send")
+    parser.add_argument("input", help="CSV (with an email column) or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--from", dest="sender", default=os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"))
+    parser.add_argument("--subject", help="Subject template for CSV input")
+    parser.add_argument("--html", help="HTML template for CSV input")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch.send calls in flight")
+    parser.add_argument("--checkpoint", help="Defaults to <input>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and send everything again")
+    parser.add_argument("--render", action="store_true", help="Inline CSS, minify and add a text part")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("ndjson" if args.input.endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt == "csv":
+        if not args.subject or not args.html:
+            parser.error("--subject and --html are required for CSV input")
+        try:
+            emails = read_csv(args.input, args.sender, args.subject, args.html)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        emails = read_ndjson(args.input, args.sender)
+    if args.render:
+        emails = map(default_pipeline.render_params, emails)
+
+    fingerprint = input_fingerprint(args.input)
+    try:
+        checkpoint = Checkpoint(args.checkpoint or f"{args.input}.checkpoint", fingerprint, args.restart)
+    except CheckpointMismatch as e:
+        parser.error(f"{e}; run with --restart to send to every recipient again")
+    if checkpoint.done:
+        print(f"Resuming: {len(checkpoint.done)} chunk(s) already sent")
+
+    sender = BulkSender(checkpoint, f"{args.input}.rejected", args.concurrency)
+    try:
+        elapsed = sender.run(emails)
+    finally:
+        checkpoint.close()
+
+    sender.report(elapsed)
+    if args.render:
+        stats = default_pipeline.stats()
+        print(f"Rendered {stats['renders']} distinct bodies ({stats['cache_hits']} cache hits), "
+              f"{stats['bytes_saved'] / 1e6:.1f} MB of HTML saved")
+    if sender.rejected:
+        print(f"Rejected emails were written to {sender.rejects_path}")
+    if sender.failed:
+        print(f"Failed chunks: {sorted(sender.failed)} - run again to retry them")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    resend.api_key = os.environ["RESEND_API_KEY"]
+    # Keep-alive connections for the whole run, under the shared rate limit
+    resend.default_http_client = RateLimitedHTTPClient(
+        RateLimiter.from_env(), PooledRequestsClient()
+    )
+
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Concurrent Contact Import with a Resumable Journal
+
+Adding contacts one Contacts.create at a time, waiting for each reply,
+runs at one request per round trip: a 500k-row customer list takes days.
+
+This streams a CSV into an audience with a bounded number of creates in
+flight, under the shared rate limit. Addresses are normalized and
+deduplicated as they are read, and every imported (or rejected) address
+is recorded in a local journal. If the run stops, run the same command
+again: journaled addresses are skipped without calling the API.
+
+Key points:
+- CSV with an `email` column; `first_name`, `last_name` and
+  `unsubscribed` (true/false, yes/no, 1/0) are optional
+- The file is read lazily and reading pauses while all slots are busy;
+  each address is claimed in the journal as it is read, which is also
+  how duplicates within the file are spotted, so memory stays flat
+- The journal is a SQLite file keyed by (audience, email), so it still
+  applies if the CSV is re-exported, re-sorted or appended to
+- Contacts.create has no idempotency key. Before a create is retried, or
+  resumed after a run stopped mid-call, the address is looked up first,
+  so a create whose response was lost doesn't add the contact twice
+- Invalid addresses and rows the API refuses (400/422) go to
+  <input>.rejected and are journaled; rows that still fail after retries
+  (network, 5xx, 429) are not, so the next run tries them again
+- Ctrl-C finishes the creates in flight before exiting
+- New contact ids are added to the contact index (see contact_index.py)
+- A progress line every few seconds shows overall and current throughput
+- Honours RESEND_RATE_LIMIT like the web apps; raise it to your plan's limit
+
+Usage:
+    python examples/contact_import.py customers.csv --audience <audience-id>
+    python examples/contact_import.py customers.csv --concurrency 16
+
+See: https://resend.com/docs/api-reference/contacts/create-contact
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+import resend
+from dotenv import load_dotenv
+
+from batch_validation import is_rejection, is_valid_address
+from contact_index import ContactIndex, default_index, normalize_email
+from http_clients import PooledRequestsClient
+from rate_limiter import RateLimitedHTTPClient, RateLimiter
+from retry import call_with_retry
+
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS imported (
+    audience_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    contact_id TEXT,
+    status TEXT NOT NULL,
+    run TEXT,
+    PRIMARY KEY (audience_id, email)
+);
+"""
+
+
+def read_contacts(path: str) -> Iterator[dict]:
+    """Yield one Contacts.create payload (without audience_id) per CSV row."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            contact = {"email": normalize_email(values.get("email", ""))}
+            for field in ("first_name", "last_name"):
+                if values.get(field):
+                    contact[field] = values[field]
+            if values.get("unsubscribed"):
+                contact["unsubscribed"] = values["unsubscribed"].lower() in TRUE_VALUES
+            yield contact
+
+
+class ImportJournal:
+    """
+    Addresses already imported (or rejected), per audience.
+
+    An address is claimed ("pending") when it is read and marked "created"
+    or "rejected" once the API has answered. A pending row left by an
+    earlier run means that run stopped mid-create.
+
+    Args:
+        path: SQLite file; survives crashes and restarts
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.run = uuid.uuid4().hex
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        # Journals written before addresses were claimed per run
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(imported)")}
+        if "run" not in columns:
+            conn.execute("ALTER TABLE imported ADD COLUMN run TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def claim(self, audience_id: str, email: str) -> str:
+        """
+        Claim an address for this run.
+
+        Returns:
+            "new", "duplicate" (already seen in this run), "done" (imported
+            or rejected by an earlier run) or "unconfirmed" (an earlier run
+            stopped while creating it; it may exist already)
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT status, run FROM imported WHERE audience_id = ? AND email = ?",
+                (audience_id, email),
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO imported (audience_id, email, status, run) VALUES (?, ?, 'pending', ?)",
+                    (audience_id, email, self.run),
+                )
+                claimed = "new"
+            elif row[1] == self.run:
+                claimed = "duplicate"
+            elif row[0] != "pending":
+                claimed = "done"
+            else:
+                conn.execute(
+                    "UPDATE imported SET run = ? WHERE audience_id = ? AND email = ?",
+                    (self.run, audience_id, email),
+                )
+                claimed = "unconfirmed"
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def record(self, audience_id: str, email: str, status: str, contact_id: Optional[str] = None):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO imported (audience_id, email, contact_id, status, run) VALUES (?, ?, ?, ?, ?)",
+            (audience_id, email, contact_id, status, self.run),
+        )
+
+    def count(self, audience_id: str) -> int:
+        """Addresses imported or rejected so far."""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM imported WHERE audience_id = ? AND status != 'pending'", (audience_id,)
+        ).fetchone()[0]
+
+
+class ContactImporter:
+    """
+    Creates contacts concurrently with at most `concurrency` Contacts.create
+    calls in flight; reading stops while all slots are busy.
+    """
+
+    def __init__(
+        self,
+        audience_id: str,
+        journal: ImportJournal,
+        rejects_path: str,
+        concurrency: int = 8,
+        index: Optional[ContactIndex] = None,
+    ):
+        self.audience_id = audience_id
+        self.journal = journal
+        self.rejects_path = rejects_path
+        self.index = index
+        self.created = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.failed = 0
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._lock = threading.Lock()
+
+    def run(self, contacts: Iterable[dict], progress_every: float = 2.0) -> float:
+        start = last_report = time.monotonic()
+        created_at_report = 0
+        try:
+            for contact in contacts:
+                now = time.monotonic()
+                if now - last_report >= progress_every:
+                    recent = (self.created - created_at_report) / (now - last_report)
+                    last_report, created_at_report = now, self.created
+                    self.report(now - start, recent)
+
+                email = contact["email"]
+                claimed = self.journal.claim(self.audience_id, email)
+                if claimed == "duplicate":
+                    self.duplicates += 1
+                    continue
+                if claimed == "done":
+                    self.skipped += 1
+                    continue
+                if not is_valid_address(email):
+                    self._reject(contact, "Invalid email address")
+                    continue
+
+                self._slots.acquire()
+                future = self._executor.submit(self._create, contact, claimed == "unconfirmed")
+                future.add_done_callback(lambda f, email=email: self._finished(f, email))
+        finally:
+            # On Ctrl-C too: creates in flight are finished and journaled,
+            # rather than sent again by the next run
+            self._executor.shutdown(wait=True)
+        return time.monotonic() - start
+
+    def _finished(self, future: Future, email: str):
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            # e.g. "database is locked" while journaling: the row stays
+            # pending, so the next run checks for the contact before creating it
+            print(f"{email} failed: {error}", file=sys.stderr)
+            with self._lock:
+                self.failed += 1
+
+    def _create(self, contact: dict, unconfirmed: bool = False):
+        email = contact["email"]
+        params = dict(contact, audience_id=self.audience_id)
+        # Whether an earlier attempt may have created the contact
+        maybe_created = [unconfirmed]
+
+        def create() -> dict:
+            if maybe_created[0]:
+                existing = self._existing(email)
+                if existing is not None:
+                    return existing
+            maybe_created[0] = True
+            return resend.Contacts.create(params)
+
+        try:
+            created = call_with_retry(create)
+        except Exception as e:
+            if is_rejection(e):
+                self._reject(contact, str(e))
+                return
+            # Retries ran out (network, 5xx, auth): try it again next run
+            print(f"{email} failed: {e}", file=sys.stderr)
+            with self._lock:
+                self.failed += 1
+            return
+
+        self.journal.record(self.audience_id, email, "created", created["id"])
+        if self.index is not None:
+            self.index.add(self.audience_id, email, created["id"])
+        with self._lock:
+            self.created += 1
+
+    def _existing(self, email: str) -> Optional[dict]:
+        """The contact if it is already in the audience, else None."""
+        try:
+            return resend.Contacts.get(audience_id=self.audience_id, email=email)
+        except Exception as e:
+            if getattr(e, "code", None) in (404, "404"):
+                return None
+            raise
+
+    def _reject(self, contact: dict, error: str):
+        self.journal.record(self.audience_id, contact["email"], "rejected")
+        with self._lock:
+            with open(self.rejects_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"contact": contact, "error": error}) + "\n")
+            self.rejected += 1
+
+    def report(self, elapsed: float, recent: Optional[float] = None):
+        rate = self.created / elapsed if elapsed else 0.0
+        current = f" ({recent:.0f}/sec now)" if recent is not None else ""
+        print(f"{self.created} created, {self.skipped} already imported, {self.duplicates} duplicate(s), "
+              f"{self.rejected} rejected, {self.failed} failed - {rate:.0f} contacts/sec{current}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import a CSV of contacts into an audience")
+    parser.add_argument("input", help="CSV file with an email column")
+    parser.add_argument("--audience", default=os.environ.get("RESEND_AUDIENCE_ID"), help="Defaults to RESEND_AUDIENCE_ID")
+    parser.add_argument("--concurrency", type=int, default=8, help="Contacts.create calls in flight")
+    parser.add_argument("--journal", help="Defaults to <input>.journal")
+    args = parser.parse_args(argv)
+    if not args.audience:
+        parser.error("--audience or RESEND_AUDIENCE_ID is required")
+
+    journal = ImportJournal(args.journal or f"{args.input}.journal")
+    already = journal.count(args.audience)
+    if already:
+        print(f"Resuming: {already} contact(s) already imported or rejected")
+
+    importer = ContactImporter(args.audience, journal, f"{args.input}.rejected", args.concurrency, default_index())
+    start = time.monotonic()
+    try:
+        importer.run(read_contacts(args.input))
+    except KeyboardInterrupt:
+        importer.report(time.monotonic() - start)
+        print("Interrupted - run the same command to continue")
+        return 130
+
+    importer.report(time.monotonic() - start)
+    if importer.rejected:
+        print(f"Rejected contacts were written to {importer.rejects_path}")
+    if importer.failed:
+        print(f"{importer.failed} contact(s) failed - run again to retry them")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    resend.api_key = os.environ["RESEND_API_KEY"]
+    # Keep-alive connections for the whole run, under the shared rate limit
+    resend.default_http_client = RateLimitedHTTPClient(
+        RateLimiter.from_env(), PooledRequestsClient()
+    )
+
+    sys.exit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Local Email -> Contact ID Index
+
+Confirming a double opt-in click needs the contact's id, but the
+email.clicked event only carries the recipient's address. Listing the
+audience and scanning it for that address costs a full API round trip
+and O(audience) work per click, and only sees the first page.
+
+ContactIndex keeps the mapping in a local SQLite table, per audience:
+
+- subscribe() records the id it gets back from Contacts.create
+- contact.created / contact.updated / contact.deleted webhooks keep it
+  in step with changes made elsewhere (dashboard, API, unsubscribes)
+- a miss falls back to listing the audience once, indexing every contact
+  on the way, so an index that starts empty fills itself; an audience is
+  listed at most once per `refresh_interval`, so clicks for addresses it
+  doesn't have (or a flood of them) don't re-list it every time
+
+Key points:
+- Addresses are normalized (trimmed, lower-cased) on the way in and out
+- Older contact events don't overwrite newer ones (by updated_at)
+- A contact whose address changed is re-keyed: the old address stops
+  resolving to its id
+- A confirmation becomes one indexed lookup plus one Contacts.update;
+  if the id turns out to be stale (404), it is dropped and looked up again
+- RESEND_CONTACT_INDEX: database file (default: in the system temp dir)
+
+Usage:
+    from contact_index import ContactIndex
+
+    contact_index = ContactIndex.from_env()                # once per process
+    contact_index.add(audience_id, email, contact["id"])   # after create
+    contact_index.apply_event(event)                       # contact.* webhooks
+    contact_id = contact_index.lookup(audience_id, email)  # on email.clicked
+
+    python examples/contact_index.py   # lookup vs list-and-scan demo
+
+See: https://resend.com/docs/dashboard/webhooks/event-types
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+import resend
+from resend.exceptions import ResendError
+
+from contact_pages import iter_contacts
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "resend-contacts.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    audience_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (audience_id, email)
+);
+CREATE INDEX IF NOT EXISTS contacts_by_id ON contacts (audience_id, contact_id);
+"""
+
+T = TypeVar("T")
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class ContactIndex:
+    """
+    Persistent map from normalized email address to contact id, per audience.
+
+    Args:
+        path: SQLite file (several processes may share it)
+        refresh_interval: Minimum seconds between listings of one audience;
+            a miss within it is answered without calling the API
+    """
+
+    def __init__(self, path: str = DEFAULT_DB, refresh_interval: float = 60.0):
+        self.path = str(path)
+        self.refresh_interval = refresh_interval
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        # Held while listing, so concurrent misses share one listing
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at: Dict[str, float] = {}
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "ContactIndex":
+        return cls(os.environ.get("RESEND_CONTACT_INDEX", DEFAULT_DB))
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, audience_id: str, email: str, contact_id: str, updated_at: str = ""):
+        """Record a contact; ignored if the index has a newer version of it."""
+        email, updated_at = normalize_email(email), updated_at or ""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            newer = conn.execute(
+                "SELECT 1 FROM contacts WHERE audience_id = ? AND contact_id = ? AND updated_at > ?",
+                (audience_id, contact_id, updated_at),
+            ).fetchone()
+            if newer is None:
+                # The contact's address changed: drop the old one
+                conn.execute(
+                    "DELETE FROM contacts WHERE audience_id = ? AND contact_id = ? AND email != ?",
+                    (audience_id, contact_id, email),
+                )
+                conn.execute(
+                    "INSERT INTO contacts (audience_id, email, contact_id, updated_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (audience_id, email) DO UPDATE SET"
+                    " contact_id = excluded.contact_id, updated_at = excluded.updated_at"
+                    " WHERE excluded.updated_at >= contacts.updated_at",
+                    (audience_id, email, contact_id, updated_at),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, audience_id: str, email: Optional[str] = None, contact_id: Optional[str] = None):
+        """Forget a contact by address or by id."""
+        if email:
+            self._connect().execute(
+                "DELETE FROM contacts WHERE audience_id = ? AND email = ?", (audience_id, normalize_email(email))
+            )
+        if contact_id:
+            self._connect().execute(
+                "DELETE FROM contacts WHERE audience_id = ? AND contact_id = ?", (audience_id, contact_id)
+            )
+
+    def get(self, audience_id: str, email: str) -> Optional[str]:
+        """Indexed contact id of `email`, without calling the API."""
+        row = self._connect().execute(
+            "SELECT contact_id FROM contacts WHERE audience_id = ? AND email = ?",
+            (audience_id, normalize_email(email)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def apply_event(self, event: dict) -> bool:
+        """Apply a contact.created/updated/deleted webhook; False for other events."""
+        event_type = event.get("type", "")
+        data = event.get("data") or {}
+        audience_id = data.get("audience_id")
+        if not event_type.startswith("contact.") or not (audience_id and data.get("id")):
+            return False
+        if event_type == "contact.deleted":
+            self.remove(audience_id, email=data.get("email"), contact_id=data["id"])
+        elif data.get("email"):
+            self.add(audience_id, data["email"], data["id"], data.get("updated_at") or event.get("created_at"))
+        return True
+
+    def refresh(self, audience_id: str) -> int:
+        """Index every contact in `audience_id`, all pages; returns the count."""
+        count = 0
+        for contact in iter_contacts(audience_id):
+            self.add(audience_id, contact["email"], contact["id"], contact.get("updated_at") or "")
+            count += 1
+        with self._lock:
+            self.refreshes += 1
+            self._refreshed_at[audience_id] = time.monotonic()
+        return count
+
+    def lookup(self, audience_id: str, email: str) -> str:
+        """
+        Contact id of `email`, listing the audience only on an index miss.
+
+        The audience isn't listed again within `refresh_interval` of the
+        last listing; contacts added since then arrive by webhook.
+
+        Raises:
+            LookupError: The audience has no contact with that address
+        """
+        contact_id = self.get(audience_id, email)
+        with self._lock:
+            if contact_id:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if contact_id:
+            return contact_id
+
+        with self._refresh_lock:
+            # Another thread may have listed the audience while we waited
+            contact_id = self.get(audience_id, email)
+            refreshed_at = self._refreshed_at.get(audience_id)
+            if contact_id is None and (
+                refreshed_at is None or time.monotonic() - refreshed_at >= self.refresh_interval
+            ):
+                self.refresh(audience_id)
+                contact_id = self.get(audience_id, email)
+        if contact_id is None:
+            raise LookupError(f"Contact not found: {email}")
+        return contact_id
+
+    def with_contact(self, audience_id: str, email: str, call: Callable[[str], T]) -> T:
+        """
+        call(contact_id) for the contact with `email`.
+
+        An indexed id the API no longer knows (404) is dropped, and the call
+        is retried once with a freshly listed one.
+        """
+        contact_id = self.lookup(audience_id, email)
+        try:
+            return call(contact_id)
+        except ResendError as e:
+            if str(e.code) != "404":
+                raise
+        self.remove(audience_id, contact_id=contact_id)
+        with self._refresh_lock:
+            self.refresh(audience_id)
+        return call(self.lookup(audience_id, email))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes}
+
+
+_default: Optional[ContactIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_index() -> ContactIndex:
+    """
+    Process-wide index from RESEND_CONTACT_INDEX, opened on first use.
+
+    For the example scripts; the web apps create their own at startup.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ContactIndex.from_env()
+        return _default
+
+
+if __name__ == "__main__":
+    import shutil
+    import time
+
+    from fake_resend import spawn_fake_resend
+
+    server, server_url = spawn_fake_resend(latency=0.05)
+    resend.api_key = "re_demo"
+    resend.api_url = server_url
+
+    print("=== Local Email -> Contact ID Index ===\n")
+
+    audience_id = "aud_demo"
+    emails = [f"Subscriber{i}@Example.com" for i in range(200)]
+    directory = tempfile.mkdtemp()
+    index = ContactIndex(os.path.join(directory, "contacts.sqlite3"))
+    for email in emails:
+        contact = resend.Contacts.create({"audience_id": audience_id, "email": email, "unsubscribed": True})
+        index.add(audience_id, email, contact["id"])
+
+    def confirm_by_scan(email: str):
+        contacts = resend.Contacts.list(audience_id)
+        contact = next(c for c in contacts["data"] if c["email"] == email)
+        resend.Contacts.update({"audience_id": audience_id, "id": contact["id"], "unsubscribed": False})
+
+    def confirm_by_index(email: str):
+        index.with_contact(audience_id, email, lambda contact_id: resend.Contacts.update(
+            {"audience_id": audience_id, "id": contact_id, "unsubscribed": False}
+        ))
+
+    for label, confirm in [("List + scan", confirm_by_scan), ("Index lookup", confirm_by_index)]:
+        start = time.perf_counter()
+        for email in emails[:50]:
+            confirm(email)
+        print(f"{label:13} 50 confirmations in {time.perf_counter() - start:.2f}s")
+
+    # Normalized: the click's address needn't match the signup's casing
+    print(f"\nlookup('  subscriber7@EXAMPLE.com ') -> {index.lookup(audience_id, '  subscriber7@EXAMPLE.com ')}")
+
+    # contact.deleted webhook, then a new contact with the same address
+    old_id = index.get(audience_id, emails[8])
+    index.apply_event({"type": "contact.updated", "data": {
+        "id": old_id, "audience_id": audience_id, "email": "renamed8@example.com",
+        "updated_at": "2030-01-01T00:00:00Z",
+    }})
+    print(f"After contact.updated with a new address: {emails[8]} -> {index.get(audience_id, emails[8])}, "
+          f"renamed8@example.com -> {index.get(audience_id, 'renamed8@example.com')}")
+
+    old_id = index.get(audience_id, emails[7])
+    index.apply_event({"type": "contact.deleted", "data": {"id": old_id, "audience_id": audience_id}})
+    print(f"After contact.deleted: {index.get(audience_id, emails[7])}")
+
+    # Clicks from an address the audience doesn't have: one listing, not 20
+    refreshes = index.stats()["refreshes"]
+    for _ in range(20):
+        try:
+            index.lookup(audience_id, "stranger@example.com")
+        except LookupError:
+            pass
+    print(f"20 lookups of an unknown address listed the audience "
+          f"{index.stats()['refreshes'] - refreshes} time(s)")
+    print(f"Index: {index.stats()}")
+
+    server.terminate()
+    shutil.rmtree(directory)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Paginated Contact Iterator with Prefetch
+
+resend.Contacts.list(audience_id) returns one response, and code that
+treats it as "the audience" silently stops at its first page once the
+audience is paginated. Walking the pages one after the other fixes that
+but makes the caller wait for every round trip in turn.
+
+iter_contacts() yields every contact of an audience, following the
+`after` cursor lazily, while a background thread already fetches the
+next page. aiter_contacts() does the same with an asyncio task and the
+SDK's *_async methods.
+
+Key points:
+- Pages of up to 100 contacts (the API maximum), fetched only as needed:
+  stop iterating and no further pages are requested
+- At most `prefetch` pages wait in memory besides the one being
+  consumed, however large the audience
+- Transient API errors are retried (see retry.py); other errors are
+  raised from the iterator
+- Requests go through resend.default_http_client, so the apps' shared
+  rate limiter applies
+
+Usage:
+    from contact_pages import aiter_contacts, iter_contacts
+
+    for contact in iter_contacts(audience_id):
+        ...
+
+    async for contact in aiter_contacts(audience_id):
+        ...
+
+    python examples/contact_pages.py   # sequential vs prefetched paging demo
+
+See: https://resend.com/docs/api-reference/contacts/list-contacts
+"""
+
+import asyncio
+import queue
+import threading
+from typing import AsyncIterator, Iterator, List, Optional
+
+import resend
+
+from retry import call_with_retry, call_with_retry_async
+
+PAGE_SIZE = 100
+
+# Marks the end of the pages in the prefetch queue
+_DONE = object()
+
+
+def _page_params(page_size: int, after: Optional[str]) -> dict:
+    return {"limit": page_size, "after": after}
+
+
+def _next_cursor(page: dict) -> Optional[str]:
+    """`after` cursor for the page following `page`, None after the last."""
+    data = page.get("data") or []
+    return data[-1]["id"] if data and page.get("has_more") else None
+
+
+def iter_contact_pages(audience_id: str, page_size: int = PAGE_SIZE, prefetch: int = 1) -> Iterator[List[dict]]:
+    """
+    Every page of an audience's contacts, in order.
+
+    Args:
+        audience_id: Audience to list
+        page_size: Contacts per request (1-100)
+        prefetch: Pages fetched ahead on a background thread (0 = none)
+    """
+    if prefetch < 1:
+        after = None
+        while True:
+            page = call_with_retry(resend.Contacts.list, audience_id, _page_params(page_size, after))
+            yield page.get("data") or []
+            after = _next_cursor(page)
+            if after is None:
+                return
+
+    pages: "queue.Queue" = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Give up once the consumer is gone, rather than block forever
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch():
+        after = None
+        try:
+            while True:
+                page = call_with_retry(resend.Contacts.list, audience_id, _page_params(page_size, after))
+                if not put(page.get("data") or []):
+                    return
+                after = _next_cursor(page)
+                if after is None:
+                    break
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    threading.Thread(target=fetch, name="contact-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_contacts(audience_id: str, page_size: int = PAGE_SIZE, prefetch: int = 1) -> Iterator[dict]:
+    """Every contact of an audience; see iter_contact_pages()."""
+    for page in iter_contact_pages(audience_id, page_size, prefetch):
+        yield from page
+
+
+async def aiter_contact_pages(
+    audience_id: str, page_size: int = PAGE_SIZE, prefetch: int = 1
+) -> AsyncIterator[List[dict]]:
+    """Async iter_contact_pages(): prefetches with a task instead of a thread."""
+    if prefetch < 1:
+        after = None
+        while True:
+            page = await call_with_retry_async(resend.Contacts.list_async, audience_id, _page_params(page_size, after))
+            yield page.get("data") or []
+            after = _next_cursor(page)
+            if after is None:
+                return
+
+    pages: "asyncio.Queue" = asyncio.Queue(maxsize=prefetch)
+
+    async def fetch():
+        after = None
+        try:
+            while True:
+                page = await call_with_retry_async(
+                    resend.Contacts.list_async, audience_id, _page_params(page_size, after)
+                )
+                await pages.put(page.get("data") or [])
+                after = _next_cursor(page)
+                if after is None:
+                    break
+        except Exception as e:
+            await pages.put(e)
+            return
+        await pages.put(_DONE)
+
+    task = asyncio.create_task(fetch())
+    try:
+        while True:
+            item = await pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+async def aiter_contacts(audience_id: str, page_size: int = PAGE_SIZE, prefetch: int = 1) -> AsyncIterator[dict]:
+    """Every contact of an audience; see aiter_contact_pages()."""
+    async for page in aiter_contact_pages(audience_id, page_size, prefetch):
+        for contact in page:
+            yield contact
+
+
+if __name__ == "__main__":
+    import time
+
+    from fake_resend import spawn_fake_resend
+    from http_clients import PooledHTTPXClient
+
+    server, server_url = spawn_fake_resend(latency=0.05)
+    resend.api_key = "re_demo"
+    resend.api_url = server_url
+
+    print("=== Paginated Contact Iterator with Prefetch ===\n")
+
+    audience_id = "aud_demo"
+    for i in range(2000):
+        resend.Contacts.create({"audience_id": audience_id, "email": f"subscriber{i}@example.com"})
+
+    first_page = resend.Contacts.list(audience_id, {"limit": PAGE_SIZE})
+    print(f"Contacts.list, one page: {len(first_page['data'])} contacts, has_more={first_page['has_more']}\n")
+
+    # The caller spends ~40ms per page (e.g. writing it out), the API 50ms
+    def consume(prefetch: int) -> int:
+        count = 0
+        for page in iter_contact_pages(audience_id, prefetch=prefetch):
+            time.sleep(0.04)
+            count += len(page)
+        return count
+
+    for label, prefetch in [("sequential", 0), ("prefetch=1", 1)]:
+        start = time.perf_counter()
+        count = consume(prefetch)
+        print(f"{label:11} {count} contacts in {time.perf_counter() - start:.2f}s")
+
+    async def consume_async() -> int:
+        # Keep-alive pool, as in the FastAPI app: the SDK's default async
+        # client sets up a new connection (and SSL context) per request
+        resend.default_async_http_client = PooledHTTPXClient()
+        count = 0
+        try:
+            async for page in aiter_contact_pages(audience_id):
+                await asyncio.sleep(0.04)
+                count += len(page)
+        finally:
+            await resend.default_async_http_client.aclose()
+        return count
+
+    start = time.perf_counter()
+    count = asyncio.run(consume_async())
+    print(f"{'async':11} {count} contacts in {time.perf_counter() - start:.2f}s")
+    server.terminate()
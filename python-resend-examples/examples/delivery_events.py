@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local Delivery Event Store
+
+The webhook handlers used to log email.delivered and email.bounced and
+throw them away, so "what's our bounce rate this hour?" or "how long
+does delivery take?" meant querying Resend. DeliveryEventStore keeps
+the events locally, in one SQLite file, in three shapes:
+
+1. events: an append-only log of every verified event, as received,
+   kept for `retention` (default 7 days)
+2. email_state: one row per email with the time of each stage
+   (sent, delivered/bounced, opened, clicked, ...) and its furthest status
+3. rollups: per-minute counts, updated in the same transaction as 1 and 2
+
+Key points:
+- Out-of-order arrival is fine: each stage keeps its earliest timestamp,
+  and the status only ever moves forward (clicked beats delivered, even
+  if email.delivered arrives last)
+- Rollups count each stage once per email (unique opens and clicks), so
+  repeated opens or a redelivered webhook don't inflate the numbers
+- Events are keyed by svix-id, so ingesting a retry twice is harmless
+- A missing or malformed created_at falls back to the time of receipt,
+  so a bad timestamp never fails the webhook (and makes Svix retry it)
+- Only the event log is purged; email_state and rollups are small and
+  stay, so window() keeps working for older minutes
+- window() reads at most one rollup row per minute and event type,
+  however many emails were sent: "bounce rate last hour" stays cheap
+- RESEND_EVENTS_DB: database file (default: in the system temp dir)
+
+Usage:
+    from delivery_events import DeliveryEventStore
+
+    store = DeliveryEventStore.from_env()
+    store.ingest(event, svix_id)          # in the webhook handler
+    store.window(minutes=60)              # {"bounce_rate": 0.012, ...}
+
+    python examples/delivery_events.py   # out-of-order ingest demo
+
+See: https://resend.com/docs/dashboard/webhooks/event-types
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "resend-events.sqlite3")
+
+# Webhook event type -> (email_state column, status rank). A higher rank
+# means further along, so a late email.delivered never undoes a click.
+STAGES = {
+    "email.sent": ("sent_at", 1),
+    "email.delivery_delayed": ("delayed_at", 2),
+    "email.delivered": ("delivered_at", 3),
+    "email.bounced": ("bounced_at", 4),
+    "email.failed": ("failed_at", 4),
+    "email.opened": ("opened_at", 5),
+    "email.clicked": ("clicked_at", 6),
+    "email.complained": ("complained_at", 7),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    svix_id TEXT UNIQUE,
+    email_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    occurred_at REAL NOT NULL,
+    received_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS email_state (
+    email_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    status_rank INTEGER NOT NULL,
+    {stage_columns}
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    minute INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    latency_total REAL NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (minute, type)
+);
+""".format(stage_columns=",\n    ".join(f"{column} REAL" for column, _ in STAGES.values()))
+
+
+def event_time(event: dict, received_at: float) -> float:
+    """Unix time an event happened, from its created_at (or `received_at`)."""
+    # data.created_at is when the email was created, not the event
+    created_at = event.get("created_at")
+    try:
+        # "2026-01-01T12:00:00.000Z"; fromisoformat only takes "Z" from 3.11
+        return datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return received_at
+
+
+class DeliveryEventStore:
+    """
+    Append-only webhook event log with per-email state and per-minute rollups.
+
+    Args:
+        path: SQLite file (several processes may share it)
+        retention: Seconds raw events are kept (None keeps them)
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str = DEFAULT_DB, retention: Optional[float] = 7 * 24 * 3600):
+        self.path = str(path)
+        self.retention = retention
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ingested = 0
+        self._connect().executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "DeliveryEventStore":
+        return cls(os.environ.get("RESEND_EVENTS_DB", DEFAULT_DB))
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ingest(self, event: dict, svix_id: Optional[str] = None) -> bool:
+        """
+        Record a verified webhook event.
+
+        Returns:
+            False if it isn't a delivery event or was already ingested
+        """
+        event_type = event.get("type")
+        email_id = (event.get("data") or {}).get("email_id")
+        if event_type not in STAGES or not email_id:
+            return False
+        column, rank = STAGES[event_type]
+        received_at = time.time()
+        occurred_at = event_time(event, received_at)
+        minute = int(occurred_at // 60)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO events (svix_id, email_id, type, occurred_at, received_at, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (svix_id, email_id, event_type, occurred_at, received_at, json.dumps(event)),
+            ).rowcount
+            if not inserted:
+                conn.execute("COMMIT")
+                return False
+
+            row = conn.execute(
+                f"SELECT {column}, sent_at, delivered_at FROM email_state WHERE email_id = ?", (email_id,)
+            ).fetchone()
+            first_time = row is None or row[0] is None
+
+            conn.execute(
+                f"INSERT INTO email_state (email_id, status, status_rank, {column}) VALUES (?, ?, ?, ?)"
+                f" ON CONFLICT (email_id) DO UPDATE SET"
+                f" {column} = MIN(COALESCE({column}, excluded.{column}), excluded.{column}),"
+                f" status = CASE WHEN excluded.status_rank > status_rank THEN excluded.status ELSE status END,"
+                f" status_rank = MAX(status_rank, excluded.status_rank)",
+                (email_id, event_type.split(".", 1)[1], rank, occurred_at),
+            )
+
+            if first_time:
+                self._count(conn, minute, event_type)
+                # Delivery latency, whichever of sent/delivered arrives second
+                sent_at, delivered_at = (row[1], row[2]) if row else (None, None)
+                if event_type == "email.delivered" and sent_at is not None:
+                    self._latency(conn, minute, occurred_at - sent_at)
+                elif event_type == "email.sent" and delivered_at is not None:
+                    self._latency(conn, int(delivered_at // 60), delivered_at - occurred_at)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self._ingested += 1
+            purge = self.retention is not None and self._ingested % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+        return True
+
+    def purge(self, older_than: Optional[float] = None) -> int:
+        """Delete raw events received more than `older_than` seconds ago."""
+        older_than = self.retention if older_than is None else older_than
+        return self._connect().execute(
+            "DELETE FROM events WHERE received_at <= ?", (time.time() - older_than,)
+        ).rowcount
+
+    def _count(self, conn: sqlite3.Connection, minute: int, event_type: str):
+        conn.execute(
+            "INSERT INTO rollups (minute, type, count) VALUES (?, ?, 1)"
+            " ON CONFLICT (minute, type) DO UPDATE SET count = count + 1",
+            (minute, event_type),
+        )
+
+    def _latency(self, conn: sqlite3.Connection, minute: int, seconds: float):
+        # Receive-time fallbacks can put a late email.sent after its delivery
+        seconds = max(seconds, 0.0)
+        conn.execute(
+            "INSERT INTO rollups (minute, type, latency_total, latency_count) VALUES (?, 'latency', ?, 1)"
+            " ON CONFLICT (minute, type) DO UPDATE SET"
+            " latency_total = latency_total + excluded.latency_total, latency_count = latency_count + 1",
+            (minute, seconds),
+        )
+
+    def state(self, email_id: str) -> Optional[dict]:
+        """Status and stage timestamps of one email, or None if unknown."""
+        conn = self._connect()
+        cursor = conn.execute("SELECT * FROM email_state WHERE email_id = ?", (email_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return {d[0]: value for d, value in zip(cursor.description, row) if d[0] != "status_rank"}
+
+    def window(self, minutes: int = 60, now: Optional[float] = None) -> dict:
+        """Counts, bounce rate and mean delivery latency over the last `minutes`."""
+        now = time.time() if now is None else now
+        first = int(now // 60) - minutes + 1
+        rows = self._connect().execute(
+            "SELECT type, SUM(count), SUM(latency_total), SUM(latency_count)"
+            " FROM rollups WHERE minute >= ? GROUP BY type",
+            (first,),
+        ).fetchall()
+
+        counts = {event_type.split(".", 1)[1]: 0 for event_type in STAGES}
+        latency_total = latency_count = 0
+        for event_type, count, total, latencies in rows:
+            if event_type == "latency":
+                latency_total, latency_count = total, latencies
+            else:
+                counts[event_type.split(".", 1)[1]] = count
+
+        # Share of delivery outcomes that bounced; works whether or not the
+        # webhook is subscribed to email.sent
+        outcomes = counts["delivered"] + counts["bounced"]
+        return {
+            "window_minutes": minutes,
+            **counts,
+            "bounce_rate": round(counts["bounced"] / outcomes, 4) if outcomes else None,
+            "avg_delivery_seconds": round(latency_total / latency_count, 3) if latency_count else None,
+        }
+
+
+if __name__ == "__main__":
+    import random
+    import shutil
+    import timeit
+    from datetime import timezone
+
+    print("=== Local Delivery Event Store ===\n")
+
+    directory = tempfile.mkdtemp()
+    store = DeliveryEventStore(os.path.join(directory, "events.sqlite3"))
+
+    def iso(ts: float) -> str:
+        return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+    # 2,000 emails over the last 50 minutes: 3% bounce, 40% opened, 10% clicked
+    now = time.time()
+    events = []
+    for i in range(2000):
+        sent = now - random.uniform(60, 3000)
+        timeline = [("email.sent", sent)]
+        if random.random() < 0.03:
+            timeline.append(("email.bounced", sent + random.uniform(1, 20)))
+        else:
+            delivered = sent + random.uniform(0.5, 5)
+            timeline.append(("email.delivered", delivered))
+            if random.random() < 0.4:
+                timeline += [("email.opened", delivered + 30)] * random.randint(1, 3)
+            if random.random() < 0.1:
+                timeline.append(("email.clicked", delivered + 45))
+        for event_type, ts in timeline:
+            events.append({"type": event_type, "created_at": iso(ts), "data": {"email_id": f"email-{i}"}})
+
+    # Webhooks don't arrive in order; Svix also retries a few of them
+    random.shuffle(events)
+    deliveries = [(e, f"msg_{i}") for i, e in enumerate(events)]
+    deliveries += random.sample(deliveries, 200)
+
+    start = time.perf_counter()
+    ingested = sum(store.ingest(event, svix_id) for event, svix_id in deliveries)
+    elapsed = time.perf_counter() - start
+    print(f"Ingested {ingested} events ({len(deliveries) - ingested} retries ignored) "
+          f"in {elapsed:.2f}s ({elapsed / len(deliveries) * 1e6:.0f} us/event)\n")
+
+    clicked = next(e["data"]["email_id"] for e in events if e["type"] == "email.clicked")
+    print(f"State of a clicked email: {store.state(clicked)}\n")
+
+    print(f"Last hour: {store.window(60)}")
+    seconds = timeit.timeit(lambda: store.window(60), number=1000) / 1000
+    print(f"window(60) takes {seconds * 1e6:.0f} us")
+    shutil.rmtree(directory)
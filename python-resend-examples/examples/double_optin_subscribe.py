@@ -17,6 +17,11 @@ import sys
 import resend
 from dotenv import load_dotenv
 
+from contact_index import default_index
+from email_templates import render_template
+from render_pipeline import render_params
+from retry import call_with_retry, new_idempotency_key, send_with_retry
+
 load_dotenv()
 
 resend.api_key = os.environ["RESEND_API_KEY"]
@@ -42,45 +47,43 @@ def subscribe(email: str, name: str = None) -> dict:
     )
 
     # Step 1: Create contact with unsubscribed: True (pending confirmation)
-    contact = resend.Contacts.create({
+    # Transient failures (network, 429, 5xx) are retried with backoff
+    params = {
         "audience_id": audience_id,
         "email": email,
         "first_name": name,
         "unsubscribed": True,  # Will be set to False when they confirm
-    })
+    }
+    # Contacts.create isn't idempotent: an attempt that timed out may still
+    # have created the contact, so look it up before trying again
+    maybe_created = [False]
+
+    def create() -> dict:
+        if maybe_created[0]:
+            try:
+                return resend.Contacts.get(audience_id=audience_id, email=email)
+            except Exception as e:
+                if getattr(e, "code", None) not in (404, "404"):
+                    raise
+        maybe_created[0] = True
+        return resend.Contacts.create(params)
+
+    contact = call_with_retry(create)
+    # The confirmation webhook finds the contact by email through this index
+    default_index().add(audience_id, email, contact["id"])
 
     # Step 2: Send confirmation email with trackable link
-    welcome_text = f"Welcome, {name}!" if name else "Welcome!"
+    # One key per request, shared by its retries: a retry can't deliver a
+    # second confirmation, but asking again later still sends a new one
+    confirmation_key = new_idempotency_key("double-optin")
 
-    result = resend.Emails.send({
+    # render_params minifies the HTML and adds a plain-text part
+    result = send_with_retry(render_params({
         "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
         "to": [email],
         "subject": "Confirm your subscription",
-        "html": f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-          <meta charset="utf-8">
-          <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-          <div style="text-align: center; padding: 40px 20px;">
-            <h1 style="color: #333; margin-bottom: 10px;">{welcome_text}</h1>
-            <p style="color: #666; font-size: 16px; margin-bottom: 30px;">
-              Please confirm your subscription to our newsletter by clicking the button below.
-            </p>
-            <a href="{confirm_url}"
-               style="display: inline-block; padding: 14px 28px; background-color: #000; color: #fff; text-decoration: none; border-radius: 6px; font-weight: bold;">
-              Confirm Subscription
-            </a>
-            <p style="color: #999; font-size: 14px; margin-top: 30px;">
-              If you didn't request this subscription, you can safely ignore this email.
-            </p>
-          </div>
-        </body>
-        </html>
-        """,
-    })
+        "html": render_template("double_optin_confirm", {"name": name, "confirm_url": confirm_url}),
+    }), confirmation_key)
 
     return {
         "success": True,
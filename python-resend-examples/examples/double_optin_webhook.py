@@ -5,7 +5,8 @@ Double Opt-In: Webhook Handler
 Handles the email.clicked event to confirm subscriptions.
 When a user clicks the confirmation link, this webhook:
 1. Verifies the webhook signature
-2. Finds the contact by email
+2. Finds the contact id by email in the local contact index
+   (see contact_index.py), listing the audience only on a miss
 3. Updates the contact to unsubscribed: False
 
 This file provides the webhook processing logic.
@@ -18,6 +19,8 @@ import os
 import resend
 from dotenv import load_dotenv
 
+from contact_index import default_index
+
 load_dotenv()
 
 resend.api_key = os.environ["RESEND_API_KEY"]
@@ -52,31 +55,29 @@ def process_double_optin_webhook(event: dict) -> dict:
 
     print(f"Confirmation click received for: {recipient_email}")
 
-    # Find the contact by email
-    contacts = resend.Contacts.list(audience_id)
-    contact = next(
-        (c for c in contacts.get("data", []) if c["email"] == recipient_email),
-        None,
-    )
-
-    if not contact:
-        raise ValueError(f"Contact not found: {recipient_email}")
+    def confirm(contact_id: str) -> str:
+        # Update contact to confirmed (unsubscribed: False)
+        resend.Contacts.update({
+            "audience_id": audience_id,
+            "id": contact_id,
+            "unsubscribed": False,
+        })
+        return contact_id
 
-    # Update contact to confirmed (unsubscribed: False)
-    resend.Contacts.update({
-        "audience_id": audience_id,
-        "id": contact["id"],
-        "unsubscribed": False,
-    })
+    # Find the contact by email: one local lookup, no Contacts.list
+    try:
+        contact_id = default_index().with_contact(audience_id, recipient_email, confirm)
+    except LookupError:
+        raise ValueError(f"Contact not found: {recipient_email}") from None
 
-    print(f"Contact confirmed: {recipient_email} ({contact['id']})")
+    print(f"Contact confirmed: {recipient_email} ({contact_id})")
 
     return {
         "received": True,
         "type": event["type"],
         "confirmed": True,
         "email": recipient_email,
-        "contact_id": contact["id"],
+        "contact_id": contact_id,
     }
 
 
@@ -87,29 +88,23 @@ if __name__ == "__main__":
 
     print("Example Flask integration:")
     print("""
-import json
 from flask import Flask, request, jsonify
 from double_optin_webhook import process_double_optin_webhook
+from webhook_verifier import WebhookVerifier
 
 app = Flask(__name__)
 
+# Decodes RESEND_WEBHOOK_SECRET once (comma-separate several to rotate)
+verifier = WebhookVerifier.from_env()
+
 @app.route("/double-optin/webhook", methods=["POST"])
 def double_optin_webhook():
     payload = request.get_data(as_text=True)
 
-    # Verify webhook signature
-    resend.Webhooks.verify({
-        "payload": payload,
-        "headers": {
-            "id": request.headers.get("svix-id"),
-            "timestamp": request.headers.get("svix-timestamp"),
-            "signature": request.headers.get("svix-signature"),
-        },
-        "webhook_secret": os.environ["RESEND_WEBHOOK_SECRET"],
-    })
+    # Verify webhook signature; returns the parsed event
+    event = verifier.verify(payload, request.headers)
 
     # Process the event
-    event = json.loads(payload)
     result = process_double_optin_webhook(event)
     return jsonify(result)
     """)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Precompiled HTML Email Templates
+
+A tiny template engine for the emails the examples send themselves (the
+double opt-in confirmation). Templates live in examples/templates/ and
+are parsed once and compiled into a plain Python function, so rendering
+is a handful of string appends per email. Every value is HTML-escaped
+unless you explicitly opt out, so a subscriber named
+`<script>...` can't inject markup.
+
+Syntax:
+    {{ name }}                      escaped value ("" if missing)
+    {{ body|safe }}                 value inserted as-is
+    {% if name %}...{% else %}...{% endif %}
+
+Key points:
+- Compiled templates are kept in an LRU keyed by (template, locale)
+- `double_optin_confirm.de.html` is used for locale "de" when it exists,
+  otherwise the default `double_optin_confirm.html`
+- preload() compiles every template at startup so no request pays for it
+
+Usage:
+    from email_templates import render_template
+
+    html = render_template("double_optin_confirm", {"name": name, "confirm_url": url})
+
+    python examples/email_templates.py   # benchmark vs the f-string version
+
+See: https://resend.com/docs/api-reference/emails/send-email
+"""
+
+import html
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+TOKEN_RE = re.compile(r"{{\s*(\w+)(\|safe)?\s*}}|{%\s*(if\s+\w+|else|endif)\s*%}")
+
+
+class TemplateSyntaxError(ValueError):
+    """A template that can't be compiled."""
+
+
+def _escape(value) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def compile_template(source: str, name: str = "<template>") -> Callable[[dict], str]:
+    """Compile template source into a render(context) function."""
+    lines = ["def render(_ctx):", "    _out = []", "    _append = _out.append"]
+    depth = 1
+    blocks = []
+    pos = 0
+
+    def emit(code: str):
+        lines.append("    " * depth + code)
+
+    for match in TOKEN_RE.finditer(source):
+        if match.start() > pos:
+            emit(f"_append({source[pos:match.start()]!r})")
+        pos = match.end()
+
+        variable, safe, tag = match.groups()
+        if variable:
+            value = f"_ctx.get({variable!r}, '')"
+            emit(f"_append(str({value}))" if safe else f"_append(_escape({value}))")
+        elif tag.startswith("if"):
+            emit(f"if _ctx.get({tag.split()[1]!r}):")
+            blocks.append("if")
+            depth += 1
+            emit("pass")
+        elif tag == "else":
+            if not blocks or blocks[-1] != "if":
+                raise TemplateSyntaxError(f"{name}: unexpected {{% else %}}")
+            blocks[-1] = "else"
+            depth -= 1
+            emit("else:")
+            depth += 1
+            emit("pass")
+        else:
+            if not blocks:
+                raise TemplateSyntaxError(f"{name}: unexpected {{% endif %}}")
+            blocks.pop()
+            depth -= 1
+
+    if blocks:
+        raise TemplateSyntaxError(f"{name}: missing {{% endif %}}")
+    if pos < len(source):
+        emit(f"_append({source[pos:]!r})")
+    emit("return ''.join(_out)")
+
+    namespace = {"_escape": _escape}
+    exec(compile("\n".join(lines), name, "exec"), namespace)
+    return namespace["render"]
+
+
+@lru_cache(maxsize=128)
+def get_template(name: str, locale: Optional[str] = None) -> Callable[[dict], str]:
+    """Compiled template for `name`, preferring the `locale` variant."""
+    candidates = [f"{name}.{locale}.html"] if locale else []
+    for filename in candidates + [f"{name}.html"]:
+        path = TEMPLATE_DIR / filename
+        if path.exists():
+            return compile_template(path.read_text(encoding="utf-8"), filename)
+    raise FileNotFoundError(f"No template {name!r} in {TEMPLATE_DIR}")
+
+
+def render_template(name: str, context: dict, locale: Optional[str] = None) -> str:
+    """Render a template from examples/templates/ with escaped values."""
+    return get_template(name, locale)(context)
+
+
+def preload():
+    """Compile every default template now instead of on first use."""
+    for path in TEMPLATE_DIR.glob("*.html"):
+        name, _, locale = path.stem.partition(".")
+        get_template(name, locale or None)
+
+
+if __name__ == "__main__":
+    import timeit
+
+    print("=== Precompiled HTML Email Templates ===\n")
+
+    def fstring(name, confirm_url):
+        welcome_text = f"Welcome, {name}!" if name else "Welcome!"
+        return f"""
+        <div style="font-family: Arial, sans-serif; text-align: center; padding: 40px;">
+          <h1>{welcome_text}</h1>
+          <p>Please confirm your subscription to our newsletter.</p>
+          <a href="{confirm_url}"
+             style="display: inline-block; padding: 14px 28px; background-color: #000; color: #fff; text-decoration: none; border-radius: 6px;">
+            Confirm Subscription
+          </a>
+        </div>
+        """
+
+    context = {"name": "Ada <script>alert(1)</script>", "confirm_url": "https://example.com/confirmed?a=1&b=2"}
+    number = 100_000
+
+    compile_time = timeit.timeit(
+        lambda: compile_template((TEMPLATE_DIR / "double_optin_confirm.html").read_text()), number=100
+    ) / 100
+    print(f"Compile once:         {compile_time * 1e6:8.1f} us")
+
+    for label, render in [
+        ("f-string (unescaped)", lambda: fstring(**context)),
+        ("f-string + escape", lambda: fstring(_escape(context["name"]), _escape(context["confirm_url"]))),
+        ("compiled template", lambda: render_template("double_optin_confirm", context)),
+    ]:
+        seconds = timeit.timeit(render, number=number)
+        print(f"{label:21} {seconds / number * 1e6:8.2f} us/render")
+
+    print("\n" + render_template("double_optin_confirm", context).split("<h1")[1].split("</h1>")[0])
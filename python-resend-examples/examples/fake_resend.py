@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Fake Resend API Server
+
+A small local stand-in for https://api.resend.com used by the benchmarks
+and demos in this directory. Every request is answered after an artificial
+delay so you can see how an app behaves when Resend is slow, without
+sending real email or spending your rate limit.
+
+Point the Python SDK at it with RESEND_API_URL.
+
+It can also misbehave on purpose: enforce a per-second rate limit, or
+accept an email (or create a contact) and then drop the connection before
+answering, which is what makes naive retries send duplicates. Like the real API, a repeated
+Idempotency-Key gets the original response instead of a second email,
+and one invalid email (no "@", the reserved .invalid TLD, attachments or
+scheduled_at in a batch) makes the whole batch fail with 422.
+
+Usage:
+    python examples/fake_resend.py --port 8787 --latency 50
+
+    # Then in another terminal:
+    RESEND_API_URL=http://127.0.0.1:8787 python examples/basic_send.py
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class FakeResendServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fake API's state."""
+
+    daemon_threads = True
+    # The default backlog of 5 drops connections under benchmark load
+    request_queue_size = 1024
+
+    def __init__(self, address, latency: float = 0.0, rate_limit: int = 0, drop_rate: float = 0.0):
+        super().__init__(address, FakeResendHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.drop_rate = drop_rate
+        self.lock = threading.RLock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.dropped = 0
+        self.idempotent = {}
+        self._window = (0, 0)
+        self.emails = []
+        self.contacts = {}
+        # One sample template, served by GET /templates/tmpl_welcome
+        self.templates = {
+            "tmpl_welcome": {
+                "object": "template",
+                "id": "tmpl_welcome",
+                "name": "Welcome",
+                "html": "<p>Hi {{{NAME}}}, from {{{COMPANY}}}: {{{ORDER_TOTAL}}}</p>",
+                "variables": [
+                    {"key": "NAME", "type": "string"},
+                    {"key": "COMPANY", "type": "string", "fallback_value": "Acme"},
+                    {"key": "ORDER_TOTAL", "type": "number"},
+                ],
+            }
+        }
+
+    def over_rate_limit(self) -> bool:
+        """Fixed one-second window, like the real API's per-second limit."""
+        if not self.rate_limit:
+            return False
+        second = int(time.time())
+        window, count = self._window
+        count = count + 1 if window == second else 1
+        self._window = (second, count)
+        if count > self.rate_limit:
+            self.rate_limited += 1
+            return True
+        return False
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    """Implements the handful of endpoints the examples use."""
+
+    # Keep-alive, like the real API
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid the delayed-ACK stall
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        with self.server.lock:
+            self.server.requests += 1
+            limited = self.server.over_rate_limit()
+
+        if limited:
+            return self._reply(
+                429,
+                _error(429, "rate_limit_exceeded", "Too many requests"),
+                {"retry-after": "1", "ratelimit-limit": str(self.server.rate_limit)},
+            )
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+
+        if method == "POST" and parts in (["emails"], ["emails", "batch"]):
+            return self._send(body, batch=len(parts) == 2)
+
+        if method == "GET" and len(parts) == 2 and parts[0] == "templates":
+            template = self.server.templates.get(parts[1])
+            if template is None:
+                return self._reply(404, _error(404, "not_found", "Template not found"))
+            return self._reply(200, template)
+
+        if method == "GET" and len(parts) == 3 and parts[:2] == ["emails", "receiving"]:
+            # Any id is a received email, so inbound webhooks can be replayed
+            return self._reply(200, {
+                "object": "email",
+                "id": parts[2],
+                "from": "Sender <sender@example.com>",
+                "to": ["inbox@resend.dev"],
+                "subject": "Hello",
+                "text": "Hi there, this is an inbound email.",
+                "html": "<p>Hi there, this is an inbound email.</p>",
+            })
+
+        if len(parts) == 3 and parts[0] == "audiences" and parts[2] == "contacts":
+            with self.server.lock:
+                contacts = self.server.contacts.setdefault(parts[1], {})
+            if method == "POST":
+                contact = dict(body, id=str(uuid.uuid4()), object="contact")
+                with self.server.lock:
+                    contacts[contact["id"]] = contact
+                if self._drop():
+                    return
+                return self._reply(201, {"object": "contact", "id": contact["id"]})
+            if method == "GET":
+                return self._reply(200, self._contact_page(list(contacts.values())))
+
+        if len(parts) == 4 and parts[0] == "audiences" and method == "GET":
+            # By id or by email, like the real API
+            wanted = unquote(parts[3])
+            with self.server.lock:
+                contacts = list(self.server.contacts.get(parts[1], {}).values())
+            for contact in contacts:
+                if wanted in (contact["id"], contact.get("email")):
+                    return self._reply(200, contact)
+            return self._reply(404, _error(404, "not_found", "Contact not found"))
+
+        if len(parts) == 4 and parts[0] == "audiences" and method == "PATCH":
+            contact = self.server.contacts.get(parts[1], {}).get(parts[3])
+            if contact is None:
+                return self._reply(404, _error(404, "not_found", "Contact not found"))
+            contact.update(body)
+            return self._reply(200, {"object": "contact", "id": contact["id"]})
+
+        if len(parts) == 4 and parts[0] == "audiences" and method == "DELETE":
+            with self.server.lock:
+                contact = self.server.contacts.get(parts[1], {}).pop(parts[3], None)
+            if contact is None:
+                return self._reply(404, _error(404, "not_found", "Contact not found"))
+            return self._reply(200, {"object": "contact", "contact": contact["id"], "deleted": True})
+
+        self._reply(404, _error(404, "not_found", f"No route for {method} {self.path}"))
+
+    def _contact_page(self, contacts: list) -> dict:
+        """?limit=&after= cursor pagination; without a limit, every contact."""
+        query = parse_qs(urlsplit(self.path).query)
+        if "limit" not in query:
+            return {"object": "list", "has_more": False, "data": contacts}
+        limit = max(1, min(100, int(query["limit"][0])))
+        start = 0
+        if "after" in query:
+            ids = [c["id"] for c in contacts]
+            start = ids.index(query["after"][0]) + 1 if query["after"][0] in ids else len(ids)
+        page = contacts[start:start + limit]
+        return {"object": "list", "has_more": start + limit < len(contacts), "data": page}
+
+    def _send(self, body, batch: bool):
+        key = self.headers.get("Idempotency-Key")
+
+        for email in body if batch else [body]:
+            problem = _invalid(email, batch)
+            if problem:
+                return self._reply(422, _error(422, "validation_error", problem))
+
+        with self.server.lock:
+            response = self.server.idempotent.get(key) if key else None
+            if response is None:
+                if batch:
+                    response = {"data": [self._accept_email(e) for e in body]}
+                else:
+                    response = self._accept_email(body)
+                if key:
+                    self.server.idempotent[key] = response
+
+        if self._drop():
+            return
+        self._reply(200, response)
+
+    def _drop(self) -> bool:
+        """Maybe close the connection instead of answering (see drop_rate)."""
+        with self.server.lock:
+            dropped = random.random() < self.server.drop_rate
+            self.server.dropped += dropped
+        if dropped:
+            # Accepted, but the client never hears back
+            self.close_connection = True
+        return dropped
+
+    def _accept_email(self, email: dict) -> dict:
+        email_id = str(uuid.uuid4())
+        with self.server.lock:
+            self.server.emails.append(dict(email, id=email_id))
+        return {"id": email_id}
+
+    def _reply(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _error(status: int, name: str, message: str) -> dict:
+    return {"statusCode": status, "name": name, "message": message}
+
+
+def _invalid(email: dict, batch: bool):
+    to = email.get("to")
+    for address in [to] if isinstance(to, str) else to or []:
+        if "@" not in address or address.rstrip(">").endswith(".invalid"):
+            return f"Invalid `to` field: {address}"
+    if batch and (email.get("attachments") or email.get("scheduled_at")):
+        return "Attachments and scheduled_at are not supported in batch emails"
+    return None
+
+
+def start_fake_resend(
+    port: int = 0, latency: float = 0.0, rate_limit: int = 0, drop_rate: float = 0.0
+) -> FakeResendServer:
+    """
+    Start the fake API on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        latency: Seconds to wait before answering each request
+        rate_limit: Requests/second before answering 429 (0 = unlimited)
+        drop_rate: Share of sends accepted without ever answering (0-1)
+
+    Returns:
+        The running server; use server.url as RESEND_API_URL
+    """
+    server = FakeResendServer(
+        ("127.0.0.1", port), latency=latency, rate_limit=rate_limit, drop_rate=drop_rate
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def spawn_fake_resend(latency: float = 0.0, rate_limit: int = 0, drop_rate: float = 0.0):
+    """
+    Start the fake API in a child process.
+
+    Benchmarks should prefer this over start_fake_resend so the server's
+    threads don't compete with the code being measured for the GIL.
+
+    Args:
+        latency: Seconds to wait before answering each request
+        rate_limit: Requests/second before answering 429 (0 = unlimited)
+        drop_rate: Share of sends accepted without ever answering (0-1)
+
+    Returns:
+        (process, url) tuple; call process.terminate() when done
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable, __file__,
+            "--port", "0",
+            "--latency", str(latency * 1000),
+            "--rate-limit", str(rate_limit),
+            "--drop-rate", str(drop_rate),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    for line in process.stdout:
+        if line.startswith("Use: RESEND_API_URL="):
+            return process, line.split("=", 1)[1].strip()
+    raise RuntimeError("Fake Resend API failed to start")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Resend API locally")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=50, help="milliseconds per request")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests/second (0 = unlimited)")
+    parser.add_argument("--drop-rate", type=float, default=0, help="share of sends to drop (0-1)")
+    args = parser.parse_args()
+
+    server = FakeResendServer(
+        ("127.0.0.1", args.port),
+        latency=args.latency / 1000,
+        rate_limit=args.rate_limit,
+        drop_rate=args.drop_rate,
+    )
+    print(f"Fake Resend API listening on {server.url} ({args.latency:g}ms latency)")
+    print(f"Use: RESEND_API_URL={server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServed {server.requests} request(s), accepted {len(server.emails)} email(s), "
+              f"rate limited {server.rate_limited}, dropped {server.dropped}")
@@ -4,31 +4,94 @@ FastAPI Application with Resend
 Demonstrates integrating Resend with a FastAPI web application.
 
 Usage:
-    uvicorn examples.fastapi_app:app --reload
+    python examples/fastapi_app.py
+    # or: uvicorn fastapi_app:app --app-dir examples --reload
 
 Then visit:
     - POST http://localhost:8000/send
+    - POST http://localhost:8000/send-cid
     - POST http://localhost:8000/webhook
     - GET http://localhost:8000/docs (OpenAPI docs)
 """
 
-import json
 import logging
 import os
+from contextlib import asynccontextmanager
+
 import resend
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
 from dotenv import load_dotenv
 
+from asset_registry import asset_registry
+from batch_coalescer import AsyncBatchCoalescer
+from contact_export import EXPORT_FORMATS, aexport_contacts
+from contact_index import ContactIndex
+from delivery_events import DeliveryEventStore
+from email_templates import preload, render_template
+from http_clients import PooledHTTPXClient
+from rate_limiter import RateLimitedAsyncHTTPClient, RateLimitedHTTPClient, RateLimiter
+from render_pipeline import render_params
+from retry import send_with_retry_async
+from webhook_dedup import DeliveryInProgress, WebhookDeduplicator
+from webhook_inbox import WebhookInbox, confirm_subscription, fetch_inbound_email
+from webhook_verifier import WebhookPayloadTooLarge, WebhookVerifier
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 resend.api_key = os.environ["RESEND_API_KEY"]
 
+# Handlers use the SDK's *_async methods so a Resend round trip never blocks
+# the event loop; one keep-alive pool is shared by every request, and every
+# call waits for a token bucket shared by all worker processes
+rate_limiter = RateLimiter.from_env()
+resend.default_async_http_client = RateLimitedAsyncHTTPClient(rate_limiter, PooledHTTPXClient())
+# Blocking SDK calls (webhook workers) share the same token bucket
+resend.default_http_client = RateLimitedHTTPClient(rate_limiter)
+
+# Opt-in: merge concurrent /send calls into Batch.send requests
+coalesce_ms = float(os.environ.get("RESEND_COALESCE_MS", "0"))
+coalescer = AsyncBatchCoalescer(window=coalesce_ms / 1000) if coalesce_ms else None
+
+# Compile the email templates now rather than on the first request
+preload()
+
+# Signing secrets are decoded once; several can be active during a rotation
+webhook_verifier = WebhookVerifier.from_env()
+
+# svix-ids already handled, so Svix retries are answered without new work
+webhook_dedup = WebhookDeduplicator.from_env()
+
+# Delivery events with per-email state and per-minute rollups
+delivery_events = DeliveryEventStore.from_env()
+
+# Email -> contact id, so double opt-in clicks don't list the audience
+contact_index = ContactIndex.from_env()
+
+# Webhooks are answered as soon as the event is queued; worker threads do
+# the follow-up API calls in the background
+webhook_inbox = WebhookInbox.from_env({
+    "email.received": fetch_inbound_email,
+    "email.clicked": lambda event: confirm_subscription(event, os.environ.get("RESEND_AUDIENCE_ID"), contact_index),
+})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    webhook_inbox.start()
+    yield
+    webhook_inbox.stop(timeout=5)
+    await resend.default_async_http_client.aclose()
+
+
 app = FastAPI(
     title="Resend FastAPI Examples",
     description="Email sending with Resend and FastAPI",
+    lifespan=lifespan,
 )
 
 
@@ -46,15 +109,24 @@ class EmailResponse(BaseModel):
 
 
 @app.post("/send", response_model=EmailResponse)
-async def send_email(email_request: EmailRequest):
+async def send_email(
+    email_request: EmailRequest,
+    idempotency_key: str | None = Header(default=None),
+):
     """Send an email."""
+    params = {
+        "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
+        "to": [email_request.to],
+        "subject": email_request.subject,
+        "html": f"<p>{email_request.message}</p>",
+    }
+
     try:
-        result = resend.Emails.send({
-            "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
-            "to": [email_request.to],
-            "subject": email_request.subject,
-            "html": f"<p>{email_request.message}</p>",
-        })
+        if coalescer:
+            result = await coalescer.send(params)
+        else:
+            # Retries reuse one idempotency key, so they never send twice
+            result = await send_with_retry_async(params, idempotency_key)
 
         return EmailResponse(success=True, id=result["id"])
 
@@ -63,12 +135,34 @@ async def send_email(email_request: EmailRequest):
         raise HTTPException(status_code=500, detail="Failed to send email")
 
 
+class CidEmailRequest(BaseModel):
+    """Request body for sending an email with an inline image."""
+    to: EmailStr
+
+
+@app.post("/send-cid", response_model=EmailResponse)
+async def send_cid(email_request: CidEmailRequest):
+    """Send an email with an inline logo from the asset registry."""
+    # asset:logo becomes cid:logo plus the logo attachment, encoded at startup
+    params = asset_registry.inline_params({
+        "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
+        "to": [email_request.to],
+        "subject": "Email with Inline Image - Resend Example",
+        "html": '<div style="text-align:center;padding:20px;"><img src="asset:logo" alt="Logo" width="100" height="100" /><h1>Inline Image Example</h1><p>The image above is embedded using CID.</p></div>',
+    })
+
+    try:
+        result = await resend.Emails.send_async(params)
+        return EmailResponse(success=True, id=result["id"])
+
+    except Exception:
+        logger.exception("Error sending CID email")
+        raise HTTPException(status_code=500, detail="Failed to send email")
+
+
 @app.post("/webhook")
 async def handle_webhook(request: Request):
     """Handle Resend webhook events."""
-    payload = await request.body()
-    payload_str = payload.decode()
-
     svix_id = request.headers.get("svix-id")
     svix_timestamp = request.headers.get("svix-timestamp")
     svix_signature = request.headers.get("svix-signature")
@@ -76,32 +170,76 @@ async def handle_webhook(request: Request):
     if not all([svix_id, svix_timestamp, svix_signature]):
         raise HTTPException(status_code=400, detail="Missing webhook headers")
 
-    webhook_secret = os.environ.get("RESEND_WEBHOOK_SECRET")
-    if not webhook_secret:
+    if not webhook_verifier.configured:
         raise HTTPException(status_code=500, detail="Webhook secret not configured")
 
     try:
-        resend.Webhooks.verify({
-            "payload": payload_str,
-            "headers": {
-                "id": svix_id,
-                "timestamp": svix_timestamp,
-                "signature": svix_signature,
-            },
-            "webhook_secret": webhook_secret,
-        })
-
-        event = json.loads(payload_str)
+        # Verify the signature while the body is received, chunk by chunk
+        event = await webhook_verifier.averify_stream(request.stream(), request.headers)
         event_type = event.get("type")
-        print(f"Received webhook event: {event_type}")
+
+        # SQLite writes (and a queue that may be full) block, so they run
+        # in the threadpool rather than on the event loop
+        if not await run_in_threadpool(record_webhook_event, event, svix_id):
+            return {"received": True, "type": event_type, "duplicate": True}
 
         return {"received": True, "type": event_type}
 
+    except DeliveryInProgress:
+        # Not a 2xx, so Svix delivers it again once the first one is done
+        raise HTTPException(status_code=409, detail="Delivery already being processed")
+
+    except WebhookPayloadTooLarge:
+        raise HTTPException(status_code=413, detail="Webhook payload too large")
+
     except Exception:
         logger.exception("Error processing webhook")
         raise HTTPException(status_code=400, detail="Failed to process webhook")
 
 
+def record_webhook_event(event: dict, svix_id: str) -> bool:
+    """Store and queue a verified event once; False for a repeated svix-id."""
+    with webhook_dedup.claim(svix_id) as first:
+        if not first:
+            return False
+
+        print(f"Received webhook event: {event.get('type')}")
+        delivery_events.ingest(event, svix_id)
+        # contact.created/updated/deleted keep the email -> id index current
+        contact_index.apply_event(event)
+        # email.received: a worker fetches the content after we answer.
+        # Clicks are only confirmed through /double-optin/webhook; any
+        # other link click must not resubscribe its recipient.
+        if event.get("type") == "email.received":
+            webhook_inbox.accept(event, svix_id)
+    return True
+
+
+@app.get("/stats/deliveries")
+async def delivery_stats(minutes: int = Query(60, ge=1, le=7 * 24 * 60)):
+    """Counts and bounce rate over the last `minutes`, from per-minute rollups."""
+    return await run_in_threadpool(delivery_events.window, minutes)
+
+
+@app.get("/audiences/contacts/export")
+async def contacts_export(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """Stream every contact in the audience as NDJSON or CSV, page by page."""
+    audience_id = os.environ.get("RESEND_AUDIENCE_ID")
+    if not audience_id:
+        raise HTTPException(status_code=400, detail="RESEND_AUDIENCE_ID not configured")
+
+    try:
+        # Only the first page is fetched before the response starts
+        chunks = await aexport_contacts(audience_id, format)
+    except Exception:
+        logger.exception("Error exporting contacts")
+        raise HTTPException(status_code=500, detail="Failed to export contacts")
+
+    return StreamingResponse(chunks, media_type=EXPORT_FORMATS[format], headers={
+        "Content-Disposition": f'attachment; filename="contacts.{format}"',
+    })
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint."""
@@ -132,34 +270,22 @@ async def double_optin_subscribe(subscribe_request: SubscribeRequest):
 
     try:
         # Step 1: Create contact with unsubscribed: True
-        contact = resend.Contacts.create({
+        contact = await resend.Contacts.create_async({
             "audience_id": audience_id,
             "email": subscribe_request.email,
             "first_name": subscribe_request.name,
             "unsubscribed": True,
         })
+        # So the confirmation click finds the contact without listing the audience
+        await run_in_threadpool(contact_index.add, audience_id, subscribe_request.email, contact["id"])
 
-        # Step 2: Send confirmation email
-        welcome_text = f"Welcome, {subscribe_request.name}!" if subscribe_request.name else "Welcome!"
-
-        result = resend.Emails.send({
+        # Step 2: Send confirmation email (minified, with a plain-text part)
+        result = await resend.Emails.send_async(render_params({
             "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
             "to": [subscribe_request.email],
             "subject": "Confirm your subscription",
-            "html": f"""
-            <div style="font-family: Arial, sans-serif; text-align: center; padding: 40px;">
-              <h1>{welcome_text}</h1>
-              <p>Please confirm your subscription to our newsletter.</p>
-              <a href="{confirm_url}"
-                 style="display: inline-block; padding: 14px 28px; background-color: #000; color: #fff; text-decoration: none; border-radius: 6px;">
-                Confirm Subscription
-              </a>
-              <p style="color: #999; margin-top: 20px;">
-                If you didn't request this, ignore this email.
-              </p>
-            </div>
-            """,
-        })
+            "html": render_template("double_optin_confirm", {"name": subscribe_request.name, "confirm_url": confirm_url}),
+        }))
 
         return {
             "success": True,
@@ -177,7 +303,6 @@ async def double_optin_subscribe(subscribe_request: SubscribeRequest):
 async def double_optin_webhook(request: Request):
     """Handle double opt-in confirmation webhook."""
     payload = await request.body()
-    payload_str = payload.decode()
 
     svix_id = request.headers.get("svix-id")
     svix_timestamp = request.headers.get("svix-timestamp")
@@ -186,22 +311,11 @@ async def double_optin_webhook(request: Request):
     if not all([svix_id, svix_timestamp, svix_signature]):
         raise HTTPException(status_code=400, detail="Missing webhook headers")
 
-    webhook_secret = os.environ.get("RESEND_WEBHOOK_SECRET")
-    if not webhook_secret:
+    if not webhook_verifier.configured:
         raise HTTPException(status_code=500, detail="Webhook secret not configured")
 
     try:
-        resend.Webhooks.verify({
-            "payload": payload_str,
-            "headers": {
-                "id": svix_id,
-                "timestamp": svix_timestamp,
-                "signature": svix_signature,
-            },
-            "webhook_secret": webhook_secret,
-        })
-
-        event = json.loads(payload_str)
+        event = webhook_verifier.verify(payload, request.headers)
 
         # Only process email.clicked events
         if event.get("type") != "email.clicked":
@@ -211,42 +325,44 @@ async def double_optin_webhook(request: Request):
                 "message": "Event ignored",
             }
 
-        audience_id = os.environ.get("RESEND_AUDIENCE_ID")
         recipient_email = event.get("data", {}).get("to", [None])[0]
 
         if not recipient_email:
             raise HTTPException(status_code=400, detail="No recipient email")
 
-        # Find contact by email
-        contacts = resend.Contacts.list(audience_id)
-        contact = next(
-            (c for c in contacts.get("data", []) if c["email"] == recipient_email),
-            None,
-        )
-
-        if not contact:
-            raise HTTPException(status_code=404, detail="Contact not found")
-
-        # Update contact to confirmed
-        resend.Contacts.update({
-            "audience_id": audience_id,
-            "id": contact["id"],
-            "unsubscribed": False,
-        })
-
-        safe_email = recipient_email.replace("\r", "").replace("\n", "")
-        logger.info(f"Contact confirmed: {safe_email}")
+        # A worker finds the contact and marks it confirmed after we answer.
+        # A retried delivery was queued the first time.
+        first = await run_in_threadpool(queue_confirmation, event, svix_id)
 
         return {
             "received": True,
             "type": event["type"],
-            "confirmed": True,
+            "queued": True,
+            "duplicate": not first,
             "email": recipient_email,
-            "contact_id": contact["id"],
         }
 
     except HTTPException:
         raise
+    except DeliveryInProgress:
+        # Not a 2xx, so Svix delivers it again once the first one is done
+        raise HTTPException(status_code=409, detail="Delivery already being processed")
+
     except Exception:
         logger.exception("Error processing double opt-in webhook")
         raise HTTPException(status_code=400, detail="Failed to process webhook")
+
+
+def queue_confirmation(event: dict, svix_id: str) -> bool:
+    """Queue a confirmation click once; False for a repeated svix-id."""
+    # Blocking (SQLite insert, queue put), so called through the threadpool
+    with webhook_dedup.claim(f"double-optin/{svix_id}") as first:
+        if first:
+            webhook_inbox.accept(event, svix_id)
+    return first
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, port=8000)
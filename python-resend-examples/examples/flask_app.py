@@ -8,22 +8,63 @@ Usage:
 
 Then visit:
     - POST http://localhost:5000/send
+    - POST http://localhost:5000/send-cid
     - POST http://localhost:5000/webhook
 """
 
-import json
-import json
 import logging
 import os
 import resend
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from dotenv import load_dotenv
 
+from asset_registry import asset_registry
+from batch_coalescer import BatchCoalescer
+from contact_export import EXPORT_FORMATS, export_contacts
+from contact_index import ContactIndex
+from delivery_events import DeliveryEventStore
+from email_templates import preload, render_template
+from rate_limiter import RateLimitedHTTPClient, RateLimiter
+from render_pipeline import render_params
+from retry import send_with_retry
+from webhook_dedup import DeliveryInProgress, WebhookDeduplicator
+from webhook_inbox import WebhookInbox, confirm_subscription, fetch_inbound_email
+from webhook_verifier import WebhookPayloadTooLarge, WebhookVerifier, read_chunks
+
 load_dotenv()
 resend.api_key = os.environ["RESEND_API_KEY"]
 
+# Every SDK call waits for a token bucket shared by all worker processes
+resend.default_http_client = RateLimitedHTTPClient(RateLimiter.from_env())
+
 app = Flask(__name__)
 
+# Opt-in: merge concurrent /send calls into Batch.send requests
+coalesce_ms = float(os.environ.get("RESEND_COALESCE_MS", "0"))
+coalescer = BatchCoalescer(window=coalesce_ms / 1000) if coalesce_ms else None
+
+# Compile the email templates now rather than on the first request
+preload()
+
+# Signing secrets are decoded once; several can be active during a rotation
+webhook_verifier = WebhookVerifier.from_env()
+
+# svix-ids already handled, so Svix retries are answered without new work
+webhook_dedup = WebhookDeduplicator.from_env()
+
+# Delivery events with per-email state and per-minute rollups
+delivery_events = DeliveryEventStore.from_env()
+
+# Email -> contact id, so double opt-in clicks don't list the audience
+contact_index = ContactIndex.from_env()
+
+# Webhooks are answered as soon as the event is queued; these workers do the
+# follow-up API calls in the background
+webhook_inbox = WebhookInbox.from_env({
+    "email.received": fetch_inbound_email,
+    "email.clicked": lambda event: confirm_subscription(event, os.environ.get("RESEND_AUDIENCE_ID"), contact_index),
+}).start()
+
 
 @app.route("/send", methods=["POST"])
 def send_email():
@@ -40,13 +81,19 @@ def send_email():
     if not all([to, subject, message]):
         return jsonify({"error": "Missing required fields: to, subject, message"}), 400
 
+    params = {
+        "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
+        "to": [to],
+        "subject": subject,
+        "html": f"<p>{message}</p>",
+    }
+
     try:
-        result = resend.Emails.send({
-            "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
-            "to": [to],
-            "subject": subject,
-            "html": f"<p>{message}</p>",
-        })
+        if coalescer:
+            result = coalescer.send(params)
+        else:
+            # Retries reuse one idempotency key, so they never send twice
+            result = send_with_retry(params, request.headers.get("Idempotency-Key"))
 
         return jsonify({
             "success": True,
@@ -58,11 +105,33 @@ def send_email():
         return jsonify({"error": "Failed to send email"}), 500
 
 
+@app.route("/send-cid", methods=["POST"])
+def send_cid():
+    """Send an email with an inline logo from the asset registry."""
+    data = request.get_json()
+
+    if not data or not data.get("to"):
+        return jsonify({"error": "Missing required field: to"}), 400
+
+    try:
+        # asset:logo becomes cid:logo plus the logo attachment, encoded at startup
+        result = resend.Emails.send(asset_registry.inline_params({
+            "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
+            "to": [data["to"]],
+            "subject": "Email with Inline Image - Resend Example",
+            "html": '<div style="text-align:center;padding:20px;"><img src="asset:logo" alt="Logo" width="100" height="100" /><h1>Inline Image Example</h1><p>The image above is embedded using CID.</p></div>',
+        }))
+
+        return jsonify({"success": True, "id": result["id"]})
+
+    except Exception:
+        app.logger.exception("Error sending CID email")
+        return jsonify({"error": "Failed to send email"}), 500
+
+
 @app.route("/webhook", methods=["POST"])
 def handle_webhook():
     """Handle Resend webhook events."""
-    payload = request.get_data(as_text=True)
-
     # Get Svix headers
     svix_id = request.headers.get("svix-id")
     svix_timestamp = request.headers.get("svix-timestamp")
@@ -71,46 +140,81 @@ def handle_webhook():
     if not all([svix_id, svix_timestamp, svix_signature]):
         return jsonify({"error": "Missing webhook headers"}), 400
 
-    webhook_secret = os.environ.get("RESEND_WEBHOOK_SECRET")
-    if not webhook_secret:
+    if not webhook_verifier.configured:
         return jsonify({"error": "Webhook secret not configured"}), 500
 
     try:
-        # Verify webhook signature
-        resend.Webhooks.verify({
-            "payload": payload,
-            "headers": {
-                "id": svix_id,
-                "timestamp": svix_timestamp,
-                "signature": svix_signature,
-            },
-            "webhook_secret": webhook_secret,
-        })
-
-        event = json.loads(payload)
+        # Verify the signature while the body is read, chunk by chunk
+        event = webhook_verifier.verify_stream(read_chunks(request.stream), request.headers)
 
-        # Handle different event types
         event_type = event.get("type")
 
-        if event_type == "email.received":
-            print(f"New email from: {event['data']['from']}")
-            # Fetch full email content
-            email = resend.Emails.Receiving.get(event["data"]["email_id"])
-            print(f"Body: {email.get('text') or email.get('html')}")
+        with webhook_dedup.claim(svix_id) as first:
+            if not first:
+                return jsonify({"received": True, "type": event_type, "duplicate": True})
 
-        elif event_type == "email.delivered":
-            print(f"Email delivered: {event['data']['email_id']}")
+            delivery_events.ingest(event, svix_id)
+            # contact.created/updated/deleted keep the email -> id index current
+            contact_index.apply_event(event)
 
-        elif event_type == "email.bounced":
-            print(f"Email bounced: {event['data']['email_id']}")
+            # Handle different event types
+            if event_type == "email.received":
+                print(f"New email from: {event['data']['from']}")
+                # Full email content is fetched by a worker after we answer
+                webhook_inbox.accept(event, svix_id)
+
+            elif event_type == "email.delivered":
+                print(f"Email delivered: {event['data']['email_id']}")
+
+            elif event_type == "email.bounced":
+                print(f"Email bounced: {event['data']['email_id']}")
 
         return jsonify({"received": True, "type": event_type})
 
+    except DeliveryInProgress:
+        # Not a 2xx, so Svix delivers it again once the first one is done
+        return jsonify({"error": "Delivery already being processed"}), 409
+
+    except WebhookPayloadTooLarge:
+        return jsonify({"error": "Webhook payload too large"}), 413
+
     except Exception:
         app.logger.exception("Error processing webhook")
         return jsonify({"error": "Failed to process webhook"}), 400
 
 
+@app.route("/stats/deliveries")
+def delivery_stats():
+    """Counts and bounce rate over the last ?minutes= (default 60)."""
+    minutes = request.args.get("minutes", 60, type=int)
+    if not 1 <= minutes <= 7 * 24 * 60:
+        return jsonify({"error": "minutes must be between 1 and 10080"}), 400
+    return jsonify(delivery_events.window(minutes))
+
+
+@app.route("/audiences/contacts/export")
+def contacts_export():
+    """Stream every contact in the audience as ?format=ndjson (default) or csv."""
+    audience_id = os.environ.get("RESEND_AUDIENCE_ID")
+    if not audience_id:
+        return jsonify({"error": "RESEND_AUDIENCE_ID not configured"}), 400
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    try:
+        # Streamed page by page; only the first page is fetched up front
+        chunks = export_contacts(audience_id, fmt)
+    except Exception:
+        app.logger.exception("Error exporting contacts")
+        return jsonify({"error": "Failed to export contacts"}), 500
+
+    return Response(chunks, mimetype=EXPORT_FORMATS[fmt], headers={
+        "Content-Disposition": f'attachment; filename="contacts.{fmt}"',
+    })
+
+
 @app.route("/health")
 def health():
     """Health check endpoint."""
@@ -152,28 +256,16 @@ def double_optin_subscribe():
             "first_name": name,
             "unsubscribed": True,
         })
+        # So the confirmation click finds the contact without listing the audience
+        contact_index.add(audience_id, email, contact["id"])
 
-        # Step 2: Send confirmation email
-        welcome_text = f"Welcome, {name}!" if name else "Welcome!"
-
-        result = resend.Emails.send({
+        # Step 2: Send confirmation email (minified, with a plain-text part)
+        result = resend.Emails.send(render_params({
             "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
             "to": [email],
             "subject": "Confirm your subscription",
-            "html": f"""
-            <div style="font-family: Arial, sans-serif; text-align: center; padding: 40px;">
-              <h1>{welcome_text}</h1>
-              <p>Please confirm your subscription to our newsletter.</p>
-              <a href="{confirm_url}"
-                 style="display: inline-block; padding: 14px 28px; background-color: #000; color: #fff; text-decoration: none; border-radius: 6px;">
-                Confirm Subscription
-              </a>
-              <p style="color: #999; margin-top: 20px;">
-                If you didn't request this, ignore this email.
-              </p>
-            </div>
-            """,
-        })
+            "html": render_template("double_optin_confirm", {"name": name, "confirm_url": confirm_url}),
+        }))
 
         return jsonify({
             "success": True,
@@ -190,7 +282,7 @@ def double_optin_subscribe():
 @app.route("/double-optin/webhook", methods=["POST"])
 def double_optin_webhook():
     """Handle double opt-in confirmation webhook."""
-    payload = request.get_data(as_text=True)
+    payload = request.get_data()
 
     svix_id = request.headers.get("svix-id")
     svix_timestamp = request.headers.get("svix-timestamp")
@@ -199,22 +291,11 @@ def double_optin_webhook():
     if not all([svix_id, svix_timestamp, svix_signature]):
         return jsonify({"error": "Missing webhook headers"}), 400
 
-    webhook_secret = os.environ.get("RESEND_WEBHOOK_SECRET")
-    if not webhook_secret:
+    if not webhook_verifier.configured:
         return jsonify({"error": "Webhook secret not configured"}), 500
 
     try:
-        resend.Webhooks.verify({
-            "payload": payload,
-            "headers": {
-                "id": svix_id,
-                "timestamp": svix_timestamp,
-                "signature": svix_signature,
-            },
-            "webhook_secret": webhook_secret,
-        })
-
-        event = json.loads(payload)
+        event = webhook_verifier.verify(payload, request.headers)
 
         # Only process email.clicked events
         if event.get("type") != "email.clicked":
@@ -224,39 +305,29 @@ def double_optin_webhook():
                 "message": "Event ignored",
             })
 
-        audience_id = os.environ.get("RESEND_AUDIENCE_ID")
         recipient_email = event.get("data", {}).get("to", [None])[0]
 
         if not recipient_email:
             return jsonify({"error": "No recipient email"}), 400
 
-        # Find contact by email
-        contacts = resend.Contacts.list(audience_id)
-        contact = next(
-            (c for c in contacts.get("data", []) if c["email"] == recipient_email),
-            None,
-        )
-
-        if not contact:
-            return jsonify({"error": "Contact not found"}), 404
-
-        # Update contact to confirmed
-        resend.Contacts.update({
-            "audience_id": audience_id,
-            "id": contact["id"],
-            "unsubscribed": False,
-        })
-
-        print(f"Contact confirmed: {recipient_email}")
+        # A worker finds the contact and marks it confirmed after we answer;
+        # a retried delivery was queued the first time
+        with webhook_dedup.claim(f"double-optin/{svix_id}") as first:
+            if first:
+                webhook_inbox.accept(event, svix_id)
 
         return jsonify({
             "received": True,
             "type": event["type"],
-            "confirmed": True,
+            "queued": True,
+            "duplicate": not first,
             "email": recipient_email,
-            "contact_id": contact["id"],
         })
 
+    except DeliveryInProgress:
+        # Not a 2xx, so Svix delivers it again once the first one is done
+        return jsonify({"error": "Delivery already being processed"}), 409
+
     except Exception:
         app.logger.exception("Error processing double opt-in webhook")
         return jsonify({"error": "Failed to process webhook"}), 400
@@ -0,0 +1,105 @@
+"""
+Pooled HTTP Clients for the Resend SDK
+
+The SDK sends every request through `resend.default_http_client` (sync) or
+`resend.default_async_http_client` (the `*_async` methods). The built-in
+clients open a new connection for every call, so each send pays for a
+fresh TCP + TLS handshake. These clients keep one keep-alive connection
+pool for the whole process instead, so a worker can keep many sends in
+flight over warm connections.
+
+Usage:
+    import resend
+    from http_clients import PooledHTTPXClient, PooledRequestsClient
+
+    resend.default_http_client = PooledRequestsClient()
+    resend.default_async_http_client = PooledHTTPXClient()
+
+    result = await resend.Emails.send_async({...})
+
+See: https://github.com/resend/resend-python
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+import httpx
+import requests
+from resend.http_client import HTTPClient
+from resend.http_client_async import AsyncHTTPClient
+
+
+class PooledRequestsClient(HTTPClient):
+    """Sync HTTP client that reuses one requests.Session connection pool."""
+
+    def __init__(self, max_connections: int = 32, timeout: float = 30.0):
+        self._timeout = timeout
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json: Optional[Union[Dict[str, object], List[object]]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        try:
+            resp = self._session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=json if data is None and files is None else None,
+                files=files,
+                data=data,
+                timeout=self._timeout,
+            )
+            return resp.content, resp.status_code, resp.headers
+        except requests.RequestException as e:
+            # The SDK turns this into a ResendError("HttpClientError")
+            raise RuntimeError(f"Request failed: {e}") from e
+
+
+class PooledHTTPXClient(AsyncHTTPClient):
+    """Async HTTP client that reuses one httpx connection pool."""
+
+    def __init__(self, max_connections: int = 200, timeout: float = 30.0):
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json: Optional[Union[Dict[str, object], List[object]]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        try:
+            resp = await self._client.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=json if data is None and files is None else None,
+                files=files,
+                data=data,
+            )
+            return resp.content, resp.status_code, resp.headers
+        except httpx.RequestError as e:
+            # The SDK turns this into a ResendError("HttpClientError")
+            raise RuntimeError(f"Request failed: {e}") from e
+
+    async def aclose(self):
+        """Close all pooled connections."""
+        await self._client.aclose()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Cross-Process Rate Limiter for Resend API Calls
+
+Resend's rate limit applies to the whole team (2 requests/second by
+default), but every gunicorn/uvicorn worker calls the API on its own, so
+N workers happily send N times too fast and run into 429 storms.
+
+RateLimiter is a token bucket stored in a small SQLite file that every
+process on the host consults before calling Resend. When the API answers
+429, the `retry-after` header pauses the bucket itself, so all workers
+back off together instead of retrying on their own.
+
+Install it once per process and every SDK call goes through it:
+
+    import resend
+    from rate_limiter import RateLimiter, RateLimitedHTTPClient
+
+    resend.default_http_client = RateLimitedHTTPClient(RateLimiter.from_env())
+
+Key points:
+- RESEND_RATE_LIMIT: requests/second shared by all processes (default 2)
+- RESEND_RATE_LIMIT_DB: bucket file (default: in the system temp dir)
+- A 429 response is retried after the pause (it was never processed)
+
+Usage:
+    python examples/rate_limiter.py   # demo: 4 processes sharing one bucket
+
+See: https://resend.com/docs/api-reference/rate-limit
+"""
+
+import asyncio
+import email.utils
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from resend.http_client import HTTPClient
+from resend.http_client_async import AsyncHTTPClient
+from resend.http_client_requests import RequestsClient
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "resend-rate-limit.sqlite3")
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every process that opens the same file.
+
+    Args:
+        path: SQLite file holding the bucket
+        rate: Tokens (requests) added per second
+        burst: Bucket capacity; defaults to one second's worth of tokens
+        max_retries: Times a 429 response is retried before giving up
+    """
+
+    def __init__(self, path: str = DEFAULT_DB, rate: float = 2.0, burst: Optional[float] = None, max_retries: int = 3):
+        self.path = str(path)
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.max_retries = max_retries
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bucket ("
+            " id INTEGER PRIMARY KEY CHECK (id = 1),"
+            " tokens REAL NOT NULL, updated_at REAL NOT NULL, paused_until REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO bucket VALUES (1, ?, ?, 0)", (self.burst, time.time())
+        )
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        return cls(
+            path=os.environ.get("RESEND_RATE_LIMIT_DB", DEFAULT_DB),
+            rate=float(os.environ.get("RESEND_RATE_LIMIT", "2")),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return seconds to wait."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated_at, paused_until = conn.execute(
+                "SELECT tokens, updated_at, paused_until FROM bucket WHERE id = 1"
+            ).fetchone()
+
+            if paused_until > now:
+                conn.execute("COMMIT")
+                return paused_until - now
+
+            # Refill from the later of the last update and the end of a pause
+            elapsed = max(0.0, now - max(updated_at, paused_until))
+            tokens = min(self.burst, tokens + elapsed * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if not wait:
+                tokens -= 1
+
+            conn.execute(
+                "UPDATE bucket SET tokens = ?, updated_at = ? WHERE id = 1", (tokens, now)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self):
+        """Block until this process may make one API call."""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Like acquire(), without blocking the event loop while waiting."""
+        while True:
+            # The bucket update can wait up to 30s on the SQLite lock
+            wait = await asyncio.to_thread(self.try_acquire)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop every process from calling the API for `seconds`."""
+        until = time.time() + seconds
+        self._connect().execute(
+            "UPDATE bucket SET paused_until = MAX(paused_until, ?), tokens = 0 WHERE id = 1",
+            (until,),
+        )
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> bool:
+        """
+        Learn from a response's rate limit headers.
+
+        Returns:
+            True if the request was rate limited and should be retried
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+
+        if status_code == 429:
+            self.pause(retry_after(headers))
+            return True
+
+        # Out of quota for this window: pause before the next call gets a 429
+        if headers.get("ratelimit-remaining") == "0":
+            self.pause(_seconds(headers.get("ratelimit-reset")) or 1.0)
+        return False
+
+    async def observe_async(self, status_code: int, headers: Mapping[str, str]) -> bool:
+        """Like observe(), with the pause written from a worker thread."""
+        return await asyncio.to_thread(self.observe, status_code, headers)
+
+
+def retry_after(headers: Mapping[str, str], default: float = 1.0) -> float:
+    """Seconds to wait according to `retry-after` (seconds or HTTP date)."""
+    value = headers.get("retry-after") or headers.get("ratelimit-reset")
+    seconds = _seconds(value)
+    if seconds is not None:
+        return seconds
+
+    if value:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedHTTPClient(HTTPClient):
+    """Sync SDK HTTP client that waits for the shared bucket before each call."""
+
+    def __init__(self, limiter: RateLimiter, client: Optional[HTTPClient] = None):
+        self.limiter = limiter
+        self.client = client or RequestsClient()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json: Optional[Union[Dict[str, object], List[object]]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        for _ in range(self.limiter.max_retries + 1):
+            self.limiter.acquire()
+            content, status_code, resp_headers = self.client.request(
+                method, url, headers, json=json, files=files, data=data
+            )
+            if not self.limiter.observe(status_code, resp_headers):
+                break
+        return content, status_code, resp_headers
+
+
+class RateLimitedAsyncHTTPClient(AsyncHTTPClient):
+    """Async SDK HTTP client that waits for the shared bucket before each call."""
+
+    def __init__(self, limiter: RateLimiter, client: AsyncHTTPClient):
+        self.limiter = limiter
+        self.client = client
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        json: Optional[Union[Dict[str, object], List[object]]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        for _ in range(self.limiter.max_retries + 1):
+            await self.limiter.acquire_async()
+            content, status_code, resp_headers = await self.client.request(
+                method, url, headers, json=json, files=files, data=data
+            )
+            if not await self.limiter.observe_async(status_code, resp_headers):
+                break
+        return content, status_code, resp_headers
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _demo_worker(path: str, calls: int) -> list:
+    limiter = RateLimiter(path, rate=5)
+    stamps = []
+    for _ in range(calls):
+        limiter.acquire()
+        stamps.append(time.time())
+    return stamps
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+
+    print("=== Cross-Process Rate Limiter ===\n")
+
+    path = os.path.join(tempfile.mkdtemp(), "bucket.sqlite3")
+    RateLimiter(path, rate=5)
+    print("4 processes x 10 calls sharing a 5 req/s bucket...")
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        stamps = sorted(s for result in pool.map(_demo_worker, [path] * 4, [10] * 4) for s in result)
+    elapsed = time.time() - start
+
+    print(f"40 calls in {elapsed:.1f}s -> {len(stamps) / elapsed:.1f} calls/s overall")
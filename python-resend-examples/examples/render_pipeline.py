@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Email Render Pipeline: CSS Inlining, Minification and Text Part
+
+Turns authored HTML into what should actually go over the wire:
+
+1. CSS inlining: rules from <style> blocks with simple selectors (tag,
+   .class, #id, tag.class) are copied into style="" attributes, since
+   many email clients ignore <style>. Media queries and pseudo-classes
+   stay in a <style> block.
+2. Minification: comments and the indentation between block elements
+   are removed.
+3. A plain-text alternative is generated, with links as "text (url)".
+
+Results are memoized by the SHA-256 of the authored HTML, so a campaign
+that sends one body to 10,000 recipients renders it once.
+
+Key points:
+- Standard library only; good enough for hand-written email HTML, not a
+  full CSS engine (no descendant selectors or !important handling)
+- render_params() fills in "text" only when the email doesn't have one
+- stats() reports cache hits and the HTML bytes saved on the wire
+
+Usage:
+    from render_pipeline import render_params
+
+    resend.Emails.send(render_params({"from": ..., "html": authored_html}))
+
+    python examples/render_pipeline.py   # campaign demo
+
+See: https://resend.com/docs/api-reference/emails/send-email
+"""
+
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+# Whitespace around these is not rendered, so minify_html() drops it. Inline
+# elements (img, br, a, span, ...) are left out: the space in
+# "Hello <img> world" is visible.
+BLOCK_TAGS = (
+    "html|head|body|title|meta|link|style|div|p|table|thead|tbody|tfoot|tr|td|th|"
+    "h[1-6]|ul|ol|li|hr|center|blockquote|section|header|footer"
+)
+
+# A tag's attributes, skipping over quoted values (which may contain ">")
+ATTRS = r"""(?:"[^"]*"|'[^']*'|[^"'<>])"""
+
+STYLE_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+TAG_RE = re.compile(rf"<([a-zA-Z][\w-]*)(\s{ATTRS}*?)?(\s*/?)>")
+ATTR_RE = re.compile(r"""([\w-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)""")
+SIMPLE_SELECTOR_RE = re.compile(r"^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$")
+COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+PRESERVE_RE = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.S | re.I)
+BLOCK_SPACE_RE = re.compile(rf"\s*(</?(?:{BLOCK_TAGS}|!DOCTYPE)\b{ATTRS}*>)\s*", re.I)
+
+
+class RenderedEmail(NamedTuple):
+    html: str
+    text: str
+    authored_bytes: int
+    html_bytes: int
+
+
+def _parse_css(css: str):
+    """Split a stylesheet into inlinable rules and CSS that has to stay."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    rules, kept = [], []
+    pos = 0
+    while True:
+        start = css.find("{", pos)
+        if start == -1:
+            break
+        prelude = css[pos:start].strip()
+        # Match nested braces so @media blocks are kept whole
+        depth, end = 1, start + 1
+        while depth and end < len(css):
+            depth += {"{": 1, "}": -1}.get(css[end], 0)
+            end += 1
+        body = css[start + 1:end - 1].strip()
+        pos = end
+
+        if prelude.startswith("@"):
+            kept.append(f"{prelude}{{{body}}}")
+            continue
+
+        declarations = [d.strip() for d in body.split(";") if ":" in d]
+        leftover = []
+        for selector in (s.strip() for s in prelude.split(",")):
+            match = SIMPLE_SELECTOR_RE.match(selector)
+            if not match or not selector:
+                leftover.append(selector)
+                continue
+            tag, rest = match.groups()
+            ids = re.findall(r"#([\w-]+)", rest)
+            classes = re.findall(r"\.([\w-]+)", rest)
+            specificity = (len(ids), len(classes), 1 if tag else 0)
+            rules.append((specificity, len(rules), (tag or "").lower(), set(ids), set(classes), declarations))
+        if leftover:
+            kept.append(f"{', '.join(leftover)}{{{body}}}")
+    return rules, kept
+
+
+def _merge_styles(*styles: str) -> str:
+    merged = {}
+    for style in styles:
+        for declaration in style.split(";"):
+            name, sep, value = declaration.partition(":")
+            if sep and name.strip():
+                merged.pop(name.strip().lower(), None)
+                merged[name.strip().lower()] = value.strip()
+    return "; ".join(f"{name}: {value}" for name, value in merged.items())
+
+
+def inline_css(source: str) -> str:
+    """Move simple <style> rules into style attributes."""
+    css = "\n".join(STYLE_RE.findall(source))
+    if not css:
+        return source
+    rules, kept = _parse_css(css)
+    rules.sort(key=lambda rule: rule[:2])
+
+    def rewrite(match):
+        tag, attrs, close = match.group(1), match.group(2) or "", match.group(3)
+        values = {k.lower(): html.unescape(v.strip("\"'")) for k, v in ATTR_RE.findall(attrs)}
+        classes = set(values.get("class", "").split())
+        element_id = values.get("id")
+
+        matched = [
+            "; ".join(declarations)
+            for _, _, rule_tag, ids, rule_classes, declarations in rules
+            if (not rule_tag or rule_tag == tag.lower())
+            and ids <= ({element_id} if element_id else set())
+            and rule_classes <= classes
+        ]
+        if not matched:
+            return match.group(0)
+
+        # Inline styles win over stylesheet rules, as in the browser
+        style = html.escape(_merge_styles(*matched, values.get("style", "")), quote=True)
+        attrs = ATTR_RE.sub(lambda a: "" if a.group(1).lower() == "style" else a.group(0), attrs).rstrip()
+        return f'<{tag}{attrs} style="{style}"{close}>'
+
+    first = [True]
+
+    def replace_style(_):
+        if first[0] and kept:
+            first[0] = False
+            return f"<style>{' '.join(kept)}</style>"
+        return ""
+
+    without_styles = STYLE_RE.sub(replace_style, source)
+    return TAG_RE.sub(rewrite, without_styles)
+
+
+def minify_html(source: str) -> str:
+    """Drop comments and collapse whitespace (except inside <pre>/<textarea>)."""
+    parts = PRESERVE_RE.split(COMMENT_RE.sub("", source))
+    out = []
+    # split() with two groups yields [text, block, tag name, text, ...]
+    for i in range(0, len(parts), 3):
+        text = re.sub(r"\s+", " ", parts[i])
+        out.append(BLOCK_SPACE_RE.sub(r"\1", text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip()
+
+
+class _TextExtractor(HTMLParser):
+    BLOCKS = {"p", "div", "tr", "table", "ul", "ol", "li", "h1", "h2", "h3", "h4", "h5", "h6",
+              "blockquote", "center", "section", "header", "footer", "hr"}
+    SKIP = {"head", "style", "script", "title"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.skipping = 0
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP:
+            self.skipping += 1
+        elif tag == "br":
+            self.out.append("\n")
+        elif tag in self.BLOCKS:
+            self.out.append("\n\n" if tag != "li" else "\n- ")
+        elif tag == "a":
+            self.links.append((attrs.get("href"), len(self.out)))
+        elif tag == "img" and attrs.get("alt"):
+            self.out.append(attrs["alt"])
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in self.BLOCKS:
+            self.out.append("\n")
+        elif tag == "a" and self.links:
+            href, start = self.links.pop()
+            label = "".join(self.out[start:])
+            if href and not href.startswith(("#", "mailto:", "cid:")) and href != label.strip():
+                self.out[start:] = [f"{label.rstrip()} ({href})"]
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.out.append(data)
+
+    def text(self) -> str:
+        lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(self.out).split("\n"))
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def html_to_text(source: str) -> str:
+    """Plain-text alternative for an HTML email."""
+    parser = _TextExtractor()
+    parser.feed(source)
+    parser.close()
+    return parser.text()
+
+
+class RenderPipeline:
+    """
+    Inline, minify and add a text part, memoized by content hash.
+
+    Args:
+        max_entries: Rendered bodies kept in the LRU
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.authored_bytes = 0
+        self.sent_bytes = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, source: str) -> RenderedEmail:
+        key = hashlib.sha256(source.encode()).digest()
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+
+        if rendered is None:
+            inlined = inline_css(source)
+            minified = minify_html(inlined)
+            rendered = RenderedEmail(
+                html=minified,
+                text=html_to_text(inlined),
+                authored_bytes=len(source.encode()),
+                html_bytes=len(minified.encode()),
+            )
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = rendered
+                if len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        with self._lock:
+            self.authored_bytes += rendered.authored_bytes
+            self.sent_bytes += rendered.html_bytes
+        return rendered
+
+    def render_params(self, params: dict) -> dict:
+        """Copy of an email's params with rendered html and a text part."""
+        if not params.get("html"):
+            return params
+        rendered = self.render(params["html"])
+        params = dict(params, html=rendered.html)
+        params.setdefault("text", rendered.text)
+        return params
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "renders": self.misses,
+                "cache_hits": self.hits,
+                "authored_bytes": self.authored_bytes,
+                "sent_bytes": self.sent_bytes,
+                "bytes_saved": self.authored_bytes - self.sent_bytes,
+            }
+
+
+# Shared by everything in the process that sends HTML
+default_pipeline = RenderPipeline()
+
+
+def render_params(params: dict) -> dict:
+    """render_params() on the process-wide pipeline."""
+    return default_pipeline.render_params(params)
+
+
+if __name__ == "__main__":
+    import time
+
+    print("=== Email Render Pipeline ===\n")
+
+    authored = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+      <style>
+        /* Brand styles */
+        body { font-family: Arial, sans-serif; color: #333; }
+        .card { max-width: 600px; margin: 0 auto; padding: 20px; }
+        h1 { color: #111; margin-bottom: 10px; }
+        .button { display: inline-block; padding: 14px 28px; background-color: #000; color: #fff; }
+        a.button:hover { background-color: #333; }
+        @media (max-width: 600px) { .card { padding: 8px; } }
+      </style>
+    </head>
+    <body>
+      <div class="card">
+        <h1>Our spring collection is here</h1>
+        <p>
+          Fresh colours, lighter fabrics and free shipping all week.
+        </p>
+        <a class="button" href="https://example.com/spring">Shop now</a>
+        <p style="color: #999">You're receiving this because you subscribed.</p>
+      </div>
+    </body>
+    </html>
+    """
+
+    pipeline = RenderPipeline()
+    start = time.perf_counter()
+    for _ in range(10_000):
+        pipeline.render_params({"to": ["delivered@resend.dev"], "html": authored})
+    elapsed = time.perf_counter() - start
+
+    rendered = pipeline.render(authored)
+    print(rendered.html[:300] + "...\n")
+    print(rendered.text + "\n")
+
+    stats = pipeline.stats()
+    print(f"10,000 emails prepared in {elapsed * 1000:.0f}ms with {stats['renders']} render(s)")
+    print(f"HTML per email: {rendered.authored_bytes} -> {rendered.html_bytes} bytes; "
+          f"{stats['bytes_saved'] / 1e6:.1f} MB saved on the wire")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Safe Retries with Idempotency Keys
+
+A send can fail after Resend has already accepted it: the connection
+drops, a proxy times out, the worker is restarted. Retrying blindly then
+delivers the same email twice. Resend deduplicates POST /emails and
+/emails/batch requests that carry the same `Idempotency-Key` header (for
+24 hours), so a retry is safe as long as every attempt for one logical
+message reuses one key.
+
+Key points:
+- Retries only transient failures: network errors, 429, 409 concurrent
+  idempotent request, and 5xx; a request the HTTP client couldn't even
+  build (bad payload, oversized attachment) is not retried
+- Exponential backoff with full jitter, so clients don't retry in lockstep
+- Each logical send gets a fresh random key, created once and reused by
+  all of its attempts, unless you pass your own (e.g. an order id); the
+  same key must never be reused for a different email
+- idempotency_key(payload) derives a key from the content instead; only
+  use it when an identical email within 24 hours really is a duplicate,
+  since Resend would silently return the first email's id
+
+Usage:
+    python examples/retry.py   # demo against a fake API that drops responses
+
+See: https://resend.com/docs/dashboard/emails/idempotency-keys
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import Callable, Optional
+
+import resend
+from resend.exceptions import ResendError
+
+
+def new_idempotency_key(namespace: str = "email") -> str:
+    """Random key for one logical send, shared by all of its attempts."""
+    return f"{namespace}/{uuid.uuid4()}"
+
+
+def idempotency_key(payload, namespace: str = "email") -> str:
+    """Deterministic key for a logical message (same payload -> same key)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{namespace}/{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+
+def is_transient(exc: Exception) -> bool:
+    """Whether retrying `exc` might succeed."""
+    if not isinstance(exc, ResendError):
+        return False
+    if exc.error_type == "concurrent_idempotent_requests":
+        return True
+    # The SDK reports any client-side exception as 500 / HttpClientError;
+    # a payload it couldn't serialize or that was rejected won't get better
+    if exc.error_type == "HttpClientError" and isinstance(exc.__context__, (TypeError, ValueError)):
+        return False
+    try:
+        code = int(exc.code)
+    except (TypeError, ValueError):
+        return False
+    # Network failures surface as code 500 / HttpClientError
+    return code == 429 or code >= 500
+
+
+def backoff(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter delay before retry number `attempt` (0-based)."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def call_with_retry(
+    fn: Callable,
+    *args,
+    attempts: int = 5,
+    base_delay: float = 0.5,
+    max_delay: float = 10.0,
+    retry_if: Callable[[Exception], bool] = is_transient,
+):
+    """Call fn(*args), retrying transient failures with jittered backoff."""
+    for attempt in range(attempts):
+        try:
+            return fn(*args)
+        except Exception as e:
+            if attempt == attempts - 1 or not retry_if(e):
+                raise
+            time.sleep(backoff(attempt, base_delay, max_delay))
+
+
+async def call_with_retry_async(
+    fn: Callable,
+    *args,
+    attempts: int = 5,
+    base_delay: float = 0.5,
+    max_delay: float = 10.0,
+    retry_if: Callable[[Exception], bool] = is_transient,
+):
+    """Async version of call_with_retry for the SDK's *_async methods."""
+    for attempt in range(attempts):
+        try:
+            return await fn(*args)
+        except Exception as e:
+            if attempt == attempts - 1 or not retry_if(e):
+                raise
+            await asyncio.sleep(backoff(attempt, base_delay, max_delay))
+
+
+def send_with_retry(params: dict, key: Optional[str] = None, **retry_options) -> dict:
+    """resend.Emails.send with retries that can never deliver twice."""
+    options = {"idempotency_key": key or new_idempotency_key()}
+    return call_with_retry(resend.Emails.send, params, options, **retry_options)
+
+
+async def send_with_retry_async(params: dict, key: Optional[str] = None, **retry_options) -> dict:
+    """resend.Emails.send_async with retries that can never deliver twice."""
+    options = {"idempotency_key": key or new_idempotency_key()}
+    return await call_with_retry_async(resend.Emails.send_async, params, options, **retry_options)
+
+
+def batch_send_with_retry(emails: list, key: Optional[str] = None, **retry_options) -> dict:
+    """resend.Batch.send with retries; the key covers the whole batch."""
+    options = {"idempotency_key": key or new_idempotency_key("batch")}
+    return call_with_retry(resend.Batch.send, emails, options, **retry_options)
+
+
+async def batch_send_with_retry_async(emails: list, key: Optional[str] = None, **retry_options) -> dict:
+    """resend.Batch.send_async with retries; the key covers the whole batch."""
+    options = {"idempotency_key": key or new_idempotency_key("batch")}
+    return await call_with_retry_async(resend.Batch.send_async, emails, options, **retry_options)
+
+
+if __name__ == "__main__":
+    from fake_resend import start_fake_resend
+
+    print("=== Safe Retries with Idempotency Keys ===\n")
+
+    messages = [
+        {
+            "from": "Acme <onboarding@resend.dev>",
+            "to": ["delivered@resend.dev"],
+            "subject": f"Order #{i} confirmed",
+            "html": f"<p>Thanks for order #{i}!</p>",
+        }
+        for i in range(200)
+    ]
+    resend.api_key = "re_demo"
+
+    def naive_send(params):
+        return call_with_retry(resend.Emails.send, params, attempts=10, base_delay=0.01)
+
+    def safe_send(params):
+        return send_with_retry(params, attempts=10, base_delay=0.01)
+
+    for label, send in [("naive retries", naive_send), ("idempotent retries", safe_send)]:
+        # Accepts every email but drops 30% of the responses
+        server = start_fake_resend(drop_rate=0.3)
+        resend.api_url = server.url
+
+        for params in messages:
+            send(params)
+
+        duplicates = len(server.emails) - len(messages)
+        print(f"{label:20} {len(messages)} messages, {server.dropped} dropped responses, "
+              f"{len(server.emails)} delivered, {duplicates} duplicate(s)")
+        server.shutdown()
+
+    if duplicates:
+        print("\nIdempotent retries delivered duplicates!")
+        exit(1)
+    print("\nEvery message was delivered exactly once with idempotency keys.")
@@ -0,0 +1,308 @@
+"""
+Durable SQLite Job Queue
+
+A small persistent queue for work that shouldn't happen inside a web
+request: the request writes a job and returns immediately, and a pool of
+worker threads drains the queue with retries and exponential backoff.
+
+Key points:
+- WAL mode, so writers don't block readers and enqueueing stays fast
+- Jobs are leased, not deleted, while a worker runs them; a job whose
+  worker died becomes claimable again once its lease expires
+- Every claim gets its own lease id, and a worker can only finish a job
+  it still holds: one that overran its lease can't overwrite the outcome
+  of the worker that reclaimed it
+- Done and failed jobs are deleted after `retention` (default 7 days)
+- Several processes (e.g. gunicorn workers) can share one queue file
+- Failed jobs are retried with jittered backoff, then marked "failed"
+
+Usage:
+    from sqlite_queue import SQLiteQueue, QueueWorkerPool
+
+    queue = SQLiteQueue("outbox.sqlite3")
+    job_id = queue.put({"to": ["delivered@resend.dev"], ...})
+
+    QueueWorkerPool(queue, handler=lambda payload: resend.Emails.send(payload)).start()
+
+See: https://www.sqlite.org/wal.html
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    lease TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at);
+"""
+
+
+class Job:
+    """A job claimed by a worker."""
+
+    def __init__(self, id: str, payload: dict, attempts: int, lease: Optional[str] = None):
+        self.id = id
+        self.payload = payload
+        self.attempts = attempts
+        self.lease = lease
+
+
+class SQLiteQueue:
+    """
+    Persistent FIFO-ish queue stored in a single SQLite file.
+
+    Args:
+        path: Database file (shared by every process using the queue)
+        lease: Seconds a claimed job stays invisible to other workers
+        retention: Seconds done and failed jobs are kept (None keeps them)
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str, lease: float = 300.0, retention: Optional[float] = 7 * 24 * 3600):
+        self.path = str(path)
+        self.lease = lease
+        self.retention = retention
+        self._local = threading.local()
+        self._new_job = threading.Condition()
+        self._lock = threading.Lock()
+        self._finished = 0
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        # Queues created before claims had their own lease id
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "lease" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, payload: dict, delay: float = 0.0) -> str:
+        """Store a job and return its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, payload, status, run_at, created_at, updated_at)"
+            " VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, json.dumps(payload), now + delay, now, now),
+        )
+        with self._new_job:
+            self._new_job.notify()
+        return job_id
+
+    def claim(self) -> Optional[Job]:
+        """Lease the next ready job, or return None if there isn't one."""
+        conn = self._connect()
+        now = time.time()
+        lease = uuid.uuid4().hex
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs"
+                " WHERE status IN ('queued', 'running') AND run_at <= ?"
+                " ORDER BY run_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                " run_at = ?, updated_at = ?, lease = ? WHERE id = ?",
+                (now + self.lease, now, lease, row[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return Job(row[0], json.loads(row[1]), row[2] + 1, lease)
+
+    def complete(self, job: Job, result: Optional[dict] = None) -> bool:
+        """Mark a job as done and keep its result."""
+        return self._finish(job, "done", result=json.dumps(result))
+
+    def retry(self, job: Job, error: str, delay: float) -> bool:
+        """Put a job back to run again after `delay` seconds."""
+        return self._finish(job, "queued", error=error, run_at=time.time() + delay)
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Give up on a job."""
+        return self._finish(job, "failed", error=error)
+
+    def _finish(self, job: Job, status: str, result=None, error=None, run_at=None) -> bool:
+        """Record a claimed job's outcome; False if its lease was lost."""
+        conn = self._connect()
+        now = time.time()
+        # Only while this claim still holds the job: once the lease expired
+        # and another worker claimed it, that worker records the outcome
+        updated = conn.execute(
+            "UPDATE jobs SET status = ?, result = COALESCE(?, result),"
+            " error = ?, run_at = COALESCE(?, run_at), updated_at = ?, lease = NULL"
+            " WHERE id = ? AND status = 'running' AND lease = ?",
+            (status, result, error, run_at, now, job.id, job.lease),
+        ).rowcount
+        if not updated:
+            logger.warning("Job %s: lease lost, outcome %r not recorded", job.id, status)
+            return False
+
+        with self._lock:
+            self._finished += 1
+            purge = self.retention is not None and self._finished % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+        return True
+
+    def purge(self, older_than: Optional[float] = None) -> int:
+        """Delete done and failed jobs last updated more than `older_than` seconds ago."""
+        older_than = self.retention if older_than is None else older_than
+        return self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at <= ?",
+            (time.time() - older_than,),
+        ).rowcount
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job's status record, or None if it doesn't exist (or was purged)."""
+        row = self._connect().execute(
+            "SELECT id, status, attempts, result, error, created_at, updated_at"
+            " FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "attempts": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def counts(self) -> dict:
+        """Number of jobs per status."""
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ).fetchall()
+        return dict(rows)
+
+    def wait_for_job(self, timeout: float):
+        """Sleep until a job is put in this process, or `timeout` passes."""
+        with self._new_job:
+            self._new_job.wait(timeout)
+
+    def wake_all(self):
+        """Wake every thread blocked in wait_for_job."""
+        with self._new_job:
+            self._new_job.notify_all()
+
+
+class QueueWorkerPool:
+    """
+    Worker threads that drain a SQLiteQueue.
+
+    Args:
+        queue: The queue to drain
+        handler: Called with each job's payload; its return value is stored
+        workers: Number of threads
+        max_attempts: Attempts before a job is marked "failed"
+        base_delay: First retry delay in seconds (doubles every attempt)
+        max_delay: Upper bound for the retry delay
+        is_retryable: Decides whether an exception is worth retrying
+        poll_interval: How often idle workers look for jobs put by other processes
+    """
+
+    def __init__(
+        self,
+        queue: SQLiteQueue,
+        handler: Callable[[dict], Optional[dict]],
+        workers: int = 4,
+        max_attempts: int = 8,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        is_retryable: Callable[[Exception], bool] = lambda e: True,
+        poll_interval: float = 1.0,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.is_retryable = is_retryable
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> "QueueWorkerPool":
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"queue-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self.queue.wake_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.OperationalError:
+                logger.exception("Could not claim a job")
+                job = None
+
+            if job is None:
+                self.queue.wait_for_job(self.poll_interval)
+                continue
+
+            self._run(job)
+
+    def _run(self, job: Job):
+        try:
+            result = self.handler(job.payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if self.is_retryable(e) and job.attempts < self.max_attempts:
+                delay = min(self.max_delay, self.base_delay * 2 ** (job.attempts - 1))
+                # Jitter keeps workers from retrying in lockstep
+                delay = random.uniform(delay / 2, delay)
+                logger.warning("Job %s failed (attempt %d), retrying in %.1fs: %s",
+                               job.id, job.attempts, delay, error)
+                self.queue.retry(job, error, delay)
+            else:
+                logger.error("Job %s failed permanently: %s", job.id, error)
+                self.queue.fail(job, error)
+            return
+
+        self.queue.complete(job, result)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Cached Template Variable Schemas
+
+Template variables must match the names declared in the Resend template
+exactly (case-sensitive!), and a variable without a fallback value is
+required. A mismatch normally only shows up as a failed send, after a
+round trip and a rate limit slot. TemplateSchemaCache fetches each
+template's declared variables once and validates `variables` locally in
+microseconds before anything is sent.
+
+Key points:
+- Each template is fetched with resend.Templates.get on first use
+- Entries are kept for `ttl` seconds; a stale entry is still used while
+  a background thread refreshes it, so no request waits for the API
+- Unknown keys (with a hint for case typos), missing required keys and
+  wrong types (string/number) are reported
+- If a template can't be fetched (network, 5xx, or a key without
+  template access), validation is skipped and the API has the last word
+- Failures are remembered for `negative_ttl` seconds too, and concurrent
+  misses for one template share a single fetch, so a missing or
+  unreachable template doesn't add a round trip to every request
+
+Usage:
+    from template_schema import TemplateSchemaCache
+
+    schemas = TemplateSchemaCache(ttl=300)
+    problems = schemas.validate(template_id, variables)   # [] when valid
+
+    python examples/template_schema.py   # demo against the fake API
+
+See: https://resend.com/docs/dashboard/emails/templates
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import resend
+
+from retry import call_with_retry, is_transient
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownTemplateError(LookupError):
+    """The template id doesn't exist."""
+
+
+# Cached in place of the declared variables for a template that 404s
+_UNKNOWN = "unknown"
+
+
+def validate_variables(declared: Dict[str, dict], variables: Optional[dict]) -> List[str]:
+    """Compare `variables` with a template's declared variables by key."""
+    variables = variables or {}
+    if not isinstance(variables, dict):
+        return ["variables must be an object"]
+    problems = []
+
+    by_lower = {key.lower(): key for key in declared}
+    for key, value in variables.items():
+        variable = declared.get(key)
+        if variable is None:
+            match = by_lower.get(key.lower())
+            hint = f" (did you mean '{match}'?)" if match else ""
+            problems.append(f"unknown variable '{key}'{hint}")
+        elif variable.get("type") == "number":
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"variable '{key}' must be a number")
+        elif variable.get("type") == "string" and not isinstance(value, str):
+            problems.append(f"variable '{key}' must be a string")
+
+    for key, variable in declared.items():
+        if key not in variables and variable.get("fallback_value") is None:
+            problems.append(f"missing required variable '{key}'")
+
+    return problems
+
+
+class TemplateSchemaCache:
+    """
+    TTL cache of template variable declarations, refreshed in the background.
+
+    Args:
+        ttl: Seconds before an entry is refreshed
+        negative_ttl: Seconds an unknown or unavailable template is
+            remembered before it is fetched again
+    """
+
+    def __init__(self, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        # template id -> (fetched at, declared variables, None or _UNKNOWN)
+        self._entries: Dict[str, tuple] = {}
+        self._refreshing = set()
+        self._fetching: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, template_id: str):
+        """Declared variables, _UNKNOWN for a 404, or None if the fetch failed."""
+        try:
+            # One retry at most: a request may be waiting on this
+            template = call_with_retry(resend.Templates.get, template_id, attempts=2)
+        except Exception as e:
+            if getattr(e, "code", None) in (404, "404"):
+                return _UNKNOWN
+            level = logging.WARNING if is_transient(e) else logging.ERROR
+            logger.log(level, "Could not fetch template %s: %s", template_id, e)
+            return None
+        return {v["key"]: v for v in template.get("variables") or []}
+
+    def _store(self, template_id: str, value):
+        now = time.monotonic()
+        with self._lock:
+            current = self._entries.get(template_id)
+            if value is None and current is not None and isinstance(current[1], dict):
+                # A failed refresh keeps the last good copy, due again in negative_ttl
+                self._entries[template_id] = (now - self.ttl + self.negative_ttl, current[1])
+            else:
+                self._entries[template_id] = (now, value)
+
+    def _refresh(self, template_id: str):
+        try:
+            self._store(template_id, self._load(template_id))
+        finally:
+            with self._lock:
+                self._refreshing.discard(template_id)
+
+    def get(self, template_id: str) -> Optional[Dict[str, dict]]:
+        """
+        Declared variables by key, or None if the template is unavailable.
+
+        Raises:
+            UnknownTemplateError: The API answered 404 for this id
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(template_id)
+                now = time.monotonic()
+                if entry is not None:
+                    fetched_at, value = entry
+                    if isinstance(value, dict):
+                        self.hits += 1
+                        if now - fetched_at > self.ttl and template_id not in self._refreshing:
+                            self._refreshing.add(template_id)
+                            threading.Thread(target=self._refresh, args=(template_id,), daemon=True).start()
+                        return value
+                    if now - fetched_at <= self.negative_ttl:
+                        self.hits += 1
+                        return self._declared(template_id, value)
+                # Single flight: later misses wait for the fetch in progress
+                fetching = self._fetching.get(template_id)
+                if fetching is None:
+                    self.misses += 1
+                    done = self._fetching[template_id] = threading.Event()
+            if fetching is None:
+                break
+            fetching.wait()
+
+        try:
+            value = self._load(template_id)
+            self._store(template_id, value)
+        finally:
+            with self._lock:
+                del self._fetching[template_id]
+            done.set()
+        return self._declared(template_id, value)
+
+    @staticmethod
+    def _declared(template_id: str, value) -> Optional[Dict[str, dict]]:
+        if value == _UNKNOWN:
+            raise UnknownTemplateError(template_id)
+        return value
+
+    def validate(self, template_id: str, variables: Optional[dict]) -> List[str]:
+        """Problems with `variables` for this template ([] when valid)."""
+        try:
+            declared = self.get(template_id)
+        except UnknownTemplateError:
+            return [f"unknown template '{template_id}'"]
+        if declared is None:
+            return []
+        return validate_variables(declared, variables)
+
+
+if __name__ == "__main__":
+    import timeit
+
+    from fake_resend import start_fake_resend
+
+    server = start_fake_resend(latency=0.05)
+    resend.api_key = "re_demo"
+    resend.api_url = server.url
+
+    print("=== Cached Template Variable Schemas ===\n")
+
+    schemas = TemplateSchemaCache(ttl=300)
+    for variables in [
+        {"NAME": "Ada", "ORDER_TOTAL": 42},
+        {"name": "Ada", "ORDER_TOTAL": "42"},
+        {"COMPANY": "Acme"},
+    ]:
+        problems = schemas.validate("tmpl_welcome", variables)
+        print(f"{variables}\n  -> {problems or 'valid'}")
+
+    number = 100_000
+    seconds = timeit.timeit(
+        lambda: schemas.validate("tmpl_welcome", {"NAME": "Ada", "ORDER_TOTAL": 42}), number=number
+    )
+    print(f"\nCached validation: {seconds / number * 1e6:.2f} us "
+          f"({schemas.misses} API call(s) for {schemas.hits + schemas.misses} validations)")
+
+    # A typo'd template id is remembered for negative_ttl too
+    before = server.requests
+    for _ in range(100):
+        schemas.validate("tmpl_welcom", {"NAME": "Ada"})
+    print(f"Unknown template validated 100 times with {server.requests - before} API call(s)")
+    server.shutdown()
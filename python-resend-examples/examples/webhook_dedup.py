@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Webhook Delivery Deduplication
+
+Svix retries a delivery until it gets a 2xx, so a slow answer or a
+network hiccup means the same event arrives again, and with several app
+processes the retry usually lands on a different one. Every delivery
+carries the svix-id of its message, identical across retries.
+WebhookDeduplicator remembers the ids it has handled and answers repeats
+with a dict lookup, before any queue write or API call.
+
+Key points:
+- Per process: an LRU of ids with a TTL and a hard cap on entries;
+  stats() counts duplicates, TTL expiries and capacity evictions
+- Optional shared SQLite table (RESEND_WEBHOOK_DEDUP_DB) so a retry that
+  reaches another worker process is caught too
+- claim() is a context manager: if handling the first delivery raises,
+  the id is forgotten so Svix's retry isn't mistaken for a duplicate.
+  An id only counts as handled once its block has finished
+- A retry that arrives while the first delivery is still being handled
+  raises DeliveryInProgress; answer it with a non-2xx (409) so Svix tries
+  again later, rather than calling it a duplicate of a delivery that may
+  still fail. A claim in flight expires after processing_timeout, in
+  case its process died
+- Svix sends one message to every endpoint with the same id, so each
+  endpoint should use its own key prefix
+- Check signatures first; otherwise anyone could burn ids
+
+Usage:
+    from webhook_dedup import WebhookDeduplicator
+
+    dedup = WebhookDeduplicator.from_env()
+
+    try:
+        with dedup.claim(request.headers["svix-id"]) as first:
+            if not first:
+                return {"received": True, "duplicate": True}
+            ...handle the event...
+    except DeliveryInProgress:
+        return {"error": "Already being processed"}, 409
+
+    python examples/webhook_dedup.py   # retry storm demo
+
+See: https://docs.svix.com/retries
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional, Set
+
+# Svix retries for a little over a day before giving up
+DEFAULT_TTL = 48 * 3600
+
+# A row with done = 0 is a claim in flight, expiring after processing_timeout
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS webhook_deliveries_expiry ON webhook_deliveries (expires_at);
+"""
+
+
+class DeliveryInProgress(Exception):
+    """Another delivery of the same message is still being handled."""
+
+
+class WebhookDeduplicator:
+    """
+    Remembers handled webhook deliveries by svix-id.
+
+    Args:
+        ttl: Seconds an id is remembered
+        max_entries: Ids kept in memory per process (oldest evicted first)
+        path: Optional SQLite file shared by every process on the host
+        processing_timeout: Seconds a claim in flight holds off other
+            deliveries of its id in other processes
+    """
+
+    # Expired rows are deleted from the shared table every this many inserts
+    PURGE_EVERY = 1000
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = 100_000,
+        path: Optional[str] = None,
+        processing_timeout: float = 60.0,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = str(path) if path else None
+        self.processing_timeout = processing_timeout
+        self.duplicates = 0
+        self.in_progress = 0
+        self.expired = 0
+        self.evicted = 0
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._in_flight: Set[str] = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inserts = 0
+        if self.path:
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+            # Tables created before claims in flight were tracked
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(webhook_deliveries)")}
+            if "done" not in columns:
+                conn.execute("ALTER TABLE webhook_deliveries ADD COLUMN done INTEGER NOT NULL DEFAULT 1")
+
+    @classmethod
+    def from_env(cls) -> "WebhookDeduplicator":
+        return cls(
+            ttl=float(os.environ.get("RESEND_WEBHOOK_DEDUP_TTL", DEFAULT_TTL)),
+            max_entries=int(os.environ.get("RESEND_WEBHOOK_DEDUP_MAX", "100000")),
+            path=os.environ.get("RESEND_WEBHOOK_DEDUP_DB") or None,
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _seen_locally(self, key: str, now: float) -> bool:
+        expires_at = self._seen.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= now:
+            del self._seen[key]
+            self.expired += 1
+            return False
+        self._seen.move_to_end(key)
+        return True
+
+    def _remember(self, key: str, now: float):
+        self._seen[key] = now + self.ttl
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_entries:
+            _, expires_at = self._seen.popitem(last=False)
+            if expires_at <= now:
+                self.expired += 1
+            else:
+                self.evicted += 1
+
+    def _claim_shared(self, key: str) -> Optional[bool]:
+        """Claim `key` in the shared table: None if claimed, else whether it's done."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM webhook_deliveries WHERE key = ? AND expires_at <= ?", (key, now))
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO webhook_deliveries (key, expires_at, done) VALUES (?, ?, 0)",
+                (key, now + self.processing_timeout),
+            ).rowcount
+            row = None if inserted else conn.execute(
+                "SELECT done FROM webhook_deliveries WHERE key = ?", (key,)
+            ).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._inserts += 1
+            purge = self._inserts % self.PURGE_EVERY == 0
+        if purge:
+            conn.execute("DELETE FROM webhook_deliveries WHERE expires_at <= ?", (now,))
+        return None if row is None else bool(row[0])
+
+    def first_delivery(self, key: str) -> bool:
+        """
+        Claim a delivery for handling; False if `key` was already handled.
+
+        Call complete() once it is handled, or forget() if that fails;
+        claim() does both.
+
+        Raises:
+            DeliveryInProgress: Another delivery of `key` is being handled
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._seen_locally(key, now):
+                self.duplicates += 1
+                return False
+            if key in self._in_flight:
+                self.in_progress += 1
+                raise DeliveryInProgress(key)
+            self._in_flight.add(key)
+
+        try:
+            done = self._claim_shared(key) if self.path else None
+        except BaseException:
+            with self._lock:
+                self._in_flight.discard(key)
+            raise
+
+        if done is None:
+            return True
+        with self._lock:
+            self._in_flight.discard(key)
+            if done:
+                self.duplicates += 1
+                self._remember(key, now)
+                return False
+            self.in_progress += 1
+        raise DeliveryInProgress(key)
+
+    def complete(self, key: str):
+        """Mark a claimed delivery as handled; later deliveries are duplicates."""
+        with self._lock:
+            self._in_flight.discard(key)
+            self._remember(key, time.monotonic())
+        if self.path:
+            self._connect().execute(
+                "UPDATE webhook_deliveries SET done = 1, expires_at = ? WHERE key = ?", (time.time() + self.ttl, key)
+            )
+
+    def forget(self, key: str):
+        """Allow `key` again, e.g. because handling it failed."""
+        with self._lock:
+            self._in_flight.discard(key)
+            self._seen.pop(key, None)
+        if self.path:
+            self._connect().execute("DELETE FROM webhook_deliveries WHERE key = ?", (key,))
+
+    @contextmanager
+    def claim(self, key: str) -> Iterator[bool]:
+        """first_delivery() that is completed when the block ends and undone if it raises."""
+        first = self.first_delivery(key)
+        try:
+            yield first
+        except BaseException:
+            if first:
+                self.forget(key)
+            raise
+        if first:
+            self.complete(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._seen),
+                "max_entries": self.max_entries,
+                "duplicates": self.duplicates,
+                "in_progress": self.in_progress,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+if __name__ == "__main__":
+    import random
+    import shutil
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("=== Webhook Delivery Deduplication ===\n")
+
+    # 2,000 messages, each delivered 1-4 times (Svix retries after timeouts)
+    deliveries = [f"msg_{i}" for i in range(2000) for _ in range(random.randint(1, 4))]
+    random.shuffle(deliveries)
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "dedup.sqlite3")
+    # Two "processes", each with its own memory, sharing one table
+    workers = [WebhookDeduplicator(path=path), WebhookDeduplicator(path=path)]
+
+    handled = []
+
+    def deliver(i: int, svix_id: str) -> bool:
+        try:
+            with workers[i % 2].claim(svix_id) as first:
+                if first:
+                    handled.append(svix_id)
+        except DeliveryInProgress:
+            # Answered with a 409: Svix delivers it again later
+            return False
+        return True
+
+    def deliver_until_acknowledged(i: int, svix_id: str):
+        while not deliver(i, svix_id):
+            time.sleep(0.001)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(deliver_until_acknowledged, range(len(deliveries)), deliveries))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(deliveries)} deliveries of 2000 messages -> handled {len(handled)} "
+          f"({len(set(handled))} distinct) in {elapsed * 1000:.0f}ms")
+    for i, dedup in enumerate(workers):
+        print(f"  process {i}: {dedup.stats()}")
+
+    # Memory is capped: the oldest ids are evicted, and counted
+    small = WebhookDeduplicator(max_entries=1000)
+    for i in range(5000):
+        with small.claim(f"msg_{i}"):
+            pass
+    print(f"\nCapped at 1000 entries after 5000 ids: {small.stats()}")
+    shutil.rmtree(directory)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Ack-First Webhook Ingestion
+
+A webhook handler that calls Resend before answering (fetching an inbound
+email's content, looking up and updating a contact) makes every delivery
+wait for another API round trip. When Resend is slow or the rate limit
+kicks in, the handler times out, Svix retries, and the retries pile onto
+the same slow path.
+
+WebhookInbox splits the two: the endpoint verifies the signature, writes
+the event to a local SQLite queue (see sqlite_queue.py) and answers 200
+within a millisecond or two. A bounded pool of worker threads then runs
+the follow-up work, retrying transient API errors with backoff.
+
+Key points:
+- Handlers are registered per event type; other events aren't queued
+- The queue survives restarts, so an acknowledged event is never lost
+- Workers have their own concurrency limit, separate from the web
+  server's, and go through the same rate limiter as everything else
+- RESEND_WEBHOOK_INBOX: queue file (default: in the system temp dir);
+  RESEND_WEBHOOK_WORKERS: worker threads (default 4)
+
+Usage:
+    from webhook_inbox import WebhookInbox, fetch_inbound_email
+
+    inbox = WebhookInbox.from_env({"email.received": fetch_inbound_email}).start()
+
+    event = verifier.verify(payload, request.headers)
+    inbox.accept(event, request.headers["svix-id"])
+    return {"received": True}
+
+    python examples/webhook_inbox.py   # inline vs ack-first demo
+
+See: https://resend.com/docs/dashboard/webhooks/introduction
+"""
+
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, Optional
+
+import resend
+
+from contact_index import ContactIndex, default_index
+from retry import is_transient
+from sqlite_queue import QueueWorkerPool, SQLiteQueue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "resend-webhooks.sqlite3")
+
+
+def fetch_inbound_email(event: dict) -> dict:
+    """Fetch the content of a received email (email.received)."""
+    email = resend.Emails.Receiving.get(event["data"]["email_id"])
+    body = email.get("text") or email.get("html") or ""
+    logger.info("Inbound email from %s: %d characters", email.get("from"), len(body))
+    return {"email_id": email["id"], "from": email.get("from"), "subject": email.get("subject")}
+
+
+def confirm_subscription(event: dict, audience_id: str, index: Optional[ContactIndex] = None) -> dict:
+    """Mark the clicking recipient as subscribed (double opt-in, email.clicked)."""
+    recipient_email = event["data"]["to"][0]
+    if index is None:
+        index = default_index()
+
+    def confirm(contact_id: str) -> str:
+        resend.Contacts.update({"audience_id": audience_id, "id": contact_id, "unsubscribed": False})
+        return contact_id
+
+    # The contact id comes from the local index; the API is only listed on a miss
+    contact_id = index.with_contact(audience_id, recipient_email, confirm)
+    logger.info("Contact confirmed: %s", recipient_email)
+    return {"email": recipient_email, "contact_id": contact_id}
+
+
+class WebhookInbox:
+    """
+    Durable queue of verified webhook events and the workers that process them.
+
+    Args:
+        queue: Where accepted events are stored
+        handlers: Event type -> function run by a worker with the event
+        workers: Number of worker threads
+        **pool_options: Passed to QueueWorkerPool (max_attempts, ...)
+    """
+
+    def __init__(
+        self,
+        queue: SQLiteQueue,
+        handlers: Dict[str, Callable[[dict], Optional[dict]]],
+        workers: int = 4,
+        **pool_options,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        pool_options.setdefault("is_retryable", is_transient)
+        self.pool = QueueWorkerPool(queue, self._process, workers=workers, **pool_options)
+
+    @classmethod
+    def from_env(cls, handlers: Dict[str, Callable[[dict], Optional[dict]]], **kwargs) -> "WebhookInbox":
+        kwargs.setdefault("workers", int(os.environ.get("RESEND_WEBHOOK_WORKERS", "4")))
+        return cls(SQLiteQueue(os.environ.get("RESEND_WEBHOOK_INBOX", DEFAULT_DB)), handlers, **kwargs)
+
+    def accept(self, event: dict, svix_id: Optional[str] = None) -> Optional[str]:
+        """Queue a verified event if it has a handler; returns the job id."""
+        if event.get("type") not in self.handlers:
+            return None
+        return self.queue.put({"svix_id": svix_id, "event": event})
+
+    def _process(self, payload: dict) -> Optional[dict]:
+        event = payload["event"]
+        return self.handlers[event["type"]](event)
+
+    def start(self) -> "WebhookInbox":
+        if self.pool.workers:
+            self.pool.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self.pool.stop(timeout)
+
+
+if __name__ == "__main__":
+    import shutil
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fake_resend import spawn_fake_resend
+
+    server, server_url = spawn_fake_resend(latency=0.3)
+    resend.api_key = "re_demo"
+    resend.api_url = server_url
+
+    print("=== Ack-First Webhook Ingestion ===\n")
+
+    events = [
+        {"type": "email.received", "data": {"email_id": f"inbound-{i}", "from": "sender@example.com"}}
+        for i in range(40)
+    ]
+
+    def latency(handle, event) -> float:
+        start = time.perf_counter()
+        handle(event)
+        return time.perf_counter() - start
+
+    def timed(handle):
+        # 8 concurrent deliveries, like a webhook burst on a small server
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            latencies = list(pool.map(lambda e: latency(handle, e), events))
+        print(f"  worst response: {max(latencies) * 1000:.0f}ms, "
+              f"all answered after {time.perf_counter() - start:.2f}s")
+
+    print("Inline (fetch the email inside the request):")
+    timed(fetch_inbound_email)
+
+    directory = tempfile.mkdtemp()
+    inbox = WebhookInbox(SQLiteQueue(os.path.join(directory, "inbox.sqlite3")),
+                         {"email.received": fetch_inbound_email}, workers=4).start()
+    print("Ack-first (queue, answer, fetch in the background):")
+    timed(inbox.accept)
+
+    start = time.perf_counter()
+    while inbox.queue.counts().get("done", 0) < len(events):
+        time.sleep(0.05)
+    print(f"  background workers finished {len(events)} fetches {time.perf_counter() - start:.2f}s later")
+
+    inbox.stop()
+    server.terminate()
+    shutil.rmtree(directory)
@@ -7,21 +7,28 @@ Key points:
 - Maximum total attachment size: 40MB
 - Attachments NOT supported with batch sending
 - Use base64 encoding for content
+- Pass a file path to stream it from disk instead of loading it into
+  memory (see attachments.py); the size limit is checked before sending
 
-Usage: python examples/with_attachments.py
+Usage: python examples/with_attachments.py [path/to/file]
 
 @see https://resend.com/docs/send-with-attachments
 """
 
 import os
-import base64
+import sys
 from datetime import datetime
 import resend
 from dotenv import load_dotenv
 
+from attachments import AttachmentTooLarge, FileAttachment, StreamingAttachmentsClient, encode_attachment
+
 load_dotenv()
 resend.api_key = os.environ["RESEND_API_KEY"]
 
+# Streams FileAttachment content from disk while the request is sent
+resend.default_http_client = StreamingAttachmentsClient()
+
 
 def main():
     """Send email with attachment."""
@@ -34,22 +41,25 @@ Sent at: {datetime.now().isoformat()}
 """
 
     try:
+        if len(sys.argv) > 1:
+            attachment = FileAttachment(sys.argv[1])
+        else:
+            attachment = encode_attachment(file_content.encode(), "sample.txt")
+
         result = resend.Emails.send({
             "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
             "to": ["delivered@resend.dev"],
             "subject": "Email with Attachment",
             "html": "<h1>Your attachment is ready</h1><p>Please find the file attached.</p>",
-            "attachments": [
-                {
-                    "filename": "sample.txt",
-                    "content": base64.b64encode(file_content.encode()).decode(),
-                },
-            ],
+            "attachments": [attachment],
         })
 
         print("Email with attachment sent!")
         print(f"Email ID: {result['id']}")
 
+    except AttachmentTooLarge as e:
+        print(f"Attachment too large: {e}")
+        exit(1)
     except Exception as e:
         print(f"Error: {e}")
         exit(1)
@@ -6,6 +6,10 @@ Demonstrates embedding images directly in email HTML
 using Content-ID references. The image appears inline
 in the email body rather than as a downloadable attachment.
 
+The HTML refers to examples/assets/logo.png as `asset:logo`; the asset
+registry (asset_registry.py) rewrites that to `cid:logo` and adds the
+matching inline attachment, encoded once when the registry loads.
+
 Usage:
     python examples/with_cid_attachments.py
 
@@ -13,28 +17,26 @@ See: https://resend.com/docs/send-with-attachments#inline-attachments
 """
 
 import os
-import base64
 import resend
 from dotenv import load_dotenv
 
+from asset_registry import asset_registry
+from render_pipeline import render_params
+
 load_dotenv()
 
 resend.api_key = os.environ["RESEND_API_KEY"]
 
-# Create a placeholder image (or load from file)
-# In a real app:
-# with open("path/to/logo.png", "rb") as f:
-#     image_content = base64.b64encode(f.read()).decode()
-placeholder_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="
-
-result = resend.Emails.send({
+# inline_params turns asset:logo into cid:logo plus the logo attachment;
+# render_params strips the indentation below and adds a plain-text part
+result = resend.Emails.send(render_params(asset_registry.inline_params({
     "from": os.environ.get("EMAIL_FROM", "Acme <onboarding@resend.dev>"),
     "to": ["delivered@resend.dev"],
     "subject": "Email with Inline Image - Python Example",
     "html": """
         <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
             <div style="text-align: center; padding: 20px; background: #f5f5f5;">
-                <img src="cid:logo" alt="Company Logo" width="100" height="100" />
+                <img src="asset:logo" alt="Company Logo" width="100" height="100" />
             </div>
             <div style="padding: 20px;">
                 <h1 style="color: #333;">Inline Image Example</h1>
@@ -50,14 +52,7 @@ result = resend.Emails.send({
             </div>
         </div>
     """,
-    "attachments": [
-        {
-            "filename": "logo.png",
-            "content": placeholder_image,
-            "content_id": "logo",
-        }
-    ],
-})
+})))
 
 print("Email sent with inline image!")
 print(f"ID: {result['id']}")
@@ -0,0 +1,126 @@
+"""retry.py against the fake API, with responses dropped after the send was accepted."""
+
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+import resend
+from resend.exceptions import ResendError
+from resend.http_client_httpx import HTTPXClient
+from resend.http_client_requests import RequestsClient
+
+from fake_resend import start_fake_resend
+from retry import batch_send_with_retry, send_with_retry, send_with_retry_async
+
+FAST = {"attempts": 10, "base_delay": 0.001, "max_delay": 0.01}
+
+
+class RecordingClient(RequestsClient):
+    """Notes the Idempotency-Key of every POST the SDK makes."""
+
+    def __init__(self, keys: list):
+        super().__init__()
+        self.keys = keys
+
+    def request(self, method, url, headers, json=None, files=None, data=None):
+        if method.lower() == "post":
+            self.keys.append(headers.get("Idempotency-Key"))
+        return super().request(method, url, headers, json=json, files=files, data=data)
+
+
+class AsyncRecordingClient(HTTPXClient):
+    def __init__(self, keys: list):
+        super().__init__()
+        self.keys = keys
+
+    async def request(self, method, url, headers, json=None, files=None, data=None):
+        if method.lower() == "post":
+            self.keys.append(headers.get("Idempotency-Key"))
+        return await super().request(method, url, headers, json=json, files=files, data=data)
+
+
+@pytest.fixture
+def keys():
+    return []
+
+
+@pytest.fixture
+def fake(monkeypatch, keys):
+    random.seed(1234)
+    server = start_fake_resend(drop_rate=0.3)
+    monkeypatch.setattr(resend, "api_key", "re_test")
+    monkeypatch.setattr(resend, "api_url", server.url)
+    monkeypatch.setattr(resend, "default_http_client", RecordingClient(keys))
+    monkeypatch.setattr(resend, "default_async_http_client", AsyncRecordingClient(keys))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def email(i: int) -> dict:
+    return {
+        "from": "Acme <onboarding@resend.dev>",
+        "to": ["delivered@resend.dev"],
+        "subject": f"Order #{i}",
+        "html": f"<p>Order #{i}</p>",
+    }
+
+
+def test_each_send_is_delivered_once_despite_dropped_responses(fake, keys):
+    ids = [send_with_retry(email(i), **FAST)["id"] for i in range(40)]
+
+    assert fake.dropped > 0
+    assert len(fake.emails) == 40
+    assert sorted(ids) == sorted(e["id"] for e in fake.emails)
+    # Retried sends reused their key; no key was shared by two sends
+    attempts = Counter(keys)
+    assert len(attempts) == 40
+    assert sum(attempts.values()) == 40 + fake.dropped
+
+
+def test_identical_sends_are_not_collapsed(fake, keys):
+    first = send_with_retry(email(1), **FAST)["id"]
+    second = send_with_retry(email(1), **FAST)["id"]
+
+    assert first != second
+    assert len(fake.emails) == 2
+
+
+def test_explicit_key_is_used_for_every_attempt(fake, keys):
+    for _ in range(3):
+        send_with_retry(email(1), key="order/1", **FAST)
+
+    assert set(keys) == {"order/1"}
+    assert len(fake.emails) == 1
+
+
+def test_batch_is_delivered_once(fake, keys):
+    for _ in range(10):
+        batch_send_with_retry([email(i) for i in range(5)], **FAST)
+
+    assert len(fake.emails) == 50
+    assert len(set(keys)) == 10
+
+
+def test_async_send_is_delivered_once(fake, keys):
+    async def send_all():
+        return await asyncio.gather(*(send_with_retry_async(email(i), **FAST) for i in range(20)))
+
+    results = asyncio.run(send_all())
+
+    assert len({r["id"] for r in results}) == 20
+    assert len(fake.emails) == 20
+    assert len(set(keys)) == 20
+
+
+def test_validation_errors_are_not_retried(fake, keys):
+    fake.drop_rate = 0
+    invalid = dict(email(1), to=["not-an-address"])
+
+    with pytest.raises(ResendError) as error:
+        send_with_retry(invalid, **FAST)
+
+    assert str(error.value.code) == "422"
+    assert len(keys) == 1
+    assert fake.emails == []